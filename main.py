@@ -3,6 +3,7 @@
 import sys
 import os
 import logging 
+import multiprocessing
 
 # Agregar el directorio src al path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -18,6 +19,8 @@ from src.utils.logger_setup import log, set_current_user
 
 
 if __name__ == '__main__':
+    # Necesario para el pool de procesos en el ejecutable empaquetado (PyInstaller/Windows)
+    multiprocessing.freeze_support()
     log.info("=====================================")
     log.info("Iniciando Sistema de Devoluciones (MODO SIN LOGIN)...") # Mensaje modificado
     
@@ -0,0 +1,27 @@
+# Descripciones de los códigos de 'status' de los reportes directo
+#
+# Los valores por defecto se pueden reemplazar desde AppConfig (QSettings);
+# main_window los aplica al iniciar con establecer_descripciones_estatus.
+
+# Código -> descripción. Los códigos que no aparecen aquí se muestran como SIN_DESCRIPCION.
+DESCRIPCIONES_ESTATUS = {
+    1: 'Enviado',
+    0: 'No enviado',
+    -1: 'No numérico o vacío', # Valor con que se marcan al leer (ver esquema 'directo')
+}
+
+SIN_DESCRIPCION = 'Sin descripción'
+
+_descripciones_estatus = dict(DESCRIPCIONES_ESTATUS)
+
+def establecer_descripciones_estatus(descripciones=None):
+    """Reemplaza la tabla de descripciones (None conserva la tabla por defecto)"""
+    global _descripciones_estatus
+    _descripciones_estatus = {int(codigo): texto for codigo, texto in descripciones.items()} if descripciones \
+        else dict(DESCRIPCIONES_ESTATUS)
+
+def obtener_descripciones_estatus():
+    return dict(_descripciones_estatus)
+
+def describir_estatus(codigo):
+    return _descripciones_estatus.get(int(codigo), SIN_DESCRIPCION)
\ No newline at end of file
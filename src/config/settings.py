@@ -1,3 +1,4 @@
+import json
 from PySide6.QtCore import QSettings
 
 class AppConfig:
@@ -21,4 +22,52 @@ class AppConfig:
         return self.settings.value("theme", "system")
     
     def set_theme(self, theme):
-        self.settings.setValue("theme", theme)
\ No newline at end of file
+        self.settings.setValue("theme", theme)
+    
+    def get_csv_engine(self):
+        return self.settings.value("csv_engine", "pyarrow")
+    
+    def set_csv_engine(self, engine):
+        self.settings.setValue("csv_engine", engine)
+    
+    def get_parse_cache_enabled(self):
+        return self.settings.value("parse_cache_enabled", True, type=bool)
+    
+    def set_parse_cache_enabled(self, enabled):
+        self.settings.setValue("parse_cache_enabled", enabled)
+    
+    def get_allowed_characters(self):
+        # None -> lista por defecto de src/config/validacion.py
+        return self.settings.value("allowed_characters", None) or None
+    
+    def set_allowed_characters(self, caracteres):
+        self.settings.setValue("allowed_characters", caracteres)
+    
+    def get_transliteration(self):
+        # Guardada como JSON {carácter: reemplazo}; None -> transliteración por defecto
+        valor = self.settings.value("transliteration", None)
+        return json.loads(valor) if valor else None
+    
+    def set_transliteration(self, transliteracion):
+        self.settings.setValue("transliteration", json.dumps(transliteracion, ensure_ascii=False))
+    
+    def get_segment_limit(self):
+        return self.settings.value("segment_limit", 3, type=int)
+    
+    def set_segment_limit(self, limite):
+        self.settings.setValue("segment_limit", limite)
+    
+    def get_status_descriptions(self):
+        # Guardada como JSON {código: descripción}; None -> tabla por defecto de src/config/estatus.py
+        valor = self.settings.value("status_descriptions", None)
+        return {int(codigo): texto for codigo, texto in json.loads(valor).items()} if valor else None
+    
+    def set_status_descriptions(self, descripciones):
+        self.settings.setValue("status_descriptions", json.dumps(descripciones, ensure_ascii=False))
+    
+    def get_opt_out_file(self):
+        # Ruta de la lista de exclusión (opt-out); None -> sin exclusiones
+        return self.settings.value("opt_out_file", None) or None
+    
+    def set_opt_out_file(self, ruta):
+        self.settings.setValue("opt_out_file", ruta or "")
\ No newline at end of file
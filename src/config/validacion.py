@@ -0,0 +1,45 @@
+# Configuración de la validación de mensajes: caracteres permitidos y transliteración
+#
+# Los valores por defecto se pueden reemplazar desde AppConfig (QSettings);
+# main_window los aplica al iniciar con establecer_configuracion_validacion.
+
+# Caracteres que puede contener un mensaje
+CARACTERES_PERMITIDOS = ' É_!"#\'¤%&()*+-./<=>?$@0ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789.,:;\''
+
+# Modo sanitizar: carácter no permitido -> reemplazo. Los que no aparecen aquí se eliminan.
+TRANSLITERACION = {
+    'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u', 'ü': 'u', 'ñ': 'n',
+    'Á': 'A', 'Í': 'I', 'Ó': 'O', 'Ú': 'U', 'Ü': 'U', 'Ñ': 'N',
+    'à': 'a', 'è': 'e', 'ì': 'i', 'ò': 'o', 'ù': 'u',
+    '‘': "'", '’': "'", '‚': "'", '‛': "'", '´': "'", '`': "'",
+    '“': '"', '”': '"', '„': '"', '«': '"', '»': '"',
+    '–': '-', '—': '-', '…': '...',
+    '\t': ' ', '\n': ' ', '\r': ' ', '\xa0': ' ',
+}
+
+# Segmentos SMS a partir de los cuales un mensaje se marca como "sobre límite" en el resumen
+LIMITE_SEGMENTOS = 3
+
+_caracteres_permitidos = CARACTERES_PERMITIDOS
+_transliteracion = dict(TRANSLITERACION)
+_limite_segmentos = LIMITE_SEGMENTOS
+
+def establecer_configuracion_validacion(caracteres_permitidos=None, transliteracion=None):
+    """Reemplaza los caracteres permitidos y/o la transliteración (None conserva el valor por defecto)"""
+    global _caracteres_permitidos, _transliteracion
+    _caracteres_permitidos = caracteres_permitidos or CARACTERES_PERMITIDOS
+    _transliteracion = dict(transliteracion) if transliteracion else dict(TRANSLITERACION)
+
+def obtener_caracteres_permitidos():
+    return _caracteres_permitidos
+
+def obtener_transliteracion():
+    return dict(_transliteracion)
+
+def establecer_limite_segmentos(limite):
+    """Máximo de segmentos por mensaje antes de marcarlo en el resumen"""
+    global _limite_segmentos
+    _limite_segmentos = int(limite)
+
+def obtener_limite_segmentos():
+    return _limite_segmentos
\ No newline at end of file
@@ -0,0 +1,197 @@
+import pandas as pd
+import os
+from PySide6.QtCore import QThread, Signal
+from src.utils.logger_setup import log
+from src.utils.file_handlers import (inspeccionar_archivo, verificar_encabezados, mensaje_columnas_faltantes,
+                                     leer_csv_con_plan)
+from src.utils import validators
+from src.utils.paralelo import procesar_en_paralelo
+from src.utils.telefonos import normalizar_telefonos
+from src.utils.exclusiones import (obtener_archivo_exclusion, existe_lista_exclusion, cargar_lista_exclusion,
+                                   telefonos_excluidos)
+from src.utils.cache_lectura import huella_archivo
+from src.models.esquemas import obtener_esquema
+
+def procesar_archivo_en_proceso(tarea, argumento):
+    """
+    Punto de entrada de cada proceso del pool (modo paralelo). Debe ser una función
+    de módulo para poder enviarse a otro proceso; el hilo no se inicia, solo se usa
+    su lógica de procesamiento por archivo.
+    `tarea` es (ruta, inspección del preflight) y `argumento` es (clase del hilo, opciones,
+    huella de la lista de exclusión que resolvió el hilo principal).
+    """
+    file_path, inspeccion = tarea
+    clase_hilo, opciones, huella_exclusion = argumento
+    hilo = clase_hilo([file_path], None, **opciones)
+    if inspeccion is not None:
+        hilo.inspecciones[file_path] = inspeccion
+    hilo.usar_lista_exclusion(huella_exclusion)
+    return hilo.procesar_archivo(file_path)
+
+class BaseProcessingThread(QThread):
+    """
+    Clase base para los hilos de procesamiento. El esquema del tipo de reporte
+    (src/models/esquemas.py) define cómo se verifica y se lee cada archivo.
+    Las subclases definen `tipo_reporte` y la señal `finished_processing`.
+    """
+    update_progress = Signal(int)
+    update_status = Signal(str)
+    error_occurred = Signal(str)
+
+    tipo_reporte = None # Clave del esquema en ESQUEMAS
+    progreso_lectura = 95 # Porcentaje de la barra que ocupa el procesamiento por archivo
+
+    def __init__(self, file_paths, db_connection, modo_paralelo=False, max_procesos=None, archivo_exclusion=None):
+        super().__init__()
+        self.file_paths = file_paths
+        self.db_connection = db_connection
+        self.esquema = obtener_esquema(self.tipo_reporte)
+        # Modo paralelo: reparte los archivos en un pool de procesos (max_procesos=None -> núcleos disponibles)
+        self.modo_paralelo = modo_paralelo
+        self.max_procesos = max_procesos
+        # Resultado del preflight por archivo (separador, codificación y encabezado)
+        self.inspecciones = {}
+        # Lista de exclusión (opt-out), por defecto la configurada en la aplicación (src/utils/exclusiones.py).
+        # El arreglo y su huella se resuelven una vez por corrida (preparar_lista_exclusion)
+        self.archivo_exclusion = archivo_exclusion or obtener_archivo_exclusion()
+        self.lista_exclusion = None
+        self.huella_exclusion = None
+        self.lista_exclusion_preparada = False
+
+    def opciones_procesamiento(self):
+        """Opciones con las que un proceso del pool reproduce el procesamiento de este hilo."""
+        return {'archivo_exclusion': self.archivo_exclusion}
+
+    def procesar_archivo(self, file_path):
+        """Procesa un archivo sin emitir señales y retorna su dict de resultado."""
+        raise NotImplementedError("Las subclases deben implementar procesar_archivo")
+
+    def verificar_archivos(self, file_paths=None):
+        """
+        Preflight: revisa el encabezado de todos los archivos (por defecto file_paths)
+        antes de leer datos. Si a alguno le faltan columnas, emite el error y retorna
+        False (ningún archivo se procesa si alguno es inválido).
+        """
+        self.update_status.emit("Verificando encabezados de los archivos...")
+        self.inspecciones, faltantes = verificar_encabezados(file_paths if file_paths is not None else self.file_paths,
+                                                             self.esquema['columnas_requeridas'],
+                                                             self.esquema['alias'], self.esquema['separador'])
+        if faltantes:
+            error_msg = mensaje_columnas_faltantes(faltantes)
+            log.error(f"Error de estructura en {self.esquema['nombre']} (preflight): {error_msg}") # <--- LOG Error Estructura
+            self.error_occurred.emit(error_msg)
+            return False
+        return True
+
+    def preparar_lista_exclusion(self):
+        """
+        Resuelve la lista de exclusión una vez antes de procesar: la lee (o la toma de
+        su caché) y guarda el arreglo y su huella; cada archivo y bloque usa ese arreglo,
+        y los procesos del pool lo cargan del .npy ya guardado con esa huella.
+        Si el archivo ya no existe, se avisa y la corrida sigue sin exclusiones.
+        """
+        self.lista_exclusion, self.huella_exclusion = None, None
+        self.lista_exclusion_preparada = True
+        if not self.archivo_exclusion:
+            return
+        if not existe_lista_exclusion(self.archivo_exclusion):
+            log.warning(f"No se encontró la lista de exclusión {self.archivo_exclusion}; se procesa sin exclusiones.") # <--- LOG Exclusión no encontrada
+            self.update_status.emit(f"Aviso: no se encontró la lista de exclusión "
+                                    f"{os.path.basename(self.archivo_exclusion)}; se procesa sin exclusiones.")
+            self.archivo_exclusion = None
+            return
+        self.update_status.emit("Cargando lista de exclusión...")
+        self.huella_exclusion = huella_archivo(self.archivo_exclusion)
+        self.lista_exclusion = cargar_lista_exclusion(self.archivo_exclusion, self.huella_exclusion)
+
+    def usar_lista_exclusion(self, huella):
+        """En un proceso del pool: usa la lista que resolvió el hilo principal (por su huella, sin revisar el archivo)."""
+        self.huella_exclusion = huella
+        self.lista_exclusion = cargar_lista_exclusion(self.archivo_exclusion, huella) if huella else None
+        self.lista_exclusion_preparada = True
+
+    def obtener_lista_exclusion(self):
+        """Arreglo de la lista de exclusión de la corrida (None = sin lista); se resuelve la primera vez."""
+        if not self.lista_exclusion_preparada:
+            self.preparar_lista_exclusion()
+        return self.lista_exclusion
+
+    def contar_excluidos(self, df):
+        """Cuenta las filas cuyo teléfono (columna 'telefono' del esquema) está en la lista de exclusión."""
+        lista = self.obtener_lista_exclusion()
+        if lista is None:
+            return 0
+        return int(telefonos_excluidos(normalizar_telefonos(df[self.esquema['telefono']]), lista).sum())
+
+    def iterar_resultados(self, file_paths=None):
+        """
+        Genera (índice, resultado) por archivo en el orden original de file_paths (o de
+        la lista recibida), procesando en este hilo o en un pool de procesos (modo paralelo).
+        """
+        file_paths = file_paths if file_paths is not None else self.file_paths
+        total_files = len(file_paths)
+        if self.modo_paralelo and total_files > 1:
+            log.info(f"Procesando {total_files} archivos de {self.esquema['nombre']} en paralelo.") # <--- LOG Modo paralelo
+            self.update_status.emit(f"Procesando {total_files} archivos en paralelo...")
+            tareas = [(file_path, self.inspecciones.get(file_path)) for file_path in file_paths]
+            for i, resultado in procesar_en_paralelo(procesar_archivo_en_proceso, tareas,
+                                                     (type(self), self.opciones_procesamiento(), self.huella_exclusion),
+                                                     self.max_procesos):
+                self.update_status.emit(f"Archivo {i+1}/{total_files} procesado: {resultado['archivo']}")
+                self.update_progress.emit(int(((i + 1) / total_files) * self.progreso_lectura))
+                yield i, resultado
+            return
+
+        for i, file_path in enumerate(file_paths):
+            file_name = os.path.basename(file_path)
+            log.debug(f"Procesando archivo ({i+1}/{total_files}): {file_name}") # <--- LOG Archivo actual
+            self.update_status.emit(f"Procesando archivo {i+1}/{total_files}: {file_name}")
+            resultado = self.procesar_archivo(file_path)
+            yield i, resultado
+            self.update_progress.emit(int(((i + 1) / total_files) * self.progreso_lectura))
+
+    def obtener_inspeccion(self, file_path):
+        """Inspección del preflight para el archivo, o una nueva si no se hizo."""
+        return self.inspecciones.get(file_path) or inspeccionar_archivo(file_path, self.esquema['separador'])
+
+    def detectar_y_leer_archivo(self, file_path):
+        """
+        Lee el archivo según el esquema: solo las columnas requeridas, con tipos
+        compactos, encabezados normalizados y alias aplicados (los errores se propagan).
+        """
+        file_name = os.path.basename(file_path) # Nombre para logs
+        log.debug(f"Intentando detectar separador y leer ({self.esquema['nombre']}): {file_name}") # <--- LOG Inicio Lectura
+        # Reutilizar la inspección del preflight (el archivo no se vuelve a abrir para detectar el separador)
+        inspeccion = self.obtener_inspeccion(file_path)
+        log.debug(f"Separador para {file_name}: '{inspeccion['separador']}'") # <--- LOG Separador
+
+        return leer_csv_con_plan(file_path, self.esquema['columnas_requeridas'], self.esquema['dtypes'],
+                                 self.esquema['alias'], inspeccion=inspeccion)
+
+    def mensaje_error_lectura(self, file_path, error):
+        """Loguea un error de lectura y retorna el mensaje a mostrar en la UI."""
+        file_name = os.path.basename(file_path)
+        nombre = self.esquema['nombre']
+        if isinstance(error, FileNotFoundError):
+            log.error(f"Error Crítico: Archivo no encontrado al intentar leer ({nombre}): {file_path}") # <--- LOG Error Archivo No Encontrado
+            return f"Error: No se encontró el archivo {file_name}"
+        if isinstance(error, pd.errors.ParserError):
+            log.error(f"Error de formato CSV/TSV al leer {file_name} ({nombre}): {error}") # <--- LOG Error Formato
+            if self.esquema['separador']:
+                return f"Error de formato en {file_name}. Verifique las columnas y separador '{self.esquema['separador']}'."
+            return f"Error de formato en {file_name}. Verifique las columnas y separadores."
+        log.error(f"Error inesperado al leer el archivo {file_name} ({nombre}):", exc_info=error) # <--- LOG Error Genérico Lectura
+        return f"Error al leer archivo {file_name}: {str(error)}"
+
+    def validar_estructura_archivo(self, df):
+        """Valida que el archivo tenga las columnas requeridas del esquema."""
+        try:
+            if not validators.validar_estructura_archivo(df, self.esquema['columnas_requeridas']):
+                missing_cols = set(self.esquema['columnas_requeridas']) - set(df.columns)
+                log.warning(f"Validación de estructura fallida ({self.esquema['nombre']}). Faltan columnas: {missing_cols}") # <--- LOG Columnas Faltantes
+                return False
+            return True
+        except Exception as e:
+            log.exception(f"Error inesperado durante la validación de estructura ({self.esquema['nombre']}):") # <--- LOG Error Validación
+            self.error_occurred.emit(f"Error al validar estructura: {str(e)}")
+            return False
\ No newline at end of file
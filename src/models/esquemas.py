@@ -0,0 +1,217 @@
+# Registro de esquemas por tipo de reporte
+#
+# Cada esquema describe cómo leer y resumir un tipo de archivo:
+#   - 'nombre': etiqueta para logs y mensajes
+#   - 'columnas_requeridas': columnas (normalizadas a minúsculas) que debe tener el archivo
+#   - 'alias': nombre alterno en el archivo -> nombre canónico (solo si el canónico no viene)
+#   - 'dtypes': tipos de lectura por columna (categóricas para columnas de pocos valores)
+#   - 'separador': separador fijo, o None para detectarlo (coma o pipe)
+#   - 'enteros': columnas que se convierten a entero compacto -> valor para no numéricos
+#   - 'textos': columnas que se pasan a minúsculas sin espacios alrededor
+#   - 'telefono': columna con el teléfono (se compara con la lista de exclusión)
+#   - 'kpis': lista de (columna del resumen, condiciones) en el orden en que se muestran.
+#     Las condiciones son {columna: valor} (todas deben cumplirse); un valor ('!=', v)
+#     indica distinto de v. Un entero en lugar de condiciones es un valor fijo.
+#     Todos los KPIs salen de un solo conteo por combinación de valores (contar_combinaciones).
+
+import numpy as np
+import pandas as pd
+from src.utils.file_handlers import DTYPE_TEXTO, convertir_entero_compacto, normalizar_texto_categoria
+
+ESQUEMAS = {
+    'devoluciones': {
+        'nombre': 'Devoluciones',
+        'columnas_requeridas': [
+            'clienteid', 'nombre', 'apellidopaterno', 'apellidomaterno', 'numtelefono',
+            'mensaje', 'variable1', 'variable2', 'variable3', 'variable4', 'variable5',
+            'fechainsercion', 'fechaaenviar', 'horaaenviar', 'campana'
+        ],
+        'alias': {},
+        # Todo como texto salvo la campaña: los valores se exportan tal como vienen en el archivo
+        # ('007' sigue siendo '007'), sin la inferencia de tipos, que cambia con el motor de
+        # lectura y entre los bloques del modo streaming
+        'dtypes': {**{columna: DTYPE_TEXTO for columna in (
+            'clienteid', 'nombre', 'apellidopaterno', 'apellidomaterno', 'numtelefono',
+            'mensaje', 'variable1', 'variable2', 'variable3', 'variable4', 'variable5',
+            'fechainsercion', 'fechaaenviar', 'horaaenviar')}, 'campana': 'category'},
+        'separador': None,
+        'enteros': {},
+        'textos': [],
+        'telefono': 'numtelefono',
+        'kpis': [],
+    },
+    'simples': {
+        'nombre': 'Reportes Simples',
+        'columnas_requeridas': [
+            'clienteid', 'numtelefono', 'identificador', 'estatus', 'clic',
+            'rcs_entregable', 'articulo_clic', 'campaña', 'modalidad', 'leido'
+        ],
+        'alias': {'clientid': 'clienteid'},
+        # Identificadores y teléfono como texto (sin la inferencia de tipos, que cambia con el motor)
+        'dtypes': {
+            'clienteid': DTYPE_TEXTO, 'numtelefono': DTYPE_TEXTO, 'identificador': DTYPE_TEXTO,
+            'estatus': 'category', 'leido': 'category', 'clic': 'category',
+            'modalidad': 'category', 'campaña': 'category'
+        },
+        'separador': None,
+        'enteros': {'estatus': 0, 'leido': 0},
+        'textos': ['modalidad', 'clic'],
+        'telefono': 'numtelefono',
+        'kpis': [
+            ('ENVIADOS RCS', {'estatus': 1, 'modalidad': 'simple'}),
+            ('ENVIADOS SMS', {'estatus': 1, 'modalidad': 'sms'}),
+            ('NO ENVIADOS', {'estatus': 0}),
+            ('CLICS', {'clic': 'si'}),
+            ('LEIDOS UNICO', {'estatus': 1, 'leido': 1, 'modalidad': 'simple'}),
+            ('NO LEIDOS', {'leido': 0}),
+        ],
+    },
+    'basic': {
+        'nombre': 'Reportes BASIC',
+        'columnas_requeridas': ['clienteid', 'telefono', 'estatus', 'modalidad', 'leido'],
+        'alias': {'clientid': 'clienteid', 'number': 'telefono'},
+        'dtypes': {'clienteid': DTYPE_TEXTO, 'telefono': DTYPE_TEXTO,
+                   'estatus': 'category', 'leido': 'category', 'modalidad': 'category'},
+        'separador': None,
+        'enteros': {'estatus': 0, 'leido': 0},
+        'textos': ['modalidad'],
+        'telefono': 'telefono',
+        'kpis': [
+            ('Enviados (RCS)', {'estatus': 1, 'modalidad': 'basic'}),
+            ('Enviados (SMS)', {'estatus': 1, 'modalidad': 'sms'}),
+            ('NO ENVIADOS', {'estatus': 0}),
+            ('CLICS', 0), # Los reportes BASIC no registran clics
+            ('LEIDOS UNICO', {'estatus': 1, 'leido': 1, 'modalidad': 'basic'}),
+            ('NO LEIDOS', {'leido': 0}),
+        ],
+    },
+    'directo': {
+        'nombre': 'Directo',
+        'columnas_requeridas': ['clienteid', 'number', 'status'],
+        'alias': {'clientid': 'clienteid'},
+        'dtypes': {'clienteid': DTYPE_TEXTO, 'number': DTYPE_TEXTO, 'status': 'category'},
+        'separador': '|',
+        'enteros': {'status': -1}, # -1 marca los valores no numéricos
+        'textos': [],
+        'telefono': 'number',
+        'kpis': [
+            ('Enviados', {'status': 1}),
+            ('No enviados', {'status': ('!=', 1)}), # Incluye los no numéricos (-1)
+        ],
+    },
+}
+
+def obtener_esquema(tipo):
+    """Retorna el esquema registrado para un tipo de reporte."""
+    if tipo not in ESQUEMAS:
+        raise ValueError(f"Tipo de reporte no registrado: {tipo}")
+    return ESQUEMAS[tipo]
+
+def aplicar_conversiones(df, esquema):
+    """Convierte en el DataFrame las columnas de enteros y de texto del esquema."""
+    for columna, valor_invalido in esquema['enteros'].items():
+        df[columna] = convertir_entero_compacto(df[columna], valor_invalido=valor_invalido)
+    for columna in esquema['textos']:
+        df[columna] = normalizar_texto_categoria(df[columna]) # Minúsculas sin perder el tipo categórico
+    return df
+
+def columnas_kpis(esquema):
+    """Columnas que usan las condiciones de los KPIs del esquema, en orden de aparición."""
+    columnas = []
+    for _, condiciones in esquema['kpis']:
+        if not isinstance(condiciones, int):
+            columnas.extend(columna for columna in condiciones if columna not in columnas)
+    return columnas
+
+# Más combinaciones posibles que esto por fila: se cuentan solo las presentes (tabla hash) en vez de bincount
+COMBINACIONES_POR_FILA_BINCOUNT = 4
+
+def _codificar(serie):
+    """
+    Códigos enteros no negativos de la columna (en el tipo entero más chico posible)
+    y el valor de cada código. Las categóricas ya traen sus códigos (el vacío, -1, pasa
+    a ser el código 0) y los enteros de rango chico se codifican restando el mínimo;
+    solo lo demás pasa por pd.factorize.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        tipo = np.min_scalar_type(len(serie.cat.categories))
+        return (np.add(codigos, 1, out=np.empty(len(codigos), dtype=tipo), casting='unsafe'),
+                pd.Categorical.from_codes(np.arange(-1, len(serie.cat.categories)), dtype=serie.dtype))
+    if pd.api.types.is_integer_dtype(serie.dtype) and not serie.hasnans and len(serie):
+        valores = serie.to_numpy()
+        minimo, maximo = valores.min(), valores.max()
+        rango = int(maximo) - int(minimo)
+        if rango < max(len(valores), 256):
+            # La resta puede desbordar el tipo original, pero módulo 2^bits el resultado (< 2^bits) es el correcto
+            tipo = np.min_scalar_type(rango)
+            return (np.subtract(valores, minimo, out=np.empty(len(valores), dtype=tipo), casting='unsafe'),
+                    np.arange(int(minimo), int(maximo) + 1).astype(valores.dtype))
+    return pd.factorize(serie, use_na_sentinel=False)
+
+def contar_combinaciones(df, columnas):
+    """
+    Cuenta las filas por cada combinación de valores de las columnas en una sola pasada,
+    sin filtrar ni copiar filas: cada columna se codifica a enteros (ver _codificar, los
+    vacíos son un valor más), los códigos se combinan en una sola clave entera y
+    np.bincount cuenta todas las claves a la vez.
+    Retorna un DataFrame chico con las columnas y 'conteo' (solo combinaciones presentes).
+    """
+    if len(df) == 0:
+        return pd.DataFrame({**{columna: [] for columna in columnas}, 'conteo': np.array([], dtype=np.int64)})
+    codificadas = [_codificar(df[columna]) for columna in columnas]
+    posibles = int(np.prod([len(valores) for _, valores in codificadas], dtype=object))
+    if posibles >= 2 ** 62: # La clave no cabe en int64 (columnas con demasiados valores)
+        tabla = df.groupby(columnas, observed=True, dropna=False).size()
+        return tabla.rename('conteo').reset_index()
+    # Clave en el tipo entero más chico que alcance: con pocas combinaciones se recorre mucha menos memoria
+    tipo = next((tipo for tipo in (np.uint8, np.uint16, np.uint32) if posibles <= np.iinfo(tipo).max + 1), np.int64)
+    clave = np.zeros(len(df), dtype=tipo)
+    for codigos, valores in codificadas:
+        np.multiply(clave, len(valores), out=clave, casting='unsafe')
+        np.add(clave, codigos, out=clave, casting='unsafe')
+    valores_columnas = [valores for _, valores in codificadas]
+    
+    if posibles <= COMBINACIONES_POR_FILA_BINCOUNT * len(df):
+        conteos = np.bincount(clave, minlength=posibles)
+        presentes = np.flatnonzero(conteos)
+        conteos = conteos[presentes]
+    else:
+        codigos, presentes = pd.factorize(clave)
+        conteos = np.bincount(codigos)
+    
+    # La clave se separa de vuelta en el valor de cada columna
+    tabla = {}
+    for columna, valores in reversed(list(zip(columnas, valores_columnas))):
+        tabla[columna] = valores.take(presentes % len(valores))
+        presentes = presentes // len(valores)
+    return pd.DataFrame({columna: tabla[columna] for columna in columnas} | {'conteo': conteos})
+
+def sumar_conteos(tablas):
+    """Une tablas de contar_combinaciones (p. ej. de varios bloques) sumando el conteo de cada combinación."""
+    tabla = pd.concat(tablas, ignore_index=True)
+    columnas = [columna for columna in tabla.columns if columna != 'conteo']
+    if not columnas:
+        return pd.DataFrame({'conteo': [int(tabla['conteo'].sum())]})
+    return tabla.groupby(columnas, observed=True, dropna=False, sort=False)['conteo'].sum().reset_index()
+
+def sumar_condiciones(tabla, condiciones):
+    """Suma el conteo de las combinaciones que cumplen todas las condiciones {columna: valor}."""
+    mascara = np.ones(len(tabla), dtype=bool)
+    for columna, valor in condiciones.items():
+        if isinstance(valor, tuple) and valor[0] == '!=':
+            mascara &= np.asarray(tabla[columna] != valor[1], dtype=bool)
+        else:
+            mascara &= np.asarray(tabla[columna] == valor, dtype=bool)
+    return int(tabla['conteo'].to_numpy()[mascara].sum())
+
+def kpis_desde_conteos(tabla, esquema):
+    """Retorna {columna del resumen: conteo} con los KPIs del esquema a partir de contar_combinaciones."""
+    return {
+        nombre: condiciones if isinstance(condiciones, int) else sumar_condiciones(tabla, condiciones)
+        for nombre, condiciones in esquema['kpis']
+    }
+
+def calcular_kpis(df, esquema):
+    """Retorna {columna del resumen: conteo} con los KPIs del esquema, en su orden (una sola pasada)."""
+    return kpis_desde_conteos(contar_combinaciones(df, columnas_kpis(esquema)), esquema)
\ No newline at end of file
@@ -1,97 +1,260 @@
 # Contenido completo para: src/models/processing.py
 
 import pandas as pd
+import numpy as np
 import os
-from PySide6.QtCore import QThread, Signal
+from contextlib import closing
+from PySide6.QtCore import Signal
 # --- INICIO CAMBIOS LOGGING ---
 from src.utils.logger_setup import log # Importar el logger configurado
 # --- FIN CAMBIOS LOGGING ---
 # Importar la utilidad para detectar separador si no está aquí ya
-from src.utils.file_handlers import detectar_separador_archivo 
+from src.utils.file_handlers import construir_plan_lectura, COLUMNAS_EXPORTACION
+from src.utils.compresion import abrir_origen, ruta_fisica
+from src.models.base_processing import BaseProcessingThread
+from src.utils.validators import (filas_con_caracteres_no_permitidos, detallar_caracteres_no_permitidos,
+                                  localizar_caracteres_no_permitidos, sanitizar_mensajes, LIMITE_ERRORES_MENSAJES)
+from src.utils.sms import calcular_segmentos, resumen_segmentos
+from src.utils.telefonos import normalizar_telefonos, TELEFONO_INVALIDO
+from src.utils.duplicados import duplicados_en_particiones
+from src.utils.exclusiones import telefonos_excluidos
+from src.config.validacion import obtener_caracteres_permitidos, obtener_transliteracion, obtener_limite_segmentos
+from src.utils.indice_errores import IndiceErrores
+from src.utils.exportacion import EscritoresCampana
+from src.utils.cache_lectura import huella_archivo
 
-class ProcessingThread(QThread):
-    update_progress = Signal(int)
-    update_status = Signal(str)
+# Filas por bloque en el modo streaming (la memoria pico es proporcional a este valor)
+TAMANO_BLOQUE_STREAMING = 100_000
+
+# Columnas de la tabla resumen (en su orden) con valor cero; cada fila parcial parte de aquí
+# y las filas de una misma campaña se suman al final
+RESUMEN_VACIO = {'Registros': 0, 'Segmentos': 0, 'Multiparte': 0, 'UCS-2': 0, 'Sobre límite': 0,
+                 'Teléfonos inválidos': 0, 'Excluidos': 0, 'Duplicados': 0}
+
+def particionar_por_campana(df, columnas=None):
+    """
+    Reparte el DataFrame por campaña en una sola pasada, en lugar de recorrerlo
+    completo con una máscara por campaña: las filas se ordenan por campaña una vez
+    (factorize + ordenamiento estable, un solo `take`) y cada partición es un tramo
+    contiguo de ese orden (sin copiar). Si las filas ya vienen agrupadas por campaña
+    no se copia nada.
+    Retorna [(campaña, DataFrame)] en el orden de aparición, conservando el índice
+    original (fila del archivo). `columnas` limita las columnas que se conservan.
+    Las filas sin campaña se omiten.
+    """
+    codigos, campanas = pd.factorize(df['campana'])
+    conteos = np.bincount(codigos[codigos >= 0], minlength=len(campanas))
+    if columnas is not None:
+        df = df[columnas]
+    # Los códigos siguen el orden de aparición: no decrecientes = ya agrupadas
+    if not (codigos[1:] >= codigos[:-1]).all() or (len(codigos) and codigos[0] < 0):
+        orden = np.argsort(codigos, kind='stable')
+        df = df.take(orden[len(orden) - conteos.sum():]) # Las filas sin campaña (código -1) quedan al inicio
+    limites = np.concatenate(([0], np.cumsum(conteos)))
+    return [(campana, df.iloc[inicio:fin]) for campana, inicio, fin in zip(campanas, limites[:-1], limites[1:])]
+
+class ProcessingThread(BaseProcessingThread):
     finished_processing = Signal(dict)
-    error_occurred = Signal(str)
+    validacion_completada = Signal(object) # IndiceErrores con todos los errores (validación completa)
     
-    def __init__(self, file_paths, db_connection):
-        super().__init__()
-        self.file_paths = file_paths
-        self.db_connection = db_connection
-        #CAMBIAR A REGEX
-        
-        self.caracteres_permitidos = ' É_!"#\'¤%&()*+-./<=>?$@0ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789.,:;\''
-        self.columnas_requeridas = [
-            'clienteid', 'nombre', 'apellidopaterno', 'apellidomaterno', 'numtelefono', 
-            'mensaje', 'variable1', 'variable2', 'variable3', 'variable4', 'variable5', 
-            'fechainsercion', 'fechaaenviar', 'horaaenviar', 'campana'
-        ]
+    tipo_reporte = 'devoluciones' # Columnas, tipos y alias en src/models/esquemas.py
+    progreso_lectura = 80 # El resto de la barra corresponde a la consolidación
+    
+    def __init__(self, file_paths, db_connection, modo_streaming=False, tamano_bloque=TAMANO_BLOQUE_STREAMING,
+                 modo_paralelo=False, max_procesos=None, modo_validacion_completa=False,
+                 modo_sanitizar=False, caracteres_permitidos=None, transliteracion=None, limite_segmentos=None,
+                 clave_duplicados=None, politica_duplicados='conservar_primero', duplicados_por_campana=True,
+                 archivo_exclusion=None, carpeta_exportacion=None, resultados_previos=None):
+        super().__init__(file_paths, db_connection, modo_paralelo, max_procesos, archivo_exclusion)
+        # Modo streaming: lee cada archivo por bloques en lugar de cargarlo completo
+        self.modo_streaming = modo_streaming
+        self.tamano_bloque = tamano_bloque
+        # Validación completa: se registran todos los caracteres no permitidos de todos
+        # los archivos (en lugar de detenerse en los primeros) y no se exporta nada
+        self.modo_validacion_completa = modo_validacion_completa
+        # Modo sanitizar: los caracteres no permitidos se transliteran o eliminan en lugar de rechazar el archivo
+        self.modo_sanitizar = modo_sanitizar
+        # Lista de caracteres y transliteración configurables (src/config/validacion.py)
+        self.caracteres_permitidos = caracteres_permitidos or obtener_caracteres_permitidos()
+        self.transliteracion = transliteracion if transliteracion is not None else obtener_transliteracion()
+        # Mensajes con más segmentos SMS que este límite se cuentan como "Sobre límite"
+        self.limite_segmentos = limite_segmentos if limite_segmentos is not None else obtener_limite_segmentos()
+        # Duplicados entre todos los archivos de la corrida: clave ('numtelefono' o 'clienteid', None = no se buscan),
+        # política (src/utils/duplicados.py) y si solo cuentan dentro de la misma campaña
+        self.clave_duplicados = clave_duplicados
+        self.politica_duplicados = politica_duplicados
+        self.duplicados_por_campana = duplicados_por_campana
+        # Exportar mientras se procesa: cada archivo (o bloque, en modo streaming) se agrega a los
+        # archivos de sus campañas en esta carpeta conforme se procesa, sin conservar los registros
+        self.carpeta_exportacion = carpeta_exportacion
+        self.escritores = None # EscritoresCampana de la corrida (solo en este hilo, no en los procesos del pool)
+        # Resultados por archivo de una corrida anterior ('por_archivo' del resultado): los archivos que
+        # no cambiaron se reutilizan sin volver a leerlos y solo se procesan los nuevos
+        self.resultados_previos = resultados_previos
     
+    def opciones_procesamiento(self):
+        """Opciones con las que un proceso del pool reproduce el procesamiento de este hilo."""
+        return {**super().opciones_procesamiento(), 'modo_streaming': self.modo_streaming, 'tamano_bloque': self.tamano_bloque,
+                'modo_validacion_completa': self.modo_validacion_completa, 'modo_sanitizar': self.modo_sanitizar,
+                'caracteres_permitidos': self.caracteres_permitidos, 'transliteracion': self.transliteracion,
+                'limite_segmentos': self.limite_segmentos}
+
+    def firma_resultados(self):
+        """
+        Opciones de las que depende el resultado de cada archivo; los resultados de otra
+        corrida solo se reutilizan si la firma coincide. El modo de lectura cuenta: en modo
+        streaming las particiones solo guardan las columnas de exportación. El tamaño del
+        bloque no cambia el resultado y los duplicados se buscan siempre sobre toda la corrida.
+        """
+        opciones = {clave: valor for clave, valor in self.opciones_procesamiento().items()
+                    if clave not in ('tamano_bloque', 'modo_validacion_completa')}
+        if self.obtener_lista_exclusion() is not None:
+            opciones['huella_exclusion'] = self.huella_exclusion # La lista pudo cambiar
+        return repr(sorted(opciones.items()))
+
+    def resultados_reutilizables(self, firma):
+        """{ruta: (huella, resultado)} de los archivos de la corrida anterior que no cambiaron."""
+        if not self.resultados_previos or self.resultados_previos['firma'] != firma:
+            return {}
+        reutilizables = {}
+        for file_path in set(self.file_paths):
+            previo = self.resultados_previos['archivos'].get(file_path)
+            if previo is not None and os.path.exists(ruta_fisica(file_path)) and huella_archivo(file_path) == previo[0]:
+                reutilizables[file_path] = previo
+        return reutilizables
+
+    def iterar_con_previos(self, previos):
+        """
+        Como iterar_resultados, pero los archivos de `previos` no se vuelven a procesar:
+        se intercalan sus resultados guardados en el orden original de file_paths.
+        """
+        pendientes = [file_path for file_path in self.file_paths if file_path not in previos]
+        nuevos = self.iterar_resultados(pendientes)
+        try:
+            for i, file_path in enumerate(self.file_paths):
+                if file_path in previos:
+                    log.debug(f"Archivo sin cambios, se reutiliza su resultado: {os.path.basename(file_path)}") # <--- LOG Reutilizado
+                    yield i, previos[file_path][1]
+                else:
+                    yield i, next(nuevos)[1]
+        finally:
+            nuevos.close()
+
     def run(self):
         # Log del inicio del proceso
         log.info(f"Inicio del procesamiento de devoluciones para {len(self.file_paths)} archivo(s).") 
+        escritores = None
         try:
             all_dataframes = {}
+            origen_particiones = {} # Número de archivo de cada partición (orden de llegada para duplicados)
             tabla_resumen_data = []
-            total_files = len(self.file_paths)
+            indice_errores = IndiceErrores() # Solo se llena en validación completa
+            mensajes_sanitizados = 0
+            telefonos_invalidos = [] # Reporte de filas rechazadas por teléfono inválido
             
-            for i, file_path in enumerate(self.file_paths):
-                file_name = os.path.basename(file_path) # Usar file_name para logs
-                self.update_status.emit(f"Procesando archivo {i+1}/{total_files}: {file_name}")
-                progress = int((i / total_files) * 80)
-                self.update_progress.emit(progress)
-                
-                # Detectar separador y leer archivo
-                df = self.detectar_y_leer_archivo(file_path)
-                
-                if df is None:
-                    # El error ya fue logueado en detectar_y_leer_archivo
-                    continue
-                
-                # Log después de leer (nivel DEBUG es menos prioritario)
-                log.debug(f"Archivo leído: {file_name}, {len(df)} registros.") 
-                
-                # Validar estructura del archivo
-                if not self.validar_estructura_archivo(df):
-                    error_msg = f"El archivo {file_name} no tiene la estructura requerida"
-                    log.error(f"Error de estructura: {error_msg}") # Log del error
-                    self.error_occurred.emit(error_msg)
-                    return # Detener el proceso si un archivo es inválido
-                
-                # Validar mensajes
-                mensajes_invalidos = self.validar_mensajes(df)
-                if mensajes_invalidos:
-                    # Mostramos el detalle en la UI, pero logueamos algo más breve
-                    error_msg_ui = f"Caracteres no permitidos encontrados en {file_name}:\n{mensajes_invalidos}"
-                    log.error(f"Error de caracteres inválidos en archivo: {file_name}") # Log del error
-                    self.error_occurred.emit(error_msg_ui)
-                    return # Detener el proceso
-                
-                # Procesar por campaña
-                campanas = df['campana'].unique()
-                log.debug(f"Archivo {file_name}: Campañas encontradas: {list(campanas)}") # Log de campañas
-                for campana in campanas:
-                    df_campana = df[df['campana'] == campana].copy()
+            # Lista de exclusión: los teléfonos que aparecen en ella no se exportan
+            # (se resuelve antes de la firma, que depende de su huella)
+            self.preparar_lista_exclusion()
+            
+            # Archivos sin cambios desde la corrida anterior: se reutiliza su resultado
+            firma = self.firma_resultados()
+            previos = self.resultados_reutilizables(firma)
+            if previos:
+                log.info(f"{len(previos)} archivo(s) sin cambios se reutilizan de la corrida anterior.") # <--- LOG Incremental
+            # Resultados por archivo para la siguiente corrida (al exportar mientras se procesa no se conservan)
+            por_archivo = {} if not self.carpeta_exportacion else None
+            destinos_particiones = {} # (lista del resultado por archivo, posición) de cada partición
+            
+            # Preflight: revisar el encabezado de los archivos a leer antes de leer datos
+            pendientes = [file_path for file_path in self.file_paths if file_path not in previos]
+            if pendientes and not self.verificar_archivos(pendientes):
+                return # Ningún archivo se procesa si alguno es inválido
+            
+            # Exportar mientras se procesa. Con detección de duplicados hace falta la corrida completa:
+            # las particiones se conservan y se escriben al final, sin consolidarlas
+            if self.carpeta_exportacion:
+                escritores = EscritoresCampana(self.carpeta_exportacion)
+                if not self.clave_duplicados:
+                    self.escritores = escritores # Los bloques del modo streaming se escriben al leerse
+            
+            with closing(self.iterar_con_previos(previos)) as resultados:
+                for i, resultado in resultados:
+                    # Errores de lectura: se informan y se continúa con el siguiente archivo
+                    for aviso in resultado['avisos']:
+                        self.error_occurred.emit(aviso)
                     
-                    # Guardar en el diccionario
-                    if campana not in all_dataframes:
-                        all_dataframes[campana] = []
-                    all_dataframes[campana].append(df_campana)
+                    # Estructura o mensajes inválidos: se detiene todo el procesamiento
+                    if resultado['error']:
+                        self.error_occurred.emit(resultado['error'])
+                        return
                     
-                    # Agregar a tabla resumen
-                    tabla_resumen_data.append({
-                        'Campaña': campana,
-                        'Registros': len(df_campana)
-                    })
+                    # Validación completa: con errores ya no se consolida nada, solo se siguen revisando archivos
+                    indice_errores.unir(resultado.get('errores'))
+                    if len(indice_errores):
+                        continue
+                    
+                    file_path = self.file_paths[i]
+                    if por_archivo is not None and not resultado['avisos']:
+                        por_archivo[file_path] = previos.get(file_path) or (huella_archivo(file_path), resultado)
+                    
+                    # Guardar las particiones por campaña en el diccionario
+                    for campana, dfs_campana in resultado['particiones'].items():
+                        if self.escritores is not None:
+                            for df_campana in dfs_campana:
+                                self.escritores.escribir(campana, df_campana)
+                            continue
+                        if campana not in all_dataframes:
+                            all_dataframes[campana] = []
+                        all_dataframes[campana].extend(dfs_campana)
+                        origen_particiones.setdefault(campana, []).extend([i] * len(dfs_campana))
+                        destinos_particiones.setdefault(campana, []).extend((dfs_campana, j) for j in range(len(dfs_campana)))
+                    tabla_resumen_data.extend(resultado['resumen'])
+                    mensajes_sanitizados += resultado['sanitizados']
+                    telefonos_invalidos.extend(resultado['telefonos_invalidos'])
+            
+            if len(indice_errores):
+                log.error(f"Validación completa: {len(indice_errores)} caracteres no permitidos en "
+                          f"{len(indice_errores.archivos)} archivo(s).") # <--- LOG Resultado validación completa
+                self.update_progress.emit(100)
+                self.update_status.emit(f"Validación completada: {len(indice_errores)} errores encontrados")
+                self.validacion_completada.emit(indice_errores)
+                return
+            
+            # Duplicados entre archivos: se quitan de las particiones y se descuentan del resumen
+            if self.clave_duplicados:
+                self.update_status.emit("Buscando registros duplicados...")
+                tabla_resumen_data.extend(self.quitar_duplicados(all_dataframes, origen_particiones))
             
-            # Consolidar DataFrames por campaña
+            exportados = None
+            if escritores is not None:
+                self.update_status.emit("Terminando exportación...")
+                for campana in list(all_dataframes):
+                    for df_campana in all_dataframes.pop(campana):
+                        escritores.escribir(campana, df_campana)
+                exportados = escritores.cerrar()
+            
+            # Consolidar DataFrames por campaña; las particiones de cada campaña se liberan al
+            # consolidarla, así la memoria no se duplica con todas las campañas a la vez
             dataframes_consolidados = {}
             log.info("Consolidando DataFrames por campaña...") # Log de consolidación
-            for campana, dfs in all_dataframes.items():
-                if dfs:
-                    dataframes_consolidados[campana] = pd.concat(dfs, ignore_index=True)
-                    log.debug(f"Campaña '{campana}' consolidada con {len(dataframes_consolidados[campana])} registros.")
+            for campana in list(all_dataframes):
+                particiones = all_dataframes.pop(campana)
+                dfs = [df for df in particiones if len(df)] # Particiones que quedaron vacías al quitar duplicados
+                if not dfs:
+                    continue
+                # Una sola partición no se copia
+                dataframes_consolidados[campana] = (dfs[0].reset_index(drop=True) if len(dfs) == 1
+                                                    else pd.concat(dfs, ignore_index=True))
+                # Sin duplicados, las particiones guardadas por archivo pasan a ser vistas del DataFrame
+                # consolidado (mismas filas, en orden), así los registros no quedan dos veces en memoria.
+                # Conservan su índice original (fila del archivo): define el orden de llegada al buscar
+                # duplicados en una corrida posterior que las reutilice
+                if por_archivo is not None and not self.clave_duplicados:
+                    inicio = 0
+                    for (lista, j), df in zip(destinos_particiones.pop(campana), particiones):
+                        lista[j] = dataframes_consolidados[campana].iloc[inicio:inicio + len(df)].set_axis(df.index)
+                        inicio += len(df)
+                log.debug(f"Campaña '{campana}' consolidada con {len(dataframes_consolidados[campana])} registros.")
             
             self.update_progress.emit(100)
             self.update_status.emit("Procesamiento completado")
@@ -100,11 +263,28 @@ class ProcessingThread(QThread):
             df_resumen = pd.DataFrame(tabla_resumen_data)
             if not df_resumen.empty:
                 df_resumen = df_resumen.groupby('Campaña').sum().reset_index()
+                # Proporción de mensajes multiparte (no se puede sumar por archivo, se calcula al final)
+                df_resumen.insert(df_resumen.columns.get_loc('Multiparte') + 1, '% Multiparte',
+                                  (df_resumen['Multiparte'] / df_resumen['Registros'].where(df_resumen['Registros'] > 0) * 100)
+                                  .fillna(0).round(1))
+                sobre_limite = int(df_resumen['Sobre límite'].sum())
+                if sobre_limite:
+                    log.warning(f"{sobre_limite} mensajes superan el límite de {self.limite_segmentos} segmentos SMS.") # <--- LOG Sobre límite
             
             resultado = {
                 'dataframes': dataframes_consolidados,
-                'resumen': df_resumen
+                'resumen': df_resumen,
+                'sanitizados': mensajes_sanitizados,
+                'exportados': exportados, # {archivo: registros} al exportar mientras se procesa, si no None
+                # Resultados por archivo para reprocesar solo lo que cambie (ver resultados_previos)
+                'por_archivo': {'firma': firma, 'archivos': por_archivo} if por_archivo is not None else None,
+                'telefonos_invalidos': (pd.concat(telefonos_invalidos, ignore_index=True)
+                                        if telefonos_invalidos else pd.DataFrame())
             }
+            if telefonos_invalidos:
+                log.warning(f"{len(resultado['telefonos_invalidos'])} registros rechazados por teléfono inválido.") # <--- LOG Teléfonos inválidos
+            if mensajes_sanitizados:
+                log.info(f"Modo sanitizar: {mensajes_sanitizados} mensajes corregidos.") # <--- LOG Mensajes sanitizados
             # Log de éxito final
             log.info(f"Procesamiento de devoluciones completado exitosamente. {len(dataframes_consolidados)} campañas procesadas.") 
             self.finished_processing.emit(resultado)
@@ -113,90 +293,298 @@ class ProcessingThread(QThread):
             # Loguea la excepción completa (incluye traceback)
             log.exception("Error inesperado durante el procesamiento de devoluciones:") 
             self.error_occurred.emit(f"Error inesperado: {str(e)}") # Mensaje más simple para la UI
+        finally:
+            # Si la corrida no terminó (errores o validación completa) no queda ningún archivo exportado
+            if escritores is not None:
+                escritores.descartar()
+            self.escritores = None
 
-    
-    def detectar_y_leer_archivo(self, file_path):
-        """Detecta el separador del archivo y lo lee"""
-        file_name = os.path.basename(file_path) # Nombre para logs
+    def procesar_archivo(self, file_path):
+        """
+        Lee, valida y reparte por campaña un archivo sin emitir señales, de modo que
+        también pueda ejecutarse en un proceso del pool. Retorna un dict con:
+          - 'archivo': nombre del archivo
+          - 'avisos': errores de lectura (el archivo se omite y se continúa)
+          - 'error': error que detiene el procesamiento (estructura o mensajes) o None
+          - 'particiones': {campaña: [DataFrames]} (vacío si los bloques ya se exportaron al leerse)
+          - 'resumen': filas {'Campaña', 'Registros', 'Segmentos', 'Multiparte', 'UCS-2', 'Sobre límite'}
+            para la tabla resumen
+          - 'errores': IndiceErrores del archivo o None (solo en validación completa)
+          - 'sanitizados': filas cuyo mensaje se corrigió (solo en modo sanitizar)
+          - 'telefonos_invalidos': DataFrames con las filas rechazadas por teléfono inválido
+        """
+        file_name = os.path.basename(file_path)
+        resultado = {'archivo': file_name, 'avisos': [], 'error': None, 'particiones': {}, 'resumen': [],
+                     'errores': None, 'sanitizados': 0, 'telefonos_invalidos': []}
+        
+        if self.modo_streaming:
+            # Cada bloque se valida y se reparte por campaña conforme llega
+            self.procesar_archivo_por_bloques(file_path, resultado)
+            return resultado
+        
+        # Detectar separador y leer archivo
         try:
-            log.debug(f"Intentando detectar separador y leer: {file_name}") # Log inicio lectura
-            # Usamos la función de utilidades para detectar separador
-            separador = detectar_separador_archivo(file_path)
-            log.debug(f"Separador detectado para {file_name}: '{separador}'") # Log separador
-            
-            # Leer archivo con el separador detectado
-            df = pd.read_csv(file_path, sep=separador, encoding='utf-8', low_memory=False)
-            
-            # Limpiar nombres de columnas
-            original_columns = df.columns.tolist()
-            df.columns = df.columns.str.strip().str.lower() # Normalizar a minúsculas
-            new_columns = df.columns.tolist()
-            if original_columns != new_columns:
-                 log.debug(f"Columnas normalizadas en {file_name}: {original_columns} -> {new_columns}")
-
-            # --- Añadir renombrado si es necesario (como vimos para clienteid/ClientID) ---
-            # df.rename(columns={'clientid': 'clienteid'}, inplace=True) 
-            # log.debug(f"Columna 'clientid' renombrada a 'clienteid' si existía en {file_name}")
-            # --- Fin renombrado ---
-            
-            return df
-            
-        except FileNotFoundError:
-            log.error(f"Error Crítico: Archivo no encontrado al intentar leer: {file_path}")
-            self.error_occurred.emit(f"Error: No se encontró el archivo {file_name}")
-            return None
-        except pd.errors.ParserError as pe:
-            log.error(f"Error de formato CSV/TSV al leer {file_name}: {pe}")
-            self.error_occurred.emit(f"Error de formato en {file_name}. Verifique las columnas y separadores.")
-            return None
+            df = self.detectar_y_leer_archivo(file_path)
         except Exception as e:
-            # Loguear error genérico de lectura
-            log.exception(f"Error inesperado al leer el archivo {file_name}:") 
-            self.error_occurred.emit(f"Error al leer archivo {file_name}: {str(e)}")
-            return None
-
-    def validar_estructura_archivo(self, df):
-        """Valida que el archivo tenga las columnas requeridas"""
+            resultado['avisos'].append(self.mensaje_error_lectura(file_path, e))
+            return resultado
+        
+        # Log después de leer (nivel DEBUG es menos prioritario)
+        log.debug(f"Archivo leído: {file_name}, {len(df)} registros.") 
+        
+        # Validar estructura del archivo
+        if not self.validar_estructura_archivo(df):
+            error_msg = f"El archivo {file_name} no tiene la estructura requerida"
+            log.error(f"Error de estructura: {error_msg}") # Log del error
+            resultado['error'] = error_msg
+            return resultado
+        
+        # Modo sanitizar: corregir los mensajes antes de validarlos
+        if self.modo_sanitizar:
+            resultado['sanitizados'] = self.sanitizar_mensajes(df, file_name)
+        
+        # Validación completa: se registran todos los errores y el archivo no se reparte
+        if self.modo_validacion_completa:
+            resultado['errores'] = self.localizar_errores_mensajes(df, file_name)
+            if resultado['errores'] is not None:
+                return resultado
+        
+        # Validar mensajes
+        mensajes_invalidos = self.validar_mensajes(df)
+        if mensajes_invalidos:
+            # Mostramos el detalle en la UI, pero logueamos algo más breve
+            resultado['error'] = f"Caracteres no permitidos encontrados en {file_name}:\n{mensajes_invalidos}"
+            log.error(f"Error de caracteres inválidos en archivo: {file_name}") # Log del error
+            return resultado
+        
+        # Teléfonos a 10 dígitos; los inválidos van al reporte de rechazados
+        df = self.normalizar_telefonos(df, file_name, resultado)
+        df = self.quitar_excluidos(df, file_name, resultado)
+        
+        # Procesar por campaña (una sola pasada sobre el archivo)
+        segmentos = self.segmentos_por_campana(df)
+        particiones = particionar_por_campana(df)
+        log.debug(f"Archivo {file_name}: Campañas encontradas: {[campana for campana, _ in particiones]}") # Log de campañas
+        for campana, df_campana in particiones:
+            resultado['particiones'][campana] = [df_campana]
+            resultado['resumen'].append({
+                'Campaña': campana,
+                **RESUMEN_VACIO,
+                'Registros': len(df_campana),
+                **segmentos.get(campana, {})
+            })
+        return resultado
+    
+    def procesar_archivo_por_bloques(self, file_path, resultado):
+        """
+        Procesa un archivo en bloques de `tamano_bloque` filas (modo streaming) y
+        llena `resultado` igual que procesar_archivo.
+        Solo se conservan las columnas de exportación de cada bloque, por lo que la
+        memoria pico depende del tamaño del bloque y no del tamaño del archivo.
+        """
+        file_name = os.path.basename(file_path)
+        registros_archivo = 0
+        # Al exportar mientras se procesa, lo escrito de un archivo que se omite se deshace
+        punto_control = self.escritores.punto_control() if self.escritores is not None else None
         try:
-            columnas_archivo = set(df.columns) # Ya están en minúsculas por detectar_y_leer_archivo
-            columnas_requeridas_set = set(col.lower() for col in self.columnas_requeridas)
-            
-            missing_cols = columnas_requeridas_set - columnas_archivo
-            if missing_cols:
-                log.warning(f"Validación de estructura fallida. Faltan columnas: {missing_cols}") # Log columnas faltantes
-                return False
-                
-            # Opcional: Loguear si hay columnas extra (puede ser normal)
-            # extra_cols = columnas_archivo - columnas_requeridas_set
-            # if extra_cols:
-            #    log.debug(f"Columnas extra encontradas (ignoradas): {extra_cols}")
-                
-            return True
+            log.debug(f"Leyendo {file_name} por bloques de {self.tamano_bloque} filas.")
+            inspeccion = self.obtener_inspeccion(file_path)
+            # Los mismos tipos explícitos del esquema que la lectura completa (texto salvo la
+            # campaña), así cada bloque se valida y se exporta igual que el archivo completo
+            plan = construir_plan_lectura(inspeccion['columnas'], self.esquema['columnas_requeridas'],
+                                          self.esquema['dtypes'], self.esquema['alias'])
+            with abrir_origen(file_path) as origen, \
+                 pd.read_csv(origen, sep=inspeccion['separador'], encoding=inspeccion['encoding'],
+                             dtype=plan['dtype'], usecols=plan['usecols'], chunksize=self.tamano_bloque) as lector:
+                for n_bloque, df in enumerate(lector):
+                    df.rename(columns=plan['renombrar'], inplace=True)
+                    
+                    if n_bloque == 0 and not self.validar_estructura_archivo(df):
+                        resultado['error'] = f"El archivo {file_name} no tiene la estructura requerida"
+                        log.error(f"Error de estructura: {resultado['error']}")
+                        return
+                    
+                    if self.modo_sanitizar:
+                        resultado['sanitizados'] += self.sanitizar_mensajes(df, file_name)
+                    
+                    # El índice es continuo entre bloques, así que las filas reportadas coinciden
+                    if self.modo_validacion_completa:
+                        errores_bloque = self.localizar_errores_mensajes(df, file_name)
+                        if errores_bloque is not None:
+                            # Se sigue leyendo para registrar todos los errores, sin conservar datos
+                            if resultado['errores'] is None:
+                                resultado['errores'] = IndiceErrores()
+                                resultado['particiones'].clear()
+                                resultado['resumen'].clear()
+                                resultado['telefonos_invalidos'].clear()
+                                if punto_control is not None:
+                                    self.escritores.revertir(punto_control)
+                            resultado['errores'].unir(errores_bloque)
+                        if resultado['errores'] is not None:
+                            registros_archivo += len(df)
+                            continue
+                    
+                    mensajes_invalidos = self.validar_mensajes(df)
+                    if mensajes_invalidos:
+                        resultado['error'] = f"Caracteres no permitidos encontrados en {file_name}:\n{mensajes_invalidos}"
+                        log.error(f"Error de caracteres inválidos en archivo: {file_name} (bloque {n_bloque + 1})")
+                        return
+                    
+                    registros_archivo += len(df)
+                    df = self.normalizar_telefonos(df, file_name, resultado)
+                    df = self.quitar_excluidos(df, file_name, resultado)
+                    segmentos = self.segmentos_por_campana(df)
+                    for campana, df_campana in particionar_por_campana(df, COLUMNAS_EXPORTACION):
+                        if self.escritores is not None:
+                            self.escritores.escribir(campana, df_campana) # El bloque no se conserva
+                        else:
+                            resultado['particiones'].setdefault(campana, []).append(df_campana)
+                        resultado['resumen'].append({
+                            'Campaña': campana,
+                            **RESUMEN_VACIO,
+                            'Registros': len(df_campana),
+                            **segmentos.get(campana, {})
+                        })
+                    
         except Exception as e:
-            log.exception("Error inesperado durante la validación de estructura:")
-            # Considera si quieres emitir un error aquí o simplemente retornar False
-            self.error_occurred.emit(f"Error al validar estructura: {str(e)}") 
-            return False
+            # Igual que en el modo normal, un archivo con error de lectura no aporta registros
+            resultado['particiones'].clear()
+            resultado['resumen'].clear()
+            resultado['errores'] = None
+            resultado['sanitizados'] = 0
+            resultado['telefonos_invalidos'].clear()
+            if punto_control is not None:
+                self.escritores.revertir(punto_control)
+            resultado['avisos'].append(self.mensaje_error_lectura(file_path, e))
+            return
+        
+        log.debug(f"Archivo leído por bloques: {file_name}, {registros_archivo} registros.")
+
+    def quitar_duplicados(self, all_dataframes, origen_particiones):
+        """
+        Quita de las particiones ({campaña: [DataFrames]}) los registros con la misma
+        clave según la política configurada, en toda la corrida o dentro de cada campaña.
+        Retorna filas de resumen que descuentan lo quitado y lo reportan en 'Duplicados'.
+        """
+        if self.duplicados_por_campana:
+            grupos = [[(campana, k) for k in range(len(dfs))] for campana, dfs in all_dataframes.items()]
+        else:
+            grupos = [[(campana, k) for campana, dfs in all_dataframes.items() for k in range(len(dfs))]]
+        
+        quitados = {}
+        for grupo in grupos:
+            particiones = [(origen_particiones[campana][k], all_dataframes[campana][k]) for campana, k in grupo]
+            mascaras = duplicados_en_particiones(particiones, self.clave_duplicados, self.politica_duplicados)
+            for (campana, k), quitar in zip(grupo, mascaras):
+                if quitar.any():
+                    df = all_dataframes[campana][k]
+                    quitados.setdefault(campana, []).append(df[quitar])
+                    all_dataframes[campana][k] = df[~quitar]
+        
+        filas_resumen = []
+        for campana, dfs in quitados.items():
+            df_quitados = pd.concat(dfs)
+            segmentos, es_ucs2 = calcular_segmentos(df_quitados['mensaje'])
+            totales = resumen_segmentos(np.full(len(df_quitados), campana, dtype=object), segmentos, es_ucs2,
+                                        self.limite_segmentos)[campana]
+            filas_resumen.append({
+                'Campaña': campana,
+                **RESUMEN_VACIO,
+                'Registros': -len(df_quitados),
+                **{columna: -valor for columna, valor in totales.items()},
+                'Duplicados': len(df_quitados)
+            })
+        total = sum(fila['Duplicados'] for fila in filas_resumen)
+        log.info(f"Duplicados por '{self.clave_duplicados}' ({self.politica_duplicados}): {total} registros quitados.") # <--- LOG Duplicados
+        return filas_resumen
 
+    def normalizar_telefonos(self, df, file_name, resultado):
+        """
+        Normaliza 'numtelefono' a 10 dígitos (int64, ver src/utils/telefonos.py).
+        Las filas con teléfono inválido se agregan al reporte de rechazados de
+        `resultado` y a su resumen; retorna el DataFrame solo con las filas válidas.
+        """
+        numeros = normalizar_telefonos(df['numtelefono'])
+        invalidos = numeros == TELEFONO_INVALIDO
+        if invalidos.any():
+            rechazados = df.loc[invalidos, ['clienteid', 'numtelefono', 'campana']]
+            resultado['telefonos_invalidos'].append(pd.DataFrame({
+                'Archivo': file_name,
+                'Fila': rechazados.index.to_numpy() + 2, # +1 por el encabezado, +1 porque la numeración empieza en 1
+                'clienteid': rechazados['clienteid'].to_numpy(),
+                'numtelefono': rechazados['numtelefono'].to_numpy(),
+                'campana': rechazados['campana'].to_numpy(),
+            }))
+            for campana, cantidad in rechazados['campana'].value_counts(sort=False).items():
+                if cantidad:
+                    resultado['resumen'].append({'Campaña': campana, **RESUMEN_VACIO, 'Teléfonos inválidos': int(cantidad)})
+            log.warning(f"{file_name}: {int(invalidos.sum())} registros con teléfono inválido.") # <--- LOG Teléfonos inválidos
+            df = df[~invalidos].copy()
+            numeros = numeros[~invalidos]
+        df['numtelefono'] = numeros
+        return df
+
+    def quitar_excluidos(self, df, file_name, resultado):
+        """
+        Quita las filas cuyo teléfono (ya normalizado) está en la lista de exclusión,
+        con una sola búsqueda vectorizada, y las cuenta en 'Excluidos' del resumen.
+        """
+        lista = self.obtener_lista_exclusion()
+        if lista is None:
+            return df
+        excluidos = telefonos_excluidos(df['numtelefono'].to_numpy(), lista)
+        if not excluidos.any():
+            return df
+        for campana, cantidad in df.loc[excluidos, 'campana'].value_counts(sort=False).items():
+            if cantidad:
+                resultado['resumen'].append({'Campaña': campana, **RESUMEN_VACIO, 'Excluidos': int(cantidad)})
+        log.info(f"{file_name}: {int(excluidos.sum())} registros excluidos por la lista de exclusión.") # <--- LOG Excluidos
+        return df[~excluidos]
+
+    def segmentos_por_campana(self, df):
+        """Segmentos SMS de los mensajes del DataFrame, totalizados por campaña (ver src/utils/sms.py)."""
+        segmentos, es_ucs2 = calcular_segmentos(df['mensaje'])
+        return resumen_segmentos(df['campana'], segmentos, es_ucs2, self.limite_segmentos)
+
+    def sanitizar_mensajes(self, df, file_name):
+        """Corrige en el DataFrame los mensajes con caracteres no permitidos y retorna cuántos cambió."""
+        df['mensaje'], corregidos = sanitizar_mensajes(df['mensaje'], self.caracteres_permitidos, self.transliteracion)
+        if corregidos:
+            log.debug(f"{file_name}: {corregidos} mensajes corregidos (modo sanitizar).")
+        return corregidos
+
+    def localizar_errores_mensajes(self, df, file_name):
+        """
+        Validación completa de los mensajes: retorna un IndiceErrores con todos los
+        caracteres no permitidos del DataFrame, o None si no hay ninguno.
+        """
+        filas, posiciones, codigos = localizar_caracteres_no_permitidos(df['mensaje'], self.caracteres_permitidos)
+        if len(filas) == 0:
+            return None
+        indice = IndiceErrores()
+        indice.agregar(file_name, 'mensaje', filas, posiciones, codigos)
+        log.warning(f"Validación completa: {len(filas)} caracteres no permitidos en {file_name}.") # <--- LOG Errores por archivo
+        return indice
 
     def validar_mensajes(self, df):
-        """Valida que los mensajes solo contengan caracteres permitidos"""
+        """
+        Valida que los mensajes solo contengan caracteres permitidos. Las filas con
+        errores se buscan en una sola pasada vectorizada (regex precompilada) y solo
+        las primeras se recorren carácter por carácter para armar el detalle.
+        """
         mensajes_invalidos = []
         try:
-            for idx, mensaje in df['mensaje'].items():
-                if pd.notna(mensaje):
-                    mensaje_str = str(mensaje)
-                    for i, char in enumerate(mensaje_str):
-                        if char not in self.caracteres_permitidos:
-                            # Construir mensaje de error
-                            error_detail = f"Fila {idx+2}: Carácter '{char}' (posición {i}) no permitido en mensaje."
-                            mensajes_invalidos.append(error_detail)
-                            
-                            # Limitar el número de errores reportados para no sobrecargar
-                            if len(mensajes_invalidos) >= 10: 
-                                mensajes_invalidos.append("... (más errores encontrados)")
-                                log.warning(f"Validación de mensajes detenida (límite alcanzado). Primer error: {mensajes_invalidos[0]}") # Log primer error
-                                return "\n".join(mensajes_invalidos)
+            mascara = filas_con_caracteres_no_permitidos(df['mensaje'], self.caracteres_permitidos)
+            for idx, i, char, _ in detallar_caracteres_no_permitidos(df['mensaje'], mascara, self.caracteres_permitidos):
+                # Construir mensaje de error
+                error_detail = f"Fila {idx+2}: Carácter '{char}' (posición {i}) no permitido en mensaje."
+                mensajes_invalidos.append(error_detail)
+                
+                # Limitar el número de errores reportados para no sobrecargar
+                if len(mensajes_invalidos) >= LIMITE_ERRORES_MENSAJES: 
+                    mensajes_invalidos.append("... (más errores encontrados)")
+                    log.warning(f"Validación de mensajes detenida (límite alcanzado). Primer error: {mensajes_invalidos[0]}") # Log primer error
+                    return "\n".join(mensajes_invalidos)
             
             if mensajes_invalidos:
                  log.warning(f"Se encontraron {len(mensajes_invalidos)} errores de caracteres en mensajes.") # Log resumen de errores
@@ -2,171 +2,160 @@
 
 import pandas as pd
 import os
-from PySide6.QtCore import QThread, Signal
+from contextlib import closing
+from PySide6.QtCore import Signal
 # --- INICIO CAMBIOS LOGGING ---
 from src.utils.logger_setup import log # Importar el logger configurado
 # --- FIN CAMBIOS LOGGING ---
-# Importar detector de separador (aunque no se use aquí, por consistencia)
-from src.utils.file_handlers import detectar_separador_archivo 
+from src.models.base_processing import BaseProcessingThread
+from src.models.esquemas import (aplicar_conversiones, columnas_kpis, contar_combinaciones, sumar_conteos,
+                                 kpis_desde_conteos)
+from src.config.estatus import describir_estatus
 
-class DirectoProcessingThread(QThread):
+class DirectoProcessingThread(BaseProcessingThread):
     """
     Hilo para procesar los archivos de reportes directo y generar estadísticas agregadas.
+    Cada archivo se reduce a sus contadores al leerlo (el DataFrame se descarta en
+    seguida) y los contadores de todos los archivos se suman al final.
     """
-    update_progress = Signal(int)
-    update_status = Signal(str)
     # Emitirá un DataFrame de pandas con la fila única de resultados
     finished_processing = Signal(pd.DataFrame) 
-    error_occurred = Signal(str)
+    # Una fila por archivo con sus propios totales (se emite antes de finished_processing)
+    desglose_por_archivo = Signal(pd.DataFrame)
+    # Registros por cada código de 'status' con su descripción (se emite antes de finished_processing)
+    histograma_estatus = Signal(pd.DataFrame)
 
-    # Columnas esperadas (normalizadas a minúsculas)
-    columnas_requeridas = ['clienteid', 'number', 'status']
-
-    def __init__(self, file_paths, db_connection):
-        super().__init__()
-        self.file_paths = file_paths
-        self.db_connection = db_connection
+    # Columnas esperadas, separador '|' fijo y KPIs en src/models/esquemas.py
+    tipo_reporte = 'directo'
+    progreso_lectura = 80 # Dejar margen para agregación
 
     def run(self):
         log.info(f"Inicio del procesamiento de Reportes Directo para {len(self.file_paths)} archivo(s).") # <--- LOG Inicio
         try:
-            all_dataframes = [] # Lista para guardar los DataFrames leídos
-            total_files = len(self.file_paths)
+            conteos = [] # Contadores por archivo (contar_combinaciones), sin los registros
+            filas_desglose = []
+            total_original = excluidos = 0
             
-            for i, file_path in enumerate(self.file_paths):
-                file_name = os.path.basename(file_path)
-                log.debug(f"Procesando archivo Directo ({i+1}/{total_files}): {file_name}") # <--- LOG Archivo actual
-                self.update_status.emit(f"Procesando archivo {i+1}/{total_files}: {file_name}")
-                progress = int(((i + 1) / total_files) * 80) # Dejar margen para agregación
-                
-                # 1. Leer archivo (separador '|' fijo)
-                df = self.detectar_y_leer_archivo(file_path)
-                if df is None:
-                    # El error ya fue logueado
-                    continue 
-                
-                log.debug(f"Archivo Directo leído: {file_name}, {len(df)} registros.") # <--- LOG Lectura
-                
-                # 2. Validar estructura
-                if not self.validar_estructura_archivo(df):
-                    error_msg = f"El archivo {file_name} no tiene la estructura requerida (clienteid, number, status)."
-                    log.error(f"Error de estructura en Reportes Directo: {error_msg}") # <--- LOG Error Estructura
-                    self.error_occurred.emit(error_msg)
-                    return # Detener si un archivo es inválido
-                
-                # 3. Guardar el DataFrame leído
-                all_dataframes.append(df)
-                self.update_progress.emit(progress)
+            # 0. Preflight: revisar el encabezado de todos los archivos antes de leer datos
+            if not self.verificar_archivos():
+                return # Ningún archivo se procesa si alguno es inválido
+            
+            # Lista de exclusión: se cuentan los teléfonos del reporte que aparecen en ella
+            self.preparar_lista_exclusion()
+            
+            with closing(self.iterar_resultados()) as resultados:
+                for i, resultado in resultados:
+                    # Error de lectura: se informa y se continúa con el siguiente archivo
+                    for aviso in resultado['avisos']:
+                        self.error_occurred.emit(aviso)
+                    
+                    if resultado['error']:
+                        self.error_occurred.emit(resultado['error'])
+                        return # Detener si un archivo es inválido
+                    
+                    # Sumar los contadores parciales del archivo
+                    if resultado['conteos'] is not None:
+                        conteos.append(resultado['conteos'])
+                        total_original += resultado['stats']['Total Original']
+                        excluidos += resultado['stats']['Excluidos']
+                        filas_desglose.append(resultado['stats'])
 
-            if not all_dataframes:
+            if not conteos:
                 log.warning("No se procesaron archivos válidos en Reportes Directo.") # <--- LOG Sin archivos válidos
                 self.update_status.emit("⚠️ No se procesaron archivos válidos.")
+                self.desglose_por_archivo.emit(pd.DataFrame())
+                self.histograma_estatus.emit(pd.DataFrame())
                 self.finished_processing.emit(pd.DataFrame()) # Emitir DataFrame vacío
                 return
 
-            # 4. Concatenar todos los DataFrames en uno solo
+            # 4. Unir los contadores de todos los archivos (no se concatenan los registros)
             log.info("Agregando resultados de Reportes Directo...") # <--- LOG Agregación
             self.update_status.emit("Agregando resultados...")
-            df_consolidado = pd.concat(all_dataframes, ignore_index=True)
-            log.info(f"Total de registros consolidados (Directo): {len(df_consolidado)}") # <--- LOG Total consolidado
+            tabla = sumar_conteos(conteos)
+            log.info(f"Total de registros consolidados (Directo): {total_original}") # <--- LOG Total consolidado
             
-            # 5. Limpiar y convertir tipos de datos
-            log.debug("Limpiando y convirtiendo tipos de datos (Directo)...") # <--- LOG Limpieza
-            try:
-                # Usar -1 para errores de conversión, como antes
-                df_consolidado['status'] = pd.to_numeric(df_consolidado['status'], errors='coerce').fillna(-1).astype(int) 
-                if df_consolidado['status'].eq(-1).any():
-                     log.warning("Se encontraron valores no numéricos en la columna 'status' (Directo). Se marcaron como -1.")
-            except KeyError as ke:
-                 log.error(f"Error de clave al convertir 'status' (Directo): Columna {ke} no encontrada.")
-                 self.error_occurred.emit(f"Error interno: Falta columna {ke} en consolidado.")
-                 return
-            except Exception as ex_convert:
-                 log.exception("Error inesperado al convertir 'status' (Directo):")
-                 self.error_occurred.emit(f"Error al convertir 'status': {ex_convert}")
-                 return
-            log.debug("Tipos de datos convertidos (Directo).") # <--- LOG Limpieza Fin
+            # 5. 'status' ya es entero compacto (-1 = no numérico, convertido al leer cada archivo)
+            if tabla.loc[tabla['status'] == -1, 'conteo'].sum():
+                 log.warning("Se encontraron valores no numéricos en la columna 'status' (Directo). Se marcaron como -1.")
 
-            # 6. Calcular estadísticas AGREGADAS
-            log.debug("Calculando estadísticas agregadas (Directo)...") # <--- LOG Cálculo
-            total_original = len(df_consolidado)
-            
-            # Status = 1
-            enviados = len(df_consolidado[df_consolidado['status'] == 1])
-            
-            # Status != 1 (incluye errores de conversión como -1)
-            no_enviados = len(df_consolidado[df_consolidado['status'] != 1])
-            log.debug("Estadísticas agregadas calculadas (Directo).") # <--- LOG Cálculo Fin
+            # 6. Calcular estadísticas AGREGADAS con los KPIs del esquema
+            kpis = kpis_desde_conteos(tabla, self.esquema)
 
             # 7. Crear DataFrame final (una sola fila)
             stats = {
                 'Campaña': ["# MX - DEVOLUCIONES"], # Nombre fijo
                 'Total Original': [total_original],
-                'Total Generada': [total_original],
-                'Excluidos': [0],
-                'Enviados': [enviados],
-                'No enviados': [no_enviados]
+                'Total Generada': [total_original - excluidos],
+                'Excluidos': [excluidos],
+                **{nombre: [valor] for nombre, valor in kpis.items()}
             }
             df_resumen = pd.DataFrame(stats)
             
             self.update_progress.emit(100)
             self.update_status.emit("Procesamiento completado")
             log.info("Procesamiento de Reportes Directo completado exitosamente.") # <--- LOG Éxito Final
+            self.desglose_por_archivo.emit(pd.DataFrame(filas_desglose))
+            self.histograma_estatus.emit(self.construir_histograma(tabla))
             self.finished_processing.emit(df_resumen)
                 
         except Exception as e:
             log.exception("Error inesperado durante el procesamiento de Reportes Directo:") # <--- LOG Excepción General
             self.error_occurred.emit(f"Error inesperado en el procesamiento: {str(e)}")
 
-    def detectar_y_leer_archivo(self, file_path):
-        """Lee el CSV (separador '|' fijo) y normaliza columnas."""
-        file_name = os.path.basename(file_path) # Nombre para logs
-        try:
-            log.debug(f"Intentando leer archivo Directo (sep='|'): {file_name}") # <--- LOG Inicio Lectura
-            # Separador '|' fijo para este tipo de reporte
-            df = pd.read_csv(file_path, sep='|', encoding='utf-8', low_memory=False) 
-            
-            original_columns = df.columns.tolist()
-            # Normalizar todos los headers a minúsculas y sin espacios
-            df.columns = df.columns.str.strip().str.lower() 
-            new_columns = df.columns.tolist()
-            if original_columns != new_columns:
-                 log.debug(f"Columnas normalizadas en {file_name} (Directo): {original_columns} -> {new_columns}")
-            
-            # Renombrar 'clientid' a 'clienteid' si existe
-            if 'clientid' in df.columns and 'clienteid' not in df.columns:
-                 df.rename(columns={'clientid': 'clienteid'}, inplace=True)
-                 log.debug(f"Columna 'clientid' renombrada a 'clienteid' en {file_name} (Directo)")
+    def construir_histograma(self, tabla):
+        """
+        Histograma completo de 'status' a partir de los contadores ya sumados (la misma
+        pasada que los totales): una fila por código con su descripción, los registros
+        y el porcentaje del total, de mayor a menor.
+        """
+        conteo = tabla.groupby('status', observed=True, sort=False)['conteo'].sum()
+        conteo = conteo[conteo > 0].sort_values(ascending=False, kind='stable')
+        total = int(conteo.sum())
+        return pd.DataFrame({
+            'Status': [int(codigo) for codigo in conteo.index],
+            'Descripción': [describir_estatus(codigo) for codigo in conteo.index],
+            'Registros': [int(valor) for valor in conteo],
+            '% del total': [f"{valor * 100 / total:.2f}%" for valor in conteo],
+        })
 
-            return df
-            
-        except FileNotFoundError:
-            log.error(f"Error Crítico: Archivo no encontrado al intentar leer (Directo): {file_path}") # <--- LOG Error Archivo No Encontrado
-            self.error_occurred.emit(f"Error: No se encontró el archivo {file_name}")
-            return None
-        except pd.errors.ParserError as pe:
-            log.error(f"Error de formato '|' al leer {file_name} (Directo): {pe}") # <--- LOG Error Formato
-            self.error_occurred.emit(f"Error de formato en {file_name}. Verifique las columnas y separador '|'.")
-            return None
-        except Exception as e:
-            log.exception(f"Error inesperado al leer el archivo {file_name} (Directo):") # <--- LOG Error Genérico Lectura
-            self.error_occurred.emit(f"Error al leer archivo {file_name}: {str(e)}")
-            return None
-    
-    def validar_estructura_archivo(self, df):
-        """Valida que el archivo tenga las columnas requeridas."""
+    def procesar_archivo(self, file_path):
+        """
+        Lee un reporte y lo reduce a sus contadores sin emitir señales, de modo que
+        también pueda ejecutarse en un proceso del pool. Retorna un dict con:
+          - 'archivo': nombre del archivo
+          - 'avisos': errores de lectura (el archivo se omite y se continúa)
+          - 'error': error que detiene el procesamiento, o None
+          - 'conteos': registros por combinación de valores de los KPIs, o None si se omitió
+          - 'stats': fila del desglose por archivo, o None si se omitió
+        """
+        file_name = os.path.basename(file_path)
+        resultado = {'archivo': file_name, 'avisos': [], 'error': None, 'conteos': None, 'stats': None}
+        
+        # 1. Leer archivo (separador '|' fijo)
         try:
-            columnas_archivo = set(df.columns) # Ya están normalizadas
-            columnas_requeridas_set = set(self.columnas_requeridas) # Definidas en minúsculas
-            
-            missing_cols = columnas_requeridas_set - columnas_archivo
-            if missing_cols:
-                log.warning(f"Validación de estructura fallida (Directo). Faltan columnas: {missing_cols}") # <--- LOG Columnas Faltantes
-                return False
-                
-            log.debug("Validación de estructura (Directo) completada exitosamente.") # <--- LOG Éxito Validación
-            return True
+            df = self.detectar_y_leer_archivo(file_path)
         except Exception as e:
-            log.exception("Error inesperado durante la validación de estructura (Directo):") # <--- LOG Error Validación
-            self.error_occurred.emit(f"Error al validar estructura: {str(e)}") 
-            return False
\ No newline at end of file
+            resultado['avisos'].append(self.mensaje_error_lectura(file_path, e))
+            return resultado
+        
+        log.debug(f"Archivo Directo leído: {file_name}, {len(df)} registros.") # <--- LOG Lectura
+        
+        # 2. Validar estructura
+        if not self.validar_estructura_archivo(df):
+            resultado['error'] = f"El archivo {file_name} no tiene la estructura requerida (clienteid, number, status)."
+            log.error(f"Error de estructura en Reportes Directo: {resultado['error']}") # <--- LOG Error Estructura
+            return resultado
+        
+        # 3. Convertir 'status' a entero compacto (-1 = no numérico) y contar; el DataFrame no se conserva
+        aplicar_conversiones(df, self.esquema)
+        total_original = len(df)
+        excluidos = self.contar_excluidos(df)
+        resultado['conteos'] = contar_combinaciones(df, columnas_kpis(self.esquema))
+        resultado['stats'] = {
+            'Archivo': file_name,
+            'Total Original': total_original,
+            'Total Generada': total_original - excluidos,
+            'Excluidos': excluidos,
+            **kpis_desde_conteos(resultado['conteos'], self.esquema)
+        }
+        return resultado
\ No newline at end of file
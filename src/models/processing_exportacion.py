@@ -0,0 +1,56 @@
+import threading
+from PySide6.QtCore import QThread, Signal
+from src.utils.logger_setup import log
+from src.utils.exportacion import exportar_campanas, ExportacionCancelada
+
+class ExportThread(QThread):
+    """
+    Exporta las campañas procesadas fuera del hilo de la interfaz: los archivos se
+    escriben en paralelo (pool de hilos de exportar_campanas) y el avance se informa
+    por señales. Con cancelar() se detiene sin dejar archivos escritos.
+    """
+    update_progress = Signal(int)
+    update_status = Signal(str)
+    error_occurred = Signal(str)
+    finished_export = Signal(dict) # {nombre de archivo: filas}
+    export_cancelled = Signal()
+
+    def __init__(self, dataframes, carpeta, max_filas=None, max_bytes=None, max_hilos=None):
+        super().__init__()
+        self.dataframes = dataframes
+        self.carpeta = carpeta
+        self.max_filas = max_filas
+        self.max_bytes = max_bytes
+        self.max_hilos = max_hilos
+        self._cancelar = threading.Event()
+        self._candado = threading.Lock()
+        self._filas_escritas = 0
+        self._total_filas = 0
+
+    def cancelar(self):
+        """Pide detener la exportación; los hilos del pool lo revisan antes de cada lote."""
+        self._cancelar.set()
+
+    def _avance(self, filas):
+        # Se llama desde los hilos del pool
+        with self._candado:
+            self._filas_escritas += filas
+            porcentaje = int(self._filas_escritas * 100 / self._total_filas) if self._total_filas else 100
+        self.update_progress.emit(min(porcentaje, 99))
+
+    def run(self):
+        try:
+            self._total_filas = sum(len(df) for df in self.dataframes.values())
+            self.update_status.emit(f"Exportando {len(self.dataframes)} campañas ({self._total_filas:,} registros)...")
+            exportados = exportar_campanas(self.dataframes, self.carpeta,
+                                           max_filas=self.max_filas, max_bytes=self.max_bytes,
+                                           max_hilos=self.max_hilos, progreso=self._avance,
+                                           cancelar=self._cancelar)
+            self.update_progress.emit(100)
+            self.finished_export.emit(exportados)
+        except ExportacionCancelada:
+            log.info("Exportación cancelada por el usuario; no se dejaron archivos.") # <--- LOG Exportación cancelada
+            self.export_cancelled.emit()
+        except Exception as e:
+            log.error(f"Error al exportar: {e}", exc_info=True) # <--- LOG Error Exportación
+            self.error_occurred.emit(str(e))
\ No newline at end of file
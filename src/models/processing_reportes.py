@@ -2,171 +2,193 @@
 
 import pandas as pd
 import os
-from PySide6.QtCore import QThread, Signal
+from contextlib import closing
+from PySide6.QtCore import Signal
 # --- INICIO CAMBIOS LOGGING ---
 from src.utils.logger_setup import log # Importar el logger configurado
 # --- FIN CAMBIOS LOGGING ---
-from src.utils.file_handlers import detectar_separador_archivo 
+from src.models.base_processing import BaseProcessingThread
+from src.models.esquemas import (aplicar_conversiones, calcular_kpis, columnas_kpis, contar_combinaciones,
+                                 sumar_conteos, kpis_desde_conteos)
+from src.utils.file_handlers import construir_plan_lectura
+from src.utils.compresion import abrir_origen
+from src.utils.telefonos import normalizar_telefonos
+from src.utils.exclusiones import telefonos_excluidos
 
-class ReportesProcessingThread(QThread):
+# Filas por bloque en el modo streaming; solo se leen las columnas de los KPIs y el teléfono,
+# así que los bloques pueden ser más grandes que los de devoluciones
+TAMANO_BLOQUE_REPORTES = 500_000
+
+class ReportesProcessingThread(BaseProcessingThread):
     """
     Hilo para procesar los archivos de reportes simples y generar estadísticas.
     """
-    update_progress = Signal(int)
-    update_status = Signal(str)
     # Emitirá un DataFrame de pandas con los resultados
     finished_processing = Signal(pd.DataFrame) 
-    error_occurred = Signal(str)
     
-    # Columnas esperadas en los CSV de reportes
-    columnas_requeridas = [
-        'clienteid', 'numtelefono', 'identificador', 'estatus', 'clic',
-        'rcs_entregable', 'articulo_clic', 'campaña', 'modalidad', 'leido'
-    ]
+    # Columnas esperadas, tipos de lectura y KPIs en src/models/esquemas.py
+    tipo_reporte = 'simples'
+
+    def __init__(self, file_paths, db_connection, modo_paralelo=False, max_procesos=None, archivo_exclusion=None,
+                 modo_streaming=False, tamano_bloque=TAMANO_BLOQUE_REPORTES):
+        super().__init__(file_paths, db_connection, modo_paralelo, max_procesos, archivo_exclusion)
+        # Modo streaming: cada reporte se lee por bloques y los contadores se acumulan bloque a bloque
+        # (la memoria no depende del tamaño del archivo; el resumen es el mismo que leyéndolo completo)
+        self.modo_streaming = modo_streaming
+        self.tamano_bloque = tamano_bloque
 
-    def __init__(self, file_paths, db_connection):
-        super().__init__()
-        self.file_paths = file_paths
-        self.db_connection = db_connection # Guardado para futuras implementaciones
+    def opciones_procesamiento(self):
+        """Opciones con las que un proceso del pool reproduce el procesamiento de este hilo."""
+        return {**super().opciones_procesamiento(), 'modo_streaming': self.modo_streaming,
+                'tamano_bloque': self.tamano_bloque}
 
     def run(self):
-        log.info(f"Inicio del procesamiento de Reportes Simples para {len(self.file_paths)} archivo(s).") # <--- LOG Inicio
+        log.info(f"Inicio del procesamiento de {self.esquema['nombre']} para {len(self.file_paths)} archivo(s).") # <--- LOG Inicio
         try:
             all_stats = []
-            total_files = len(self.file_paths)
             
-            for i, file_path in enumerate(self.file_paths):
-                file_name = os.path.basename(file_path)
-                log.debug(f"Procesando archivo ({i+1}/{total_files}): {file_name}") # <--- LOG Archivo actual
-                self.update_status.emit(f"Procesando archivo {i+1}/{total_files}: {file_name}")
-                progress = int(((i + 1) / total_files) * 95) # Dejar espacio al final
-                
-                # 1. Detectar separador y leer archivo
-                df = self.detectar_y_leer_archivo(file_path)
-                if df is None:
-                    # El error ya fue logueado en detectar_y_leer_archivo
-                    continue 
-                
-                log.debug(f"Archivo leído: {file_name}, {len(df)} registros.") # <--- LOG Lectura
-                
-                # 2. Validar estructura
-                if not self.validar_estructura_archivo(df):
-                    error_msg = f"El archivo {file_name} no tiene la estructura requerida."
-                    log.error(f"Error de estructura en Reportes Simples: {error_msg}") # <--- LOG Error Estructura
-                    self.error_occurred.emit(error_msg)
-                    return # Detener si un archivo es inválido
-                
-                # 3. Limpiar y convertir tipos de datos (¡Muy importante!)
-                log.debug(f"Limpiando y convirtiendo tipos de datos para {file_name}...") # <--- LOG Limpieza
-                try:
-                    df['estatus'] = pd.to_numeric(df['estatus'], errors='coerce').fillna(0).astype(int)
-                    df['leido'] = pd.to_numeric(df['leido'], errors='coerce').fillna(0).astype(int)
-                    # Comprobar si hubo errores de conversión (NaN antes de fillna)
-                    if df['estatus'].isna().any() or df['leido'].isna().any():
-                         log.warning(f"Se encontraron valores no numéricos en columnas 'estatus' o 'leido' en {file_name}. Se convirtieron a 0.")
-                except KeyError as ke:
-                    log.error(f"Error de clave al convertir tipos en {file_name}: Columna {ke} no encontrada (esto no debería pasar si la validación funcionó).")
-                    self.error_occurred.emit(f"Error interno: Falta columna {ke} en {file_name}.")
-                    return
-                except Exception as ex_convert: # Captura otros errores de conversión
-                    log.exception(f"Error inesperado al convertir tipos de datos en {file_name}:")
-                    self.error_occurred.emit(f"Error al convertir datos en {file_name}: {ex_convert}")
-                    return
-
-                df['modalidad'] = df['modalidad'].astype(str).str.lower().str.strip() # Asegurar que sea string
-                df['clic'] = df['clic'].astype(str).str.lower().str.strip() # Asegurar que sea string
-                log.debug(f"Tipos de datos convertidos para {file_name}.") # <--- LOG Limpieza Fin
-
-                # 4. Calcular estadísticas según tu lógica
-                log.debug(f"Calculando estadísticas para {file_name}...") # <--- LOG Cálculo
-                total_original = len(df)
-                enviados_rcs = len(df[(df['estatus'] == 1) & (df['modalidad'] == 'simple')])
-                enviados_sms = len(df[(df['estatus'] == 1) & (df['modalidad'] == 'sms')])
-                no_enviados = len(df[df['estatus'] == 0]) # Estatus 0 implica no enviado
-                clics = len(df[df['clic'] == 'si'])
-                leidos_unicos = len(df[(df['estatus'] == 1) & (df['leido'] == 1) & (df['modalidad'] == 'simple')])
-                no_leidos = len(df[df['leido'] == 0]) # Leido 0 implica no leído
-                log.debug(f"Estadísticas calculadas para {file_name}.") # <--- LOG Cálculo Fin
-
-                # 5. Guardar resultados para este archivo
-                stats = {
-                    'CAMPAÑA': file_name,
-                    'Total Original': total_original,
-                    'Total Generada': total_original, # Como indicaste
-                    'Excluidos': 0, # Como indicaste
-                    'ENVIADOS RCS': enviados_rcs,
-                    'ENVIADOS SMS': enviados_sms,
-                    'NO ENVIADOS': no_enviados,
-                    'CLICS': clics,
-                    'LEIDOS UNICO': leidos_unicos,
-                    'NO LEIDOS': no_leidos
-                }
-                all_stats.append(stats)
-                self.update_progress.emit(progress)
+            # 0. Preflight: revisar el encabezado de todos los archivos antes de leer datos
+            if not self.verificar_archivos():
+                return # Ningún archivo se procesa si alguno es inválido
+            
+            # Lista de exclusión: se cuentan los teléfonos del reporte que aparecen en ella
+            self.preparar_lista_exclusion()
+            
+            with closing(self.iterar_resultados()) as resultados:
+                for i, resultado in resultados:
+                    # Errores de lectura: se informan y se continúa con el siguiente archivo
+                    for aviso in resultado['avisos']:
+                        self.error_occurred.emit(aviso)
+                    
+                    if resultado['error']:
+                        self.error_occurred.emit(resultado['error'])
+                        return # Detener si un archivo es inválido
+                    
+                    # 5. Guardar resultados para este archivo
+                    if resultado['stats'] is not None:
+                        all_stats.append(resultado['stats'])
 
             # 6. Crear DataFrame final y emitir
             df_resumen = pd.DataFrame(all_stats)
             
             self.update_progress.emit(100)
             self.update_status.emit("Procesamiento de reportes completado")
-            log.info(f"Procesamiento de Reportes Simples completado exitosamente. {len(df_resumen)} archivo(s) procesado(s).") # <--- LOG Éxito Final
+            log.info(f"Procesamiento de {self.esquema['nombre']} completado exitosamente. {len(df_resumen)} archivo(s) procesado(s).") # <--- LOG Éxito Final
             self.finished_processing.emit(df_resumen)
                 
         except Exception as e:
-            log.exception("Error inesperado durante el procesamiento de Reportes Simples:") # <--- LOG Excepción General
+            log.exception(f"Error inesperado durante el procesamiento de {self.esquema['nombre']}:") # <--- LOG Excepción General
             self.error_occurred.emit(f"Error inesperado en el procesamiento: {str(e)}")
 
-    def detectar_y_leer_archivo(self, file_path):
-        """Detecta el separador y lee el CSV."""
-        file_name = os.path.basename(file_path) # Nombre para logs
+    def procesar_archivo(self, file_path):
+        """
+        Lee, valida y calcula las estadísticas de un reporte sin emitir señales, de modo
+        que también pueda ejecutarse en un proceso del pool. Retorna un dict con:
+          - 'archivo': nombre del archivo
+          - 'avisos': errores de lectura (el archivo se omite y se continúa)
+          - 'error': error que detiene el procesamiento, o None
+          - 'stats': fila de estadísticas del archivo, o None si se omitió
+        """
+        file_name = os.path.basename(file_path)
+        resultado = {'archivo': file_name, 'avisos': [], 'error': None, 'stats': None}
+        
+        if self.modo_streaming:
+            self.procesar_archivo_por_bloques(file_path, resultado)
+            return resultado
+        
+        # 1. Detectar separador y leer archivo
         try:
-            log.debug(f"Intentando detectar separador y leer (Reportes Simples): {file_name}") # <--- LOG Inicio Lectura
-            separador = detectar_separador_archivo(file_path)
-            log.debug(f"Separador detectado para {file_name}: '{separador}'") # <--- LOG Separador
-            
-            df = pd.read_csv(file_path, sep=separador, encoding='utf-8', low_memory=False)
-            
-            original_columns = df.columns.tolist()
-            df.columns = df.columns.str.strip().str.lower() # Normalizar headers
-            new_columns = df.columns.tolist()
-            if original_columns != new_columns:
-                 log.debug(f"Columnas normalizadas en {file_name}: {original_columns} -> {new_columns}")
-                 
-            # Renombrar 'clientid' a 'clienteid' si existe
-            if 'clientid' in df.columns and 'clienteid' not in df.columns:
-                 df.rename(columns={'clientid': 'clienteid'}, inplace=True)
-                 log.debug(f"Columna 'clientid' renombrada a 'clienteid' en {file_name}")
-
-            return df
-            
-        except FileNotFoundError:
-            log.error(f"Error Crítico: Archivo no encontrado al intentar leer (Reportes Simples): {file_path}") # <--- LOG Error Archivo No Encontrado
-            self.error_occurred.emit(f"Error: No se encontró el archivo {file_name}")
-            return None
-        except pd.errors.ParserError as pe:
-            log.error(f"Error de formato CSV/TSV al leer {file_name}: {pe}") # <--- LOG Error Formato
-            self.error_occurred.emit(f"Error de formato en {file_name}. Verifique las columnas y separadores.")
-            return None
+            df = self.detectar_y_leer_archivo(file_path)
         except Exception as e:
-            log.exception(f"Error inesperado al leer el archivo {file_name} (Reportes Simples):") # <--- LOG Error Genérico Lectura
-            self.error_occurred.emit(f"Error al leer archivo {file_name}: {str(e)}")
-            return None
+            resultado['avisos'].append(self.mensaje_error_lectura(file_path, e))
+            return resultado
+        
+        log.debug(f"Archivo leído: {file_name}, {len(df)} registros.") # <--- LOG Lectura
+        
+        # 2. Validar estructura
+        if not self.validar_estructura_archivo(df):
+            resultado['error'] = f"El archivo {file_name} no tiene la estructura requerida."
+            log.error(f"Error de estructura en {self.esquema['nombre']}: {resultado['error']}") # <--- LOG Error Estructura
+            return resultado
+        
+        # 3. Limpiar y convertir tipos de datos (¡Muy importante!)
+        log.debug(f"Limpiando y convirtiendo tipos de datos para {file_name}...") # <--- LOG Limpieza
+        try:
+            # Enteros compactos (no numéricos -> 0) y textos en minúsculas, según el esquema
+            aplicar_conversiones(df, self.esquema)
+        except KeyError as ke:
+            log.error(f"Error de clave al convertir tipos en {file_name}: Columna {ke} no encontrada (esto no debería pasar si la validación funcionó).")
+            resultado['error'] = f"Error interno: Falta columna {ke} en {file_name}."
+            return resultado
+        except Exception as ex_convert: # Captura otros errores de conversión
+            log.exception(f"Error inesperado al convertir tipos de datos en {file_name}:")
+            resultado['error'] = f"Error al convertir datos en {file_name}: {ex_convert}"
+            return resultado
+        log.debug(f"Tipos de datos convertidos para {file_name}.") # <--- LOG Limpieza Fin
 
-    def validar_estructura_archivo(self, df):
-        """Valida que el archivo tenga las columnas requeridas."""
+        # 4. Calcular estadísticas con los KPIs definidos en el esquema
+        log.debug(f"Calculando estadísticas para {file_name}...") # <--- LOG Cálculo
+        total_original = len(df)
+        excluidos = self.contar_excluidos(df)
+        kpis = calcular_kpis(df, self.esquema)
+        log.debug(f"Estadísticas calculadas para {file_name}.") # <--- LOG Cálculo Fin
+
+        resultado['stats'] = self.fila_estadisticas(file_name, total_original, excluidos, kpis)
+        return resultado
+
+    def fila_estadisticas(self, file_name, total_original, excluidos, kpis):
+        """Fila del resumen para un reporte."""
+        return {
+            'CAMPAÑA': file_name,
+            'Total Original': total_original,
+            'Total Generada': total_original - excluidos, # Sin los teléfonos de la lista de exclusión
+            'Excluidos': excluidos,
+            **kpis
+        }
+
+    def procesar_archivo_por_bloques(self, file_path, resultado):
+        """
+        Calcula las estadísticas de un reporte leyéndolo en bloques de `tamano_bloque`
+        filas (modo streaming) y llena `resultado` igual que procesar_archivo. De cada
+        bloque solo se guardan contadores: el conteo por combinación de valores de los
+        KPIs (contar_combinaciones), el total de filas y los excluidos.
+        """
+        file_name = os.path.basename(file_path)
+        columna_telefono = self.esquema['telefono']
+        columnas_conteo = columnas_kpis(self.esquema)
+        # Solo las columnas de los KPIs, las que se convierten y el teléfono (las demás las revisó el preflight)
+        columnas = list(dict.fromkeys(columnas_conteo + list(self.esquema['enteros']) + self.esquema['textos']
+                                      + [columna_telefono]))
+        lista = self.obtener_lista_exclusion()
+        total_original = 0
+        tabla = contar_combinaciones(pd.DataFrame(columns=columnas_conteo), columnas_conteo)
+        excluidos = 0
         try:
-            columnas_archivo = set(df.columns) # Ya están normalizadas
-            columnas_requeridas_set = set(self.columnas_requeridas) # Definidas en minúsculas
-            
-            missing_cols = columnas_requeridas_set - columnas_archivo
-            if missing_cols:
-                log.warning(f"Validación de estructura fallida (Reportes Simples). Faltan columnas: {missing_cols}") # <--- LOG Columnas Faltantes
-                return False
-            
-            # Log éxito (opcional, puede ser verboso)
-            # log.debug("Validación de estructura (Reportes Simples) completada exitosamente.")
-            return True
+            log.debug(f"Leyendo {file_name} por bloques de {self.tamano_bloque} filas.")
+            inspeccion = self.obtener_inspeccion(file_path)
+            # Los mismos tipos que la lectura completa (el teléfono como texto)
+            plan = construir_plan_lectura(inspeccion['columnas'], columnas, self.esquema['dtypes'], self.esquema['alias'])
+            with abrir_origen(file_path) as origen, \
+                 pd.read_csv(origen, sep=inspeccion['separador'], encoding=inspeccion['encoding'],
+                             dtype=plan['dtype'], usecols=plan['usecols'], chunksize=self.tamano_bloque) as lector:
+                for df in lector:
+                    df.rename(columns=plan['renombrar'], inplace=True)
+                    total_original += len(df)
+                    try:
+                        aplicar_conversiones(df, self.esquema)
+                    except Exception as ex_convert:
+                        log.exception(f"Error inesperado al convertir tipos de datos en {file_name}:")
+                        resultado['error'] = f"Error al convertir datos en {file_name}: {ex_convert}"
+                        return
+                    tabla = sumar_conteos([tabla, contar_combinaciones(df, columnas_conteo)])
+                    
+                    if lista is not None:
+                        excluidos += int(telefonos_excluidos(normalizar_telefonos(df[columna_telefono]), lista).sum())
         except Exception as e:
-            log.exception("Error inesperado durante la validación de estructura (Reportes Simples):") # <--- LOG Error Validación
-            self.error_occurred.emit(f"Error al validar estructura: {str(e)}") 
-            return False
\ No newline at end of file
+            # Igual que en el modo normal, un reporte con error de lectura se omite
+            resultado['avisos'].append(self.mensaje_error_lectura(file_path, e))
+            return
+        
+        log.debug(f"Reporte leído por bloques: {file_name}, {total_original} registros.") # <--- LOG Lectura por bloques
+        resultado['stats'] = self.fila_estadisticas(file_name, total_original, excluidos,
+                                                    kpis_desde_conteos(tabla, self.esquema))
\ No newline at end of file
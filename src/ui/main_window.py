@@ -1,7 +1,8 @@
 # Contenido COMPLETO y CORREGIDO para: src/ui/main_window.py
 
-from PySide6.QtWidgets import (QMainWindow, QTabWidget, QStatusBar, QLabel)
-from PySide6.QtGui import QAction, QIcon
+from PySide6.QtWidgets import (QMainWindow, QTabWidget, QStatusBar, QLabel, QFileDialog, QMessageBox)
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QAction, QActionGroup, QIcon
 import os
 import sys
 
@@ -17,6 +18,15 @@ from src.ui.tabs.ReportesBasicTab import ReportesBasicTab
 # Importar ThemeManager y AboutDialog
 from src.config.themes import ThemeManager
 from .about_dialog import AboutDialog
+from src.utils.file_handlers import establecer_motor_csv, obtener_motor_csv
+from src.utils.cache_lectura import establecer_cache_habilitada, cache_habilitada, vaciar_cache
+from src.utils.cache_validacion import vaciar_cache_validacion
+from src.utils.exclusiones import (establecer_archivo_exclusion, obtener_archivo_exclusion, existe_lista_exclusion,
+                                   vaciar_cache_exclusiones)
+from src.utils.logger_setup import log
+from src.utils.compresion import FILTRO_ARCHIVOS_DATOS
+from src.config.validacion import establecer_configuracion_validacion, establecer_limite_segmentos
+from src.config.estatus import establecer_descripciones_estatus
 
 # Función auxiliar para obtener la ruta correcta a los recursos
 # (Asegúrate de que esta función esté definida en tu archivo)
@@ -35,6 +45,25 @@ class MainWindow(QMainWindow):
         self.db_connection = db_connection
         self.config = config
         self.theme_manager = ThemeManager()
+        # Motor de lectura CSV compartido por todos los hilos de procesamiento
+        establecer_motor_csv(self.config.get_csv_engine())
+        # Caché de archivos ya leídos (se reutiliza al reprocesar los mismos archivos)
+        establecer_cache_habilitada(self.config.get_parse_cache_enabled())
+        # Caracteres permitidos y transliteración del modo sanitizar (si se personalizaron)
+        establecer_configuracion_validacion(self.config.get_allowed_characters(), self.config.get_transliteration())
+        establecer_limite_segmentos(self.config.get_segment_limit())
+        # Descripciones de los códigos de 'status' del histograma de Reportes Directo
+        establecer_descripciones_estatus(self.config.get_status_descriptions())
+        # Lista de exclusión (opt-out) aplicada a devoluciones y contada en los reportes.
+        # Si el archivo ya no existe se desactiva (y se avisa al mostrar la ventana) para que
+        # el procesamiento no falle
+        ruta_exclusion = self.config.get_opt_out_file()
+        if ruta_exclusion and not existe_lista_exclusion(ruta_exclusion):
+            log.warning(f"No se encontró la lista de exclusión configurada ({ruta_exclusion}); se desactiva.") # <--- LOG Exclusión no encontrada
+            self.config.set_opt_out_file(None)
+            QTimer.singleShot(0, lambda ruta=ruta_exclusion: self.avisar_lista_exclusion_no_encontrada(ruta, desactivada=True))
+            ruta_exclusion = None
+        establecer_archivo_exclusion(ruta_exclusion)
         self.init_ui()
 
     def init_ui(self):
@@ -102,6 +131,34 @@ class MainWindow(QMainWindow):
         dark_theme_action.triggered.connect(lambda: self.cambiar_tema("dark"))
         theme_menu.addAction(dark_theme_action)
 
+        # Menú Opciones
+        options_menu = menubar.addMenu('⚙️ Opciones')
+        engine_menu = options_menu.addMenu('Motor de lectura CSV')
+        engine_group = QActionGroup(self)
+        engine_group.setExclusive(True)
+        for motor, texto in (('pyarrow', 'PyArrow (multihilo)'), ('c', 'Pandas (parser C)')):
+            engine_action = QAction(texto, self, checkable=True)
+            engine_action.setChecked(obtener_motor_csv() == motor)
+            engine_action.triggered.connect(lambda checked, m=motor: self.cambiar_motor_csv(m))
+            engine_group.addAction(engine_action)
+            engine_menu.addAction(engine_action)
+
+        cache_action = QAction('Caché de lectura', self, checkable=True)
+        cache_action.setChecked(cache_habilitada())
+        cache_action.toggled.connect(self.cambiar_cache_lectura)
+        options_menu.addAction(cache_action)
+        clear_cache_action = QAction('🗑️ Vaciar cachés (lectura, validación y exclusión)', self)
+        clear_cache_action.triggered.connect(self.vaciar_caches)
+        options_menu.addAction(clear_cache_action)
+
+        optout_menu = options_menu.addMenu('Lista de exclusión')
+        select_optout_action = QAction('📵 Seleccionar archivo...', self)
+        select_optout_action.triggered.connect(self.seleccionar_lista_exclusion)
+        optout_menu.addAction(select_optout_action)
+        clear_optout_action = QAction('Quitar lista de exclusión', self)
+        clear_optout_action.triggered.connect(lambda: self.cambiar_lista_exclusion(None))
+        optout_menu.addAction(clear_optout_action)
+
         # Menú Ayuda
         help_menu = menubar.addMenu('❓ Ayuda')
         about_action = QAction('ℹ️ Acerca de...', self)
@@ -120,6 +177,46 @@ class MainWindow(QMainWindow):
 
         self.update_status_bar_style()
 
+    def cambiar_motor_csv(self, motor):
+        """Cambia el motor de lectura CSV y guarda la preferencia."""
+        establecer_motor_csv(motor)
+        self.config.set_csv_engine(motor)
+
+    def cambiar_cache_lectura(self, habilitada):
+        """Activa o desactiva la caché de lectura y guarda la preferencia."""
+        establecer_cache_habilitada(habilitada)
+        self.config.set_parse_cache_enabled(habilitada)
+
+    def vaciar_caches(self):
+        """Vacía la caché de archivos leídos, la de mensajes ya validados y la de la lista de exclusión."""
+        vaciar_cache()
+        vaciar_cache_validacion()
+        vaciar_cache_exclusiones()
+
+    def seleccionar_lista_exclusion(self):
+        """Elige el archivo de teléfonos que no deben recibir mensajes."""
+        ruta, _ = QFileDialog.getOpenFileName(self, "Seleccionar lista de exclusión",
+                                              os.path.dirname(obtener_archivo_exclusion() or ''), FILTRO_ARCHIVOS_DATOS)
+        if ruta:
+            self.cambiar_lista_exclusion(ruta)
+
+    def cambiar_lista_exclusion(self, ruta):
+        """Configura la lista de exclusión (None la quita) y guarda la preferencia."""
+        if ruta and not existe_lista_exclusion(ruta):
+            self.avisar_lista_exclusion_no_encontrada(ruta)
+            return
+        establecer_archivo_exclusion(ruta)
+        self.config.set_opt_out_file(ruta)
+        self.statusBar.showMessage(f"Lista de exclusión: {os.path.basename(ruta)}" if ruta
+                                   else "Lista de exclusión desactivada", 5000)
+
+    def avisar_lista_exclusion_no_encontrada(self, ruta, desactivada=False):
+        """Avisa que el archivo de la lista de exclusión no existe (y si por eso se desactivó la lista)."""
+        mensaje = f"No se encontró la lista de exclusión:\n{ruta}"
+        if desactivada:
+            mensaje += "\n\nSe desactivó: se procesará sin exclusiones hasta que seleccione otra lista."
+        QMessageBox.warning(self, "Lista de exclusión", mensaje)
+
     def update_status_bar_style(self):
         """Actualiza el color del texto de créditos en la barra de estado."""
         if hasattr(self, 'credits_label'):
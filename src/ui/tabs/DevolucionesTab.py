@@ -3,7 +3,7 @@
 from PySide6.QtWidgets import (QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, 
                                QTableWidgetItem, QFileDialog, QMessageBox, QLabel, 
                                QProgressBar, QListWidget, QHeaderView, QAbstractItemView, 
-                               QGroupBox, QSizePolicy)
+                               QGroupBox, QSizePolicy, QCheckBox, QComboBox, QSpinBox)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QColor, QGuiApplication, QPixmap
 import os
@@ -12,14 +12,19 @@ import pandas as pd
 
 from ..components.base_tab import BaseTab
 from src.models.processing import ProcessingThread
-from src.utils.file_handlers import crear_nombre_archivo_seguro, preparar_dataframe_exportacion
+from src.models.processing_exportacion import ExportThread
+from src.utils.compresion import FILTRO_ARCHIVOS_DATOS, expandir_archivos
+from src.utils.duplicados import POLITICAS_DUPLICADOS
 
 class DevolucionesTab(BaseTab):
     def __init__(self, db_connection, theme_manager):
         super().__init__(db_connection, theme_manager, "Generar Devoluciones")
         self.dataframes_procesados = {}
         self.df_resumen = None
+        self.indice_errores = None # Resultado de la validación completa
+        self.df_telefonos_invalidos = pd.DataFrame() # Filas rechazadas por teléfono inválido
         self.selected_files = []
+        self.resultados_archivos = None # Resultados por archivo de la última corrida (solo se procesan los archivos nuevos)
         self.init_ui()
     
     def init_ui(self):
@@ -38,6 +43,11 @@ class DevolucionesTab(BaseTab):
         self.btn_cargar.setToolTip("Seleccionar archivos CSV para procesar")
         file_buttons_layout.addWidget(self.btn_cargar)
         
+        self.btn_quitar = QPushButton('➖ Quitar')
+        self.btn_quitar.clicked.connect(self.quitar_archivos)
+        self.btn_quitar.setToolTip("Quitar de la lista los archivos seleccionados (y sus registros de los resultados)")
+        file_buttons_layout.addWidget(self.btn_quitar)
+        
         self.btn_limpiar = QPushButton('🗑️ Limpiar')
         self.btn_limpiar.clicked.connect(self.limpiar_seleccion)
         self.btn_limpiar.setToolTip("Limpiar lista de archivos seleccionados")
@@ -57,9 +67,49 @@ class DevolucionesTab(BaseTab):
         
         file_layout.addLayout(file_buttons_layout)
         
+        # Opciones de procesamiento
+        opciones_layout = QHBoxLayout()
+        self.chk_streaming = QCheckBox('Modo streaming (bajo consumo de memoria)')
+        self.chk_streaming.setToolTip("Lee los archivos por bloques en lugar de cargarlos completos en memoria")
+        opciones_layout.addWidget(self.chk_streaming)
+        self.chk_paralelo = QCheckBox('Procesamiento paralelo')
+        self.chk_paralelo.setToolTip("Procesa varios archivos a la vez usando todos los núcleos del equipo")
+        opciones_layout.addWidget(self.chk_paralelo)
+        self.chk_validacion_completa = QCheckBox('Validación completa (reportar todos los errores)')
+        self.chk_validacion_completa.setToolTip("Revisa todos los archivos y registra cada carácter no permitido en lugar de detenerse en los primeros")
+        opciones_layout.addWidget(self.chk_validacion_completa)
+        self.chk_sanitizar = QCheckBox('Sanitizar caracteres no permitidos')
+        self.chk_sanitizar.setToolTip("Reemplaza acentos, ñ y comillas tipográficas por su equivalente permitido y elimina el resto de caracteres no permitidos")
+        opciones_layout.addWidget(self.chk_sanitizar)
+        self.chk_exportar_al_procesar = QCheckBox('Exportar mientras se procesa')
+        self.chk_exportar_al_procesar.setToolTip("Escribe los archivos por campaña conforme se procesa cada archivo, sin conservar los registros en memoria")
+        opciones_layout.addWidget(self.chk_exportar_al_procesar)
+        opciones_layout.addStretch(1)
+        file_layout.addLayout(opciones_layout)
+        
+        # Duplicados entre archivos
+        duplicados_layout = QHBoxLayout()
+        self.combo_clave_duplicados = QComboBox()
+        self.combo_clave_duplicados.addItem('Sin detección de duplicados', None)
+        self.combo_clave_duplicados.addItem('Duplicados por teléfono', 'numtelefono')
+        self.combo_clave_duplicados.addItem('Duplicados por cliente', 'clienteid')
+        self.combo_clave_duplicados.setToolTip("Registros repetidos entre todos los archivos de la corrida")
+        duplicados_layout.addWidget(self.combo_clave_duplicados)
+        self.combo_politica_duplicados = QComboBox()
+        for politica, texto in POLITICAS_DUPLICADOS.items():
+            self.combo_politica_duplicados.addItem(texto, politica)
+        self.combo_politica_duplicados.setToolTip("Qué registro se conserva cuando hay repetidos")
+        duplicados_layout.addWidget(self.combo_politica_duplicados)
+        self.chk_duplicados_por_campana = QCheckBox('Solo dentro de la misma campaña')
+        self.chk_duplicados_por_campana.setChecked(True)
+        duplicados_layout.addWidget(self.chk_duplicados_por_campana)
+        duplicados_layout.addStretch(1)
+        file_layout.addLayout(duplicados_layout)
+        
         self.lista_archivos = QListWidget()
         self.lista_archivos.setMaximumHeight(120)
         self.lista_archivos.setToolTip("Archivos seleccionados para procesar")
+        self.lista_archivos.setSelectionMode(QAbstractItemView.ExtendedSelection)
         file_layout.addWidget(self.lista_archivos)
         
         file_group.setLayout(file_layout)
@@ -78,6 +128,12 @@ class DevolucionesTab(BaseTab):
         self.progress_bar.setMinimumHeight(20)
         progress_layout.addWidget(self.progress_bar)
         
+        self.btn_cancelar_exportacion = QPushButton('⏹️ Cancelar Exportación')
+        self.btn_cancelar_exportacion.clicked.connect(self.cancelar_exportacion)
+        self.btn_cancelar_exportacion.setVisible(False)
+        self.btn_cancelar_exportacion.setToolTip("Detener la exportación sin dejar archivos a medias")
+        progress_layout.addWidget(self.btn_cancelar_exportacion)
+        
         progress_group.setLayout(progress_layout)
         main_layout.addWidget(progress_group)
 
@@ -124,12 +180,39 @@ class DevolucionesTab(BaseTab):
         self.btn_copiar_tabla.setToolTip("Copiar una imagen de la tabla al portapapeles")
         results_buttons_layout.addWidget(self.btn_copiar_tabla)
         
+        # Límites por archivo exportado (la pasarela SMS rechaza archivos más grandes); 0 = sin límite
+        self.spin_max_filas = QSpinBox()
+        self.spin_max_filas.setRange(0, 100_000_000)
+        self.spin_max_filas.setSingleStep(10_000)
+        self.spin_max_filas.setSpecialValueText('Sin límite de filas')
+        self.spin_max_filas.setSuffix(' filas')
+        self.spin_max_filas.setToolTip("Máximo de filas por archivo: las campañas más grandes se dividen en varios archivos")
+        results_buttons_layout.addWidget(self.spin_max_filas)
+        self.spin_max_mb = QSpinBox()
+        self.spin_max_mb.setRange(0, 100_000)
+        self.spin_max_mb.setSpecialValueText('Sin límite de tamaño')
+        self.spin_max_mb.setSuffix(' MB')
+        self.spin_max_mb.setToolTip("Tamaño máximo por archivo: las campañas más grandes se dividen en varios archivos")
+        results_buttons_layout.addWidget(self.spin_max_mb)
+        
         self.btn_exportar = QPushButton('📤 Exportar Resultados')
         self.btn_exportar.clicked.connect(self.exportar_resultados)
         self.btn_exportar.setEnabled(False)
         self.btn_exportar.setToolTip("Exportar archivos procesados por campaña")
         results_buttons_layout.addWidget(self.btn_exportar)
         
+        self.btn_exportar_errores = QPushButton('🧾 Exportar Errores')
+        self.btn_exportar_errores.clicked.connect(self.exportar_errores)
+        self.btn_exportar_errores.setEnabled(False)
+        self.btn_exportar_errores.setToolTip("Exportar a CSV la lista completa de errores de la validación")
+        results_buttons_layout.addWidget(self.btn_exportar_errores)
+        
+        self.btn_exportar_invalidos = QPushButton('📵 Exportar Inválidos')
+        self.btn_exportar_invalidos.clicked.connect(self.exportar_telefonos_invalidos)
+        self.btn_exportar_invalidos.setEnabled(False)
+        self.btn_exportar_invalidos.setToolTip("Exportar a CSV los registros rechazados por teléfono inválido")
+        results_buttons_layout.addWidget(self.btn_exportar_invalidos)
+        
         results_layout.addLayout(results_buttons_layout)
         results_group.setLayout(results_layout)
         main_layout.addWidget(results_group)
@@ -210,25 +293,54 @@ class DevolucionesTab(BaseTab):
                 'dataframes': self.dataframes_procesados,
                 'resumen': self.df_resumen
             })
+        elif self.indice_errores is not None:
+            self.mostrar_validacion(self.indice_errores)
 
 
     def cargar_archivos(self):
         file_paths, _ = QFileDialog.getOpenFileNames(
-            self, 'Seleccionar archivos CSV', '', 'Archivos CSV (*.csv);;Todos los archivos (*)'
+            self, 'Seleccionar archivos CSV', '', FILTRO_ARCHIVOS_DATOS
         )
         if file_paths:
+            # Cada archivo dentro de un .zip se agrega por separado
+            file_paths = expandir_archivos(file_paths)
             self.selected_files.extend(file_paths)
             self.actualizar_lista_archivos()
             self.btn_procesar.setEnabled(len(self.selected_files) > 0)
-            self.lbl_estado.setText(f"{len(file_paths)} archivo(s) agregado(s)")
+            self.lbl_estado.setText(f"{len(file_paths)} archivo(s) agregado(s)"
+                                    + (" - al procesar solo se leen los nuevos" if self.resultados_archivos else ""))
+
+    def quitar_archivos(self):
+        """
+        Quita los archivos marcados en la lista. Si ya hay resultados se vuelven a
+        consolidar sin esos archivos; los demás no se vuelven a leer.
+        """
+        filas = sorted({self.lista_archivos.row(item) for item in self.lista_archivos.selectedItems()}, reverse=True)
+        if not filas:
+            QMessageBox.warning(self, "Advertencia", "Seleccione en la lista los archivos a quitar")
+            return
+        for fila in filas:
+            del self.selected_files[fila]
+        if not self.selected_files:
+            self.limpiar_seleccion()
+            return
+        self.actualizar_lista_archivos()
+        self.lbl_estado.setText(f"{len(filas)} archivo(s) quitado(s)")
+        if self.dataframes_procesados and self.resultados_archivos and not self.chk_exportar_al_procesar.isChecked():
+            self.procesar_archivos()
 
     def limpiar_seleccion(self):
         self.selected_files.clear()
+        self.resultados_archivos = None
         self.lista_archivos.clear()
         self.lbl_archivos_seleccionados.setText('0 archivos')
         self.btn_procesar.setEnabled(False)
         self.btn_exportar.setEnabled(False) 
+        self.btn_exportar_errores.setEnabled(False)
+        self.btn_exportar_invalidos.setEnabled(False)
         self.btn_copiar_tabla.setEnabled(False)
+        self.indice_errores = None
+        self.df_telefonos_invalidos = pd.DataFrame()
         self.lbl_estado.setText('Selección limpiada')
         self.tabla_resumen.setRowCount(0)
         self.tabla_resumen.setColumnCount(0)
@@ -244,76 +356,179 @@ class DevolucionesTab(BaseTab):
         if not self.selected_files:
             QMessageBox.warning(self, "Advertencia", "No hay archivos seleccionados para procesar")
             return
+        carpeta_exportacion = None
+        if self.chk_exportar_al_procesar.isChecked() and not self.chk_validacion_completa.isChecked():
+            carpeta_exportacion = QFileDialog.getExistingDirectory(self, 'Seleccionar carpeta para guardar los archivos')
+            if not carpeta_exportacion:
+                return
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         self.btn_cargar.setEnabled(False)
+        self.btn_quitar.setEnabled(False)
         self.btn_procesar.setEnabled(False)
         self.btn_limpiar.setEnabled(False)
         self.lbl_estado.setText("Iniciando procesamiento...")
-        self.thread = ProcessingThread(self.selected_files, self.db_connection)
+        self.thread = ProcessingThread(list(self.selected_files), self.db_connection,
+                                       modo_streaming=self.chk_streaming.isChecked(),
+                                       modo_paralelo=self.chk_paralelo.isChecked(),
+                                       modo_validacion_completa=self.chk_validacion_completa.isChecked(),
+                                       modo_sanitizar=self.chk_sanitizar.isChecked(),
+                                       clave_duplicados=self.combo_clave_duplicados.currentData(),
+                                       politica_duplicados=self.combo_politica_duplicados.currentData(),
+                                       duplicados_por_campana=self.chk_duplicados_por_campana.isChecked(),
+                                       carpeta_exportacion=carpeta_exportacion,
+                                       resultados_previos=self.resultados_archivos)
         self.thread.update_progress.connect(self.progress_bar.setValue)
         self.thread.update_status.connect(self.lbl_estado.setText)
         self.thread.finished_processing.connect(self.mostrar_resultados)
+        self.thread.validacion_completada.connect(self.mostrar_validacion)
         self.thread.error_occurred.connect(self.mostrar_error)
         self.thread.start()
 
     def mostrar_resultados(self, resultado):
         self.dataframes_procesados = resultado['dataframes']
         self.df_resumen = resultado['resumen']
+        self.indice_errores = None
+        self.df_telefonos_invalidos = resultado.get('telefonos_invalidos', self.df_telefonos_invalidos)
+        if resultado.get('por_archivo') is not None:
+            self.resultados_archivos = resultado['por_archivo']
         
         self.progress_bar.setVisible(False)
         self.btn_cargar.setEnabled(True)
+        self.btn_quitar.setEnabled(True)
         self.btn_procesar.setEnabled(True)
         self.btn_limpiar.setEnabled(True)
-        self.btn_exportar.setEnabled(len(self.dataframes_procesados) > 0)
+        self.btn_exportar.setEnabled(len(self.dataframes_procesados) > 0) # Exportando al procesar no queda nada en memoria
+        self.btn_exportar_errores.setEnabled(False)
+        self.btn_exportar_invalidos.setEnabled(not self.df_telefonos_invalidos.empty)
         self.btn_copiar_tabla.setEnabled(not self.df_resumen.empty) 
 
         if not self.df_resumen.empty:
-            self.tabla_resumen.setRowCount(self.df_resumen.shape[0])
-            self.tabla_resumen.setColumnCount(self.df_resumen.shape[1])
-            self.tabla_resumen.setHorizontalHeaderLabels(self.df_resumen.columns.tolist())
-
-            font_contenido = QFont()
-            font_contenido.setPointSize(9)
-
-            is_dark = self.theme_manager.current_theme == "dark" or (
-                self.theme_manager.current_theme == "system" and 
-                self.theme_manager.is_system_dark()
-            )
-            color_texto = QColor(255, 255, 255) if is_dark else QColor(33, 37, 41)
-
-            for row in range(self.df_resumen.shape[0]):
-                bg_color = QColor(45, 45, 45) if is_dark and row % 2 == 0 else \
-                           QColor(58, 58, 58) if is_dark else \
-                           QColor(255, 255, 255) if not is_dark and row % 2 == 0 else \
-                           QColor(248, 249, 250)
-
-                for col in range(self.df_resumen.shape[1]):
-                    value = str(self.df_resumen.iat[row, col])
-                    item = QTableWidgetItem(value)
-                    item.setFont(font_contenido)
-                    item.setTextAlignment(Qt.AlignCenter)
-                    item.setForeground(color_texto)
-                    item.setBackground(bg_color)
-                    self.tabla_resumen.setItem(row, col, item)
-
-            # --- INICIO DE CORRECCIÓN ---
-            # 1. Forzamos a TODAS las columnas a re-ajustarse a su contenido.
-            #    Esto hará que la tabla sea compacta y sin scroll horizontal.
-            self.tabla_resumen.resizeColumnsToContents()
-            # --- FIN DE CORRECCIÓN ---
+            self.llenar_tabla(self.df_resumen)
             
             total_registros = self.df_resumen['Registros'].sum()
-            total_campanas = len(self.dataframes_procesados)
+            exportados = resultado.get('exportados')
+            total_campanas = len(exportados) if exportados is not None else len(self.dataframes_procesados)
             
             info_text = f"📊 RESUMEN EJECUTIVO | Campañas: {total_campanas} | Registros Totales: {total_registros:,}"
+            if 'Segmentos' in self.df_resumen.columns:
+                info_text += f" | Segmentos SMS: {self.df_resumen['Segmentos'].sum():,}"
+            if not self.df_telefonos_invalidos.empty:
+                info_text += f" | Teléfonos inválidos: {len(self.df_telefonos_invalidos):,}"
+            if 'Excluidos' in self.df_resumen.columns and self.df_resumen['Excluidos'].sum():
+                info_text += f" | Excluidos: {self.df_resumen['Excluidos'].sum():,}"
+            if resultado.get('sanitizados'):
+                info_text += f" | Mensajes corregidos: {resultado['sanitizados']:,}"
             self.lbl_info_adicional.setText(info_text)
             
-            self.lbl_estado.setText(f"✅ Procesamiento completado - {total_campanas} campañas, {total_registros:,} registros")
+            if exportados is not None:
+                self.lbl_estado.setText(f"📤 Procesamiento y exportación completados - {total_campanas} archivos, {total_registros:,} registros")
+            else:
+                self.lbl_estado.setText(f"✅ Procesamiento completado - {total_campanas} campañas, {total_registros:,} registros")
         else:
             self.lbl_estado.setText("⚠️ Procesamiento completado pero no se encontraron datos válidos")
             self.lbl_info_adicional.setText("No se encontraron datos válidos para mostrar")
 
+    def llenar_tabla(self, df):
+        """Muestra un DataFrame en la tabla de resultados con los colores del tema"""
+        self.tabla_resumen.setSortingEnabled(False) # Evita que se reordene mientras se llena
+        self.tabla_resumen.setRowCount(df.shape[0])
+        self.tabla_resumen.setColumnCount(df.shape[1])
+        self.tabla_resumen.setHorizontalHeaderLabels(df.columns.tolist())
+
+        font_contenido = QFont()
+        font_contenido.setPointSize(9)
+
+        is_dark = self.theme_manager.current_theme == "dark" or (
+            self.theme_manager.current_theme == "system" and 
+            self.theme_manager.is_system_dark()
+        )
+        color_texto = QColor(255, 255, 255) if is_dark else QColor(33, 37, 41)
+
+        for row in range(df.shape[0]):
+            bg_color = QColor(45, 45, 45) if is_dark and row % 2 == 0 else \
+                       QColor(58, 58, 58) if is_dark else \
+                       QColor(255, 255, 255) if not is_dark and row % 2 == 0 else \
+                       QColor(248, 249, 250)
+
+            for col in range(df.shape[1]):
+                value = str(df.iat[row, col])
+                item = QTableWidgetItem(value)
+                item.setFont(font_contenido)
+                item.setTextAlignment(Qt.AlignCenter)
+                item.setForeground(color_texto)
+                item.setBackground(bg_color)
+                self.tabla_resumen.setItem(row, col, item)
+
+        # --- INICIO DE CORRECCIÓN ---
+        # 1. Forzamos a TODAS las columnas a re-ajustarse a su contenido.
+        #    Esto hará que la tabla sea compacta y sin scroll horizontal.
+        self.tabla_resumen.resizeColumnsToContents()
+        # --- FIN DE CORRECCIÓN ---
+        self.tabla_resumen.setSortingEnabled(True)
+
+    def mostrar_validacion(self, indice_errores):
+        """Muestra los conteos de la validación completa (por archivo y por carácter)"""
+        self.indice_errores = indice_errores
+        self.dataframes_procesados = {}
+        self.df_resumen = None
+        
+        self.progress_bar.setVisible(False)
+        self.btn_cargar.setEnabled(True)
+        self.btn_quitar.setEnabled(True)
+        self.btn_procesar.setEnabled(True)
+        self.btn_limpiar.setEnabled(True)
+        self.btn_exportar.setEnabled(False)
+        self.btn_exportar_errores.setEnabled(True)
+        self.btn_exportar_invalidos.setEnabled(False)
+        self.btn_copiar_tabla.setEnabled(True)
+        
+        # Una sola tabla: primero los archivos y luego los caracteres
+        por_archivo = indice_errores.conteo_por_archivo()
+        por_caracter = indice_errores.conteo_por_caracter()
+        tabla = pd.concat([
+            pd.DataFrame({'Tipo': 'Archivo', 'Valor': por_archivo['Archivo'], 'Errores': por_archivo['Errores'],
+                          'Filas': por_archivo['Filas con error']}),
+            pd.DataFrame({'Tipo': 'Carácter', 'Valor': por_caracter['Carácter'] + ' (' + por_caracter['Código'] + ')',
+                          'Errores': por_caracter['Errores'], 'Filas': ''}),
+        ], ignore_index=True)
+        self.llenar_tabla(tabla)
+        
+        total_errores = len(indice_errores)
+        self.lbl_info_adicional.setText(f"🧾 VALIDACIÓN COMPLETA | Archivos con errores: {len(por_archivo)} | "
+                                        f"Caracteres distintos: {len(por_caracter)} | Errores: {total_errores:,}")
+        self.lbl_estado.setText(f"❌ Validación completada - {total_errores:,} caracteres no permitidos")
+
+    def exportar_errores(self):
+        if self.indice_errores is None:
+            QMessageBox.warning(self, "Advertencia", "No hay errores de validación para exportar")
+            return
+        ruta, _ = QFileDialog.getSaveFileName(self, 'Guardar lista de errores', 'errores_validacion.csv',
+                                              'Archivos CSV (*.csv)')
+        if not ruta:
+            return
+        try:
+            self.indice_errores.exportar_csv(ruta)
+            QMessageBox.information(self, '✅ Éxito', f'Se exportaron {len(self.indice_errores):,} errores en:\n{ruta}')
+            self.lbl_estado.setText('🧾 Lista de errores exportada')
+        except Exception as e:
+            QMessageBox.critical(self, '❌ Error', f'Error al exportar los errores:\n{str(e)}')
+
+    def exportar_telefonos_invalidos(self):
+        if self.df_telefonos_invalidos.empty:
+            QMessageBox.warning(self, "Advertencia", "No hay registros rechazados por teléfono inválido")
+            return
+        ruta, _ = QFileDialog.getSaveFileName(self, 'Guardar registros rechazados', 'telefonos_invalidos.csv',
+                                              'Archivos CSV (*.csv)')
+        if not ruta:
+            return
+        try:
+            self.df_telefonos_invalidos.to_csv(ruta, index=False, encoding='utf-8-sig')
+            QMessageBox.information(self, '✅ Éxito', f'Se exportaron {len(self.df_telefonos_invalidos):,} registros en:\n{ruta}')
+            self.lbl_estado.setText('📵 Registros rechazados exportados')
+        except Exception as e:
+            QMessageBox.critical(self, '❌ Error', f'Error al exportar los registros rechazados:\n{str(e)}')
+
     def exportar_resultados(self):
         if not self.dataframes_procesados:
             QMessageBox.warning(self, "Advertencia", "No hay datos procesados para exportar")
@@ -321,24 +536,57 @@ class DevolucionesTab(BaseTab):
         carpeta_destino = QFileDialog.getExistingDirectory(self, 'Seleccionar carpeta para guardar los archivos')
         if not carpeta_destino:
             return
-        try:
-            archivos_exportados = []
-            for campana, df in self.dataframes_procesados.items():
-                df_exportar = preparar_dataframe_exportacion(df)
-                nombre_archivo = crear_nombre_archivo_seguro(campana) + '.csv'
-                ruta_completa = os.path.join(carpeta_destino, nombre_archivo)
-                df_exportar.to_csv(ruta_completa, index=False, encoding='utf-8', sep='|')
-                archivos_exportados.append(nombre_archivo)
-            
-            mensaje = f"Se exportaron {len(archivos_exportados)} archivos:\n" + "\n".join(archivos_exportados)
-            QMessageBox.information(self, '✅ Éxito', f'Archivos exportados correctamente en:\n{carpeta_destino}\n\n{mensaje}')
-            self.lbl_estado.setText(f'📤 Exportados {len(archivos_exportados)} archivos')
-        except Exception as e:
-            QMessageBox.critical(self, '❌ Error', f'Error al exportar:\n{str(e)}')
+        self.carpeta_exportacion = carpeta_destino
+        self.bloquear_para_exportacion(True)
+        self.lbl_estado.setText("Iniciando exportación...")
+        # La escritura va en un hilo aparte (con su propio pool) para no congelar la ventana
+        self.thread_exportacion = ExportThread(self.dataframes_procesados, carpeta_destino,
+                                               max_filas=self.spin_max_filas.value() or None,
+                                               max_bytes=self.spin_max_mb.value() * 1024 * 1024 or None)
+        self.thread_exportacion.update_progress.connect(self.progress_bar.setValue)
+        self.thread_exportacion.update_status.connect(self.lbl_estado.setText)
+        self.thread_exportacion.finished_export.connect(self.mostrar_exportacion)
+        self.thread_exportacion.export_cancelled.connect(self.mostrar_exportacion_cancelada)
+        self.thread_exportacion.error_occurred.connect(self.mostrar_error_exportacion)
+        self.thread_exportacion.start()
+
+    def bloquear_para_exportacion(self, exportando):
+        """Muestra el progreso y el botón de cancelar mientras se exporta; los demás botones se desactivan."""
+        self.progress_bar.setVisible(exportando)
+        self.progress_bar.setValue(0)
+        self.btn_cancelar_exportacion.setVisible(exportando)
+        self.btn_cancelar_exportacion.setEnabled(exportando)
+        for boton in (self.btn_cargar, self.btn_quitar, self.btn_procesar, self.btn_limpiar, self.btn_exportar):
+            boton.setEnabled(not exportando)
+
+    def cancelar_exportacion(self):
+        if getattr(self, 'thread_exportacion', None) is not None and self.thread_exportacion.isRunning():
+            self.thread_exportacion.cancelar()
+            self.btn_cancelar_exportacion.setEnabled(False)
+            self.lbl_estado.setText("Cancelando exportación...")
+
+    def mostrar_exportacion(self, exportados):
+        self.bloquear_para_exportacion(False)
+        archivos_exportados = list(exportados)
+        mensaje = f"Se exportaron {len(archivos_exportados)} archivos:\n" + "\n".join(archivos_exportados[:30])
+        if len(archivos_exportados) > 30: # Con fragmentos pueden ser miles
+            mensaje += f"\n... y {len(archivos_exportados) - 30} más"
+        QMessageBox.information(self, '✅ Éxito', f'Archivos exportados correctamente en:\n{self.carpeta_exportacion}\n\n{mensaje}')
+        self.lbl_estado.setText(f'📤 Exportados {len(archivos_exportados)} archivos')
+
+    def mostrar_exportacion_cancelada(self):
+        self.bloquear_para_exportacion(False)
+        self.lbl_estado.setText('⏹️ Exportación cancelada: no se escribió ningún archivo')
+
+    def mostrar_error_exportacion(self, error_msg):
+        self.bloquear_para_exportacion(False)
+        QMessageBox.critical(self, '❌ Error', f'Error al exportar:\n{error_msg}')
+        self.lbl_estado.setText('❌ Error en la exportación')
 
     def mostrar_error(self, error_msg):
         self.progress_bar.setVisible(False)
         self.btn_cargar.setEnabled(True)
+        self.btn_quitar.setEnabled(True)
         self.btn_procesar.setEnabled(True)
         self.btn_limpiar.setEnabled(True)
         QMessageBox.critical(self, '❌ Error', f'Error al procesar los archivos:\n{error_msg}')
@@ -3,7 +3,7 @@
 from PySide6.QtWidgets import (QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
                                QTableWidgetItem, QFileDialog, QMessageBox, QLabel,
                                QProgressBar, QListWidget, QHeaderView, QAbstractItemView,
-                               QGroupBox, QSizePolicy) # QSizePolicy añadido
+                               QGroupBox, QSizePolicy, QCheckBox) # QSizePolicy añadido
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QColor, QGuiApplication # QGuiApplication añadido
 import os
@@ -12,6 +12,7 @@ import pandas as pd
 from ..components.base_tab import BaseTab
 # ¡Importamos el hilo de procesamiento correcto!
 from src.models.processing_reportes_basic import ReportesBasicProcessingThread
+from src.utils.compresion import FILTRO_ARCHIVOS_DATOS, expandir_archivos
 # Importar logger si aún no está
 from src.utils.logger_setup import log
 
@@ -57,6 +58,17 @@ class ReportesBasicTab(BaseTab):
 
         file_layout.addLayout(file_buttons_layout)
 
+        # Opciones de procesamiento
+        opciones_layout = QHBoxLayout()
+        self.chk_streaming = QCheckBox('Modo streaming (bajo consumo de memoria)')
+        self.chk_streaming.setToolTip("Lee los reportes por bloques y acumula los contadores, sin cargarlos completos en memoria")
+        opciones_layout.addWidget(self.chk_streaming)
+        self.chk_paralelo = QCheckBox('Procesamiento paralelo')
+        self.chk_paralelo.setToolTip("Procesa varios reportes a la vez usando todos los núcleos del equipo")
+        opciones_layout.addWidget(self.chk_paralelo)
+        opciones_layout.addStretch(1)
+        file_layout.addLayout(opciones_layout)
+
         self.lista_archivos = QListWidget()
         self.lista_archivos.setMaximumHeight(120)
         self.lista_archivos.setToolTip("Archivos seleccionados para procesar")
@@ -183,9 +195,11 @@ class ReportesBasicTab(BaseTab):
 
     def cargar_archivos(self):
         file_paths, _ = QFileDialog.getOpenFileNames(
-            self, 'Seleccionar archivos CSV', '', 'Archivos CSV (*.csv);;Todos los archivos (*)'
+            self, 'Seleccionar archivos CSV', '', FILTRO_ARCHIVOS_DATOS
         )
         if file_paths:
+            # Cada archivo dentro de un .zip se agrega por separado
+            file_paths = expandir_archivos(file_paths)
             log.info(f"Cargados {len(file_paths)} archivo(s) para Reportes Basic.")
             self.selected_files.extend(file_paths)
             self.actualizar_lista_archivos()
@@ -224,7 +238,9 @@ class ReportesBasicTab(BaseTab):
         self.btn_limpiar.setEnabled(False)
         self.lbl_estado.setText("Iniciando procesamiento de reportes...")
 
-        self.thread = ReportesBasicProcessingThread(self.selected_files, self.db_connection)
+        self.thread = ReportesBasicProcessingThread(self.selected_files, self.db_connection,
+                                                    modo_paralelo=self.chk_paralelo.isChecked(),
+                                                    modo_streaming=self.chk_streaming.isChecked())
         self.thread.update_progress.connect(self.progress_bar.setValue)
         self.thread.update_status.connect(self.lbl_estado.setText)
         self.thread.finished_processing.connect(self.mostrar_resultados)
@@ -7,15 +7,19 @@ from PySide6.QtWidgets import (QVBoxLayout, QHBoxLayout, QPushButton, QTableWidg
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QColor, QGuiApplication, QPixmap
 import os
+import numpy as np
 import pandas as pd
 
 from ..components.base_tab import BaseTab 
 from src.models.processing_directo import DirectoProcessingThread # Importamos el nuevo hilo
+from src.utils.compresion import expandir_archivos
 
 class ReportesDirectoTab(BaseTab):
     def __init__(self, db_connection, theme_manager):
         super().__init__(db_connection, theme_manager, "Reportes Directo") # Título de la pestaña
         self.df_resultados = pd.DataFrame() 
+        self.df_desglose = pd.DataFrame() # Totales de cada archivo
+        self.df_histograma = pd.DataFrame() # Registros por código de 'status'
         self.selected_files = []
         self.init_ui()
 
@@ -99,6 +103,14 @@ class ReportesDirectoTab(BaseTab):
 
         results_layout.addWidget(self.tabla_resumen)
 
+        # Debajo del resumen, lado a lado: desglose por archivo (los mismos totales,
+        # archivo por archivo) e histograma de todos los códigos de 'status'
+        detalle_layout = QHBoxLayout()
+        self.lbl_desglose, self.tabla_desglose = self.crear_tabla_detalle('Desglose por archivo', detalle_layout, 3)
+        self.lbl_histograma, self.tabla_histograma = self.crear_tabla_detalle('Histograma de status', detalle_layout, 2)
+        self.actualizar_estilo_tabla()
+        results_layout.addLayout(detalle_layout)
+
         self.lbl_info_adicional = QLabel('')
         self.actualizar_estilo_info_adicional()
         results_layout.addWidget(self.lbl_info_adicional)
@@ -161,9 +173,13 @@ class ReportesDirectoTab(BaseTab):
             self.theme_manager.current_theme == "system" and 
             self.theme_manager.is_system_dark()
         ):
-            self.tabla_resumen.setStyleSheet(dark_style)
+            estilo = dark_style
         else:
-            self.tabla_resumen.setStyleSheet(light_style)
+            estilo = light_style
+        self.tabla_resumen.setStyleSheet(estilo)
+        if hasattr(self, 'tabla_histograma'): # Se crean después de la tabla resumen
+            self.tabla_desglose.setStyleSheet(estilo)
+            self.tabla_histograma.setStyleSheet(estilo)
 
     def update_styles(self):
         # ... (código idéntico a ReportesSimplesTab) ...
@@ -172,6 +188,10 @@ class ReportesDirectoTab(BaseTab):
         self.actualizar_estilo_tabla()
         if not self.df_resultados.empty:
             self.mostrar_resultados(self.df_resultados)
+        if not self.df_desglose.empty:
+            self.mostrar_desglose(self.df_desglose)
+        if not self.df_histograma.empty:
+            self.mostrar_histograma(self.df_histograma)
 
     # --- MÉTODOS DE FUNCIONALIDAD (Adaptados) ---
     def cargar_archivos(self):
@@ -180,6 +200,8 @@ class ReportesDirectoTab(BaseTab):
             self, 'Seleccionar archivos', '', 'Todos los archivos (*.*)'
         )
         if file_paths:
+            # Cada archivo dentro de un .zip se agrega por separado
+            file_paths = expandir_archivos(file_paths)
             self.selected_files.extend(file_paths)
             self.actualizar_lista_archivos()
             self.btn_procesar.setEnabled(len(self.selected_files) > 0)
@@ -197,6 +219,8 @@ class ReportesDirectoTab(BaseTab):
         self.tabla_resumen.setColumnCount(0)
         self.lbl_info_adicional.setText('')
         self.df_resultados = pd.DataFrame()
+        self.mostrar_desglose(pd.DataFrame())
+        self.mostrar_histograma(pd.DataFrame())
 
     def actualizar_lista_archivos(self):
         # ... (código idéntico a ReportesSimplesTab) ...
@@ -223,6 +247,8 @@ class ReportesDirectoTab(BaseTab):
         self.thread = DirectoProcessingThread(self.selected_files, self.db_connection) 
         self.thread.update_progress.connect(self.progress_bar.setValue)
         self.thread.update_status.connect(self.lbl_estado.setText)
+        self.thread.desglose_por_archivo.connect(self.mostrar_desglose)
+        self.thread.histograma_estatus.connect(self.mostrar_histograma)
         self.thread.finished_processing.connect(self.mostrar_resultados)
         self.thread.error_occurred.connect(self.mostrar_error)
         self.thread.start()
@@ -280,6 +306,62 @@ class ReportesDirectoTab(BaseTab):
             self.lbl_estado.setText("⚠️ Procesamiento completado pero no se encontraron datos válidos")
             self.lbl_info_adicional.setText("No se encontraron datos válidos para mostrar")
 
+    def crear_tabla_detalle(self, titulo, layout, proporcion):
+        """Crea una tabla de detalle con su título (ocultas hasta que haya datos) y la agrega al layout."""
+        columna_layout = QVBoxLayout()
+        lbl = QLabel(titulo)
+        lbl.setStyleSheet("font-weight: bold;")
+        lbl.setVisible(False)
+        columna_layout.addWidget(lbl)
+
+        tabla = QTableWidget()
+        tabla.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Expanding)
+        tabla.setAlternatingRowColors(True)
+        tabla.setSelectionBehavior(QAbstractItemView.SelectRows)
+        tabla.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        tabla.verticalHeader().setVisible(False)
+        tabla.setVisible(False)
+        columna_layout.addWidget(tabla)
+        layout.addLayout(columna_layout, proporcion)
+        return lbl, tabla
+
+    def mostrar_desglose(self, df_desglose):
+        """Llena la tabla con una fila de totales por archivo (se oculta si no hay datos)."""
+        self.df_desglose = df_desglose
+        self.llenar_tabla_detalle(self.lbl_desglose, self.tabla_desglose, df_desglose)
+
+    def mostrar_histograma(self, df_histograma):
+        """Llena la tabla con los registros de cada código de 'status' (se oculta si no hay datos)."""
+        self.df_histograma = df_histograma
+        self.llenar_tabla_detalle(self.lbl_histograma, self.tabla_histograma, df_histograma)
+
+    def llenar_tabla_detalle(self, lbl, tabla, df):
+        lbl.setVisible(not df.empty)
+        tabla.setVisible(not df.empty)
+        tabla.setRowCount(df.shape[0])
+        tabla.setColumnCount(df.shape[1])
+        tabla.setHorizontalHeaderLabels(df.columns.tolist())
+
+        font_contenido = QFont()
+        font_contenido.setPointSize(9)
+        is_dark = self.theme_manager.current_theme == "dark" or (
+            self.theme_manager.current_theme == "system" and 
+            self.theme_manager.is_system_dark()
+        )
+        color_texto = QColor(255, 255, 255) if is_dark else QColor(33, 37, 41)
+
+        for row in range(df.shape[0]):
+            for col in range(df.shape[1]):
+                valor = df.iat[row, col]
+                item = QTableWidgetItem(f"{valor:,}" if isinstance(valor, (int, np.integer)) else str(valor))
+                item.setFont(font_contenido)
+                # Texto a la izquierda, números centrados
+                item.setTextAlignment(Qt.AlignCenter if not isinstance(valor, str) else Qt.AlignLeft | Qt.AlignVCenter)
+                item.setForeground(color_texto)
+                tabla.setItem(row, col, item)
+        tabla.resizeColumnsToContents()
+
     def mostrar_error(self, error_msg):
         self.progress_bar.setVisible(False)
         self.btn_cargar.setEnabled(True)
@@ -0,0 +1,133 @@
+# Caché en disco de archivos ya leídos y normalizados (formato Feather)
+
+import os
+import hashlib
+import pandas as pd
+from src.utils.logger_setup import log
+from src.utils.compresion import ruta_fisica
+
+# Carpeta de la caché (en la raíz del proyecto, junto a 'logs')
+CARPETA_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'cache', 'lecturas')
+
+# Tamaño máximo de la caché; al superarlo se eliminan las entradas usadas hace más tiempo (LRU)
+TAMANO_MAXIMO_CACHE = 4 * 1024 * 1024 * 1024 # 4 GB
+
+# Huella de contenido: bloques leídos al inicio, a la mitad y al final del archivo
+TAMANO_MUESTRA = 1024 * 1024 # 1 MB
+
+EXTENSION = '.feather'
+
+try:
+    import pyarrow  # noqa: F401
+    _cache_habilitada = True
+except ImportError:
+    # Feather requiere pyarrow; sin él la caché queda desactivada
+    _cache_habilitada = False
+
+def establecer_cache_habilitada(habilitada):
+    """Activa o desactiva la caché de lectura para toda la aplicación."""
+    global _cache_habilitada
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        habilitada = False
+    _cache_habilitada = bool(habilitada)
+    log.info(f"Caché de lectura {'activada' if _cache_habilitada else 'desactivada'}.")
+
+def cache_habilitada():
+    """Indica si la caché de lectura está activa."""
+    return _cache_habilitada
+
+def huella_archivo(file_path):
+    """
+    Huella rápida del archivo: ruta, tamaño, fecha de modificación y un hash de
+    bloques del inicio, la mitad y el final (no se lee el archivo completo).
+    En archivos comprimidos se usan los bytes comprimidos; la ruta incluye el miembro del zip.
+    """
+    ruta = ruta_fisica(file_path)
+    info = os.stat(ruta)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{os.path.abspath(file_path)}|{info.st_size}|{info.st_mtime_ns}".encode('utf-8'))
+    with open(ruta, 'rb') as f:
+        for posicion in sorted({0, max(0, info.st_size // 2 - TAMANO_MUESTRA // 2), max(0, info.st_size - TAMANO_MUESTRA)}):
+            f.seek(posicion)
+            h.update(f.read(TAMANO_MUESTRA))
+    return h.hexdigest()
+
+def clave_cache(file_path, firma):
+    """
+    Clave de la entrada: huella del archivo más la firma de la lectura
+    (columnas, tipos y alias), porque cada reporte normaliza distinto el mismo archivo.
+    Retorna None si la caché está desactivada.
+    """
+    if not _cache_habilitada:
+        return None
+    h = hashlib.blake2b(digest_size=20)
+    h.update(huella_archivo(file_path).encode('utf-8'))
+    h.update(repr(firma).encode('utf-8'))
+    return h.hexdigest()
+
+def leer_de_cache(clave):
+    """Retorna el DataFrame guardado con esa clave, o None si no existe."""
+    if clave is None:
+        return None
+    ruta = os.path.join(CARPETA_CACHE, clave + EXTENSION)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        df = pd.read_feather(ruta)
+        os.utime(ruta) # Marcar como usada recientemente (LRU)
+        return df
+    except Exception as e:
+        log.warning(f"Entrada de caché ilegible, se descarta ({e}).")
+        _eliminar(ruta)
+        return None
+
+def guardar_en_cache(clave, df):
+    """Guarda el DataFrame en la caché y aplica el límite de tamaño."""
+    if clave is None:
+        return
+    os.makedirs(CARPETA_CACHE, exist_ok=True)
+    ruta = os.path.join(CARPETA_CACHE, clave + EXTENSION)
+    # Escribir a un temporal y renombrar: otro proceso nunca ve una entrada a medias
+    ruta_temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        df.to_feather(ruta_temporal)
+        os.replace(ruta_temporal, ruta)
+    except Exception as e:
+        # Columnas de tipo mixto, por ejemplo, no se pueden guardar en Feather
+        log.debug(f"No se pudo guardar la lectura en caché ({e}).")
+        _eliminar(ruta_temporal)
+        return
+    aplicar_limite_cache()
+
+def aplicar_limite_cache(tamano_maximo=TAMANO_MAXIMO_CACHE):
+    """Elimina las entradas usadas hace más tiempo hasta quedar bajo el tamaño máximo."""
+    if not os.path.isdir(CARPETA_CACHE):
+        return
+    entradas = []
+    for nombre in os.listdir(CARPETA_CACHE):
+        if nombre.endswith(EXTENSION):
+            info = os.stat(os.path.join(CARPETA_CACHE, nombre))
+            entradas.append((info.st_mtime, info.st_size, nombre))
+    total = sum(tamano for _, tamano, _ in entradas)
+    for _, tamano, nombre in sorted(entradas):
+        if total <= tamano_maximo:
+            break
+        _eliminar(os.path.join(CARPETA_CACHE, nombre))
+        total -= tamano
+        log.debug(f"Entrada de caché eliminada por límite de tamaño: {nombre}")
+
+def vaciar_cache():
+    """Elimina todas las entradas de la caché."""
+    if not os.path.isdir(CARPETA_CACHE):
+        return
+    for nombre in os.listdir(CARPETA_CACHE):
+        _eliminar(os.path.join(CARPETA_CACHE, nombre))
+    log.info("Caché de lectura vaciada.")
+
+def _eliminar(ruta):
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
\ No newline at end of file
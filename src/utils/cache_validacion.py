@@ -0,0 +1,124 @@
+# Caché de mensajes ya validados (hashes de 64 bits), en memoria y en disco
+
+import os
+import hashlib
+import numpy as np
+from src.utils.logger_setup import log
+from src.utils.cache_lectura import CARPETA_CACHE, cache_habilitada
+
+# Junto a la caché de lectura ('cache/validacion')
+CARPETA_CACHE_VALIDACION = os.path.join(os.path.dirname(CARPETA_CACHE), 'validacion')
+
+# Máximo de mensajes recordados por lista de caracteres permitidos (LRU)
+MAX_MENSAJES_CACHE = 200_000
+
+# firma de la lista de caracteres -> {'hashes': uint64 ordenados, 'uso': último uso de cada hash}
+_caches = {}
+_reloj = 0 # Contador de usos (el más bajo es el usado hace más tiempo)
+
+def firma_caracteres(caracteres_permitidos):
+    """Firma de la lista de caracteres permitidos: un cambio en la lista invalida la caché"""
+    return hashlib.blake2b(''.join(sorted(set(caracteres_permitidos))).encode('utf-8'), digest_size=12).hexdigest()
+
+def _ruta_cache(firma):
+    return os.path.join(CARPETA_CACHE_VALIDACION, f"{firma}.npz")
+
+def _siguiente_uso():
+    global _reloj
+    _reloj += 1
+    return _reloj
+
+def _cargar_de_disco(ruta, antes_de=1):
+    """
+    Lee la caché guardada en `ruta` (None si no existe o no se puede leer). Sus usos
+    se desplazan para quedar antes de `antes_de`: lo usado en esta ejecución es más reciente.
+    """
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with np.load(ruta) as datos:
+            cache = {'hashes': datos['hashes'], 'uso': datos['uso']}
+    except Exception as e:
+        log.warning(f"Caché de validación ilegible, se descarta ({e}).")
+        return None
+    if len(cache['uso']):
+        cache['uso'] = cache['uso'] - cache['uso'].max() + (antes_de - 1)
+    return cache
+
+def _limitar(hashes, uso):
+    """Aplica el límite LRU (conserva los usados más recientemente) y ordena por hash"""
+    if len(hashes) > MAX_MENSAJES_CACHE:
+        recientes = np.argpartition(uso, len(uso) - MAX_MENSAJES_CACHE)[len(uso) - MAX_MENSAJES_CACHE:]
+        hashes, uso = hashes[recientes], uso[recientes]
+    orden = np.argsort(hashes)
+    return {'hashes': hashes[orden], 'uso': uso[orden]}
+
+def _obtener_cache(caracteres_permitidos):
+    """Caché en memoria de la lista de caracteres; la primera vez se carga del disco."""
+    firma = firma_caracteres(caracteres_permitidos)
+    if firma not in _caches:
+        cache = _cargar_de_disco(_ruta_cache(firma)) if cache_habilitada() else None
+        if cache is None:
+            cache = {'hashes': np.empty(0, dtype=np.uint64), 'uso': np.empty(0, dtype=np.int64)}
+        else:
+            log.debug(f"Caché de validación cargada: {len(cache['hashes'])} mensajes conocidos.")
+        _caches[firma] = cache
+    return firma, _caches[firma]
+
+def _combinar_con_disco(ruta, cache):
+    """
+    Agrega a la caché los hashes que otro proceso guardó en disco desde que se cargó
+    (en modo paralelo cada proceso del pool tiene su propia copia en memoria); los
+    usos de esta ejecución se conservan y los que solo están en disco quedan antes.
+    """
+    en_disco = _cargar_de_disco(ruta, antes_de=cache['uso'].min(initial=1))
+    if en_disco is None:
+        return cache
+    solo_en_disco = ~np.isin(en_disco['hashes'], cache['hashes'], assume_unique=True)
+    if not solo_en_disco.any():
+        return cache
+    return _limitar(np.concatenate([cache['hashes'], en_disco['hashes'][solo_en_disco]]),
+                    np.concatenate([cache['uso'], en_disco['uso'][solo_en_disco]]))
+
+def mensajes_validos_conocidos(hashes, caracteres_permitidos):
+    """Máscara de los hashes que ya se validaron antes con esta lista de caracteres"""
+    _, cache = _obtener_cache(caracteres_permitidos)
+    if len(cache['hashes']) == 0:
+        return np.zeros(len(hashes), dtype=bool)
+    posiciones = np.minimum(np.searchsorted(cache['hashes'], hashes), len(cache['hashes']) - 1)
+    conocidos = cache['hashes'][posiciones] == hashes
+    cache['uso'][posiciones[conocidos]] = _siguiente_uso() # Marcar como usados recientemente
+    return conocidos
+
+def registrar_mensajes_validos(hashes, caracteres_permitidos):
+    """Agrega hashes de mensajes válidos, aplica el límite LRU y guarda la caché en disco"""
+    firma, cache = _obtener_cache(caracteres_permitidos)
+    nuevos = np.setdiff1d(hashes, cache['hashes']) # Ordenados y sin repetidos
+    if len(nuevos) == 0:
+        return
+    cache.update(_limitar(np.concatenate([cache['hashes'], nuevos]),
+                          np.concatenate([cache['uso'], np.full(len(nuevos), _siguiente_uso(), dtype=np.int64)])))
+    if not cache_habilitada():
+        return
+    # Combinar con lo que otros procesos guardaron, escribir a un temporal y renombrar:
+    # otro proceso nunca ve un archivo a medias ni se pierden sus mensajes
+    ruta = _ruta_cache(firma)
+    cache.update(_combinar_con_disco(ruta, cache))
+    ruta_temporal = f"{ruta}.{os.getpid()}.tmp.npz"
+    try:
+        os.makedirs(CARPETA_CACHE_VALIDACION, exist_ok=True)
+        np.savez(ruta_temporal, hashes=cache['hashes'], uso=cache['uso'])
+        os.replace(ruta_temporal, ruta)
+    except OSError as e:
+        log.debug(f"No se pudo guardar la caché de validación ({e}).")
+
+def vaciar_cache_validacion():
+    """Elimina la caché de validación en memoria y en disco."""
+    _caches.clear()
+    if os.path.isdir(CARPETA_CACHE_VALIDACION):
+        for nombre in os.listdir(CARPETA_CACHE_VALIDACION):
+            try:
+                os.remove(os.path.join(CARPETA_CACHE_VALIDACION, nombre))
+            except OSError:
+                pass
+    log.info("Caché de validación vaciada.")
\ No newline at end of file
@@ -0,0 +1,87 @@
+# Entradas comprimidas: gzip, bz2, xz y zip (con uno o varios archivos dentro)
+
+import os
+import gzip
+import bz2
+import lzma
+import zipfile
+from contextlib import nullcontext
+from src.utils.logger_setup import log
+
+# Un archivo dentro de un zip se identifica como 'ruta/al/archivo.zip::miembro.csv'
+SEPARADOR_MIEMBRO = '::'
+
+# Filtro de QFileDialog para las pestañas que cargan CSV
+FILTRO_ARCHIVOS_DATOS = ('Archivos CSV (*.csv *.txt *.gz *.bz2 *.xz *.zip);;'
+                         'Archivos comprimidos (*.gz *.bz2 *.xz *.zip);;Todos los archivos (*)')
+
+_ABRIR_COMPRIMIDO = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+
+def dividir_ruta(file_path):
+    """Separa una ruta en (archivo en disco, miembro del zip o None)"""
+    ruta, separador, miembro = str(file_path).partition(SEPARADOR_MIEMBRO)
+    return ruta, (miembro if separador else None)
+
+def ruta_fisica(file_path):
+    """Archivo en disco al que corresponde la ruta (el zip, si es un miembro)"""
+    return dividir_ruta(file_path)[0]
+
+def _miembros_zip(archivo_zip):
+    """Archivos de datos dentro del zip (sin carpetas ni metadatos de macOS)"""
+    return [info.filename for info in archivo_zip.infolist()
+            if not info.is_dir() and not info.filename.startswith('__MACOSX/')]
+
+def expandir_archivos(file_paths):
+    """
+    Reemplaza cada .zip por una ruta por cada archivo que contiene, para que cada
+    miembro se procese como un archivo más. Solo se lee el índice del zip.
+    Un zip dañado se deja tal cual; su error se reporta al leerlo.
+    """
+    expandidos = []
+    for file_path in file_paths:
+        if dividir_ruta(file_path)[1] is None and file_path.lower().endswith('.zip'):
+            try:
+                with zipfile.ZipFile(file_path) as archivo_zip:
+                    miembros = _miembros_zip(archivo_zip)
+                log.info(f"{os.path.basename(file_path)}: {len(miembros)} archivo(s) dentro del zip.")
+                expandidos.extend(f"{file_path}{SEPARADOR_MIEMBRO}{miembro}" for miembro in miembros)
+                continue
+            except (zipfile.BadZipFile, OSError) as e:
+                log.warning(f"No se pudo leer el índice de {os.path.basename(file_path)} ({e}).")
+        expandidos.append(file_path)
+    return expandidos
+
+def abrir_binario(file_path):
+    """
+    Abre el archivo en modo binario descomprimiendo al vuelo según su extensión
+    (sin archivos temporales). Acepta rutas a miembros de un zip.
+    """
+    ruta, miembro = dividir_ruta(file_path)
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in _ABRIR_COMPRIMIDO:
+        return _ABRIR_COMPRIMIDO[extension](ruta, 'rb')
+    if extension != '.zip':
+        return open(ruta, 'rb')
+
+    # El miembro abierto mantiene el zip abierto hasta que se cierra
+    with zipfile.ZipFile(ruta) as archivo_zip:
+        if miembro is None:
+            miembros = _miembros_zip(archivo_zip)
+            if len(miembros) != 1:
+                raise ValueError(f"El zip contiene {len(miembros)} archivos; agréguelo de nuevo para procesarlos por separado")
+            miembro = miembros[0]
+        return archivo_zip.open(miembro)
+
+def abrir_origen(file_path):
+    """
+    Origen para pd.read_csv: la ruta tal cual (pandas descomprime gzip, bz2, xz y
+    zip de un solo archivo según la extensión) o, para miembros de un zip, el
+    archivo ya abierto. Se usa como context manager.
+    """
+    if dividir_ruta(file_path)[1] is None:
+        return nullcontext(file_path)
+    return abrir_binario(file_path)
\ No newline at end of file
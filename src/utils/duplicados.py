@@ -0,0 +1,68 @@
+# Detección de registros duplicados entre archivos con claves enteras (sin conjuntos de textos)
+
+import numpy as np
+import pandas as pd
+
+# Qué hacer con los registros repetidos (misma clave)
+POLITICAS_DUPLICADOS = {
+    'conservar_primero': 'Conservar el primero',
+    'conservar_ultimo': 'Conservar el último',
+    'rechazar': 'Rechazar todos',
+}
+
+def claves_enteras(series):
+    """
+    Convierte los valores de la clave de varias Series a enteros de 64 bits y retorna
+    (claves, máscara de filas con valor), concatenadas en el orden recibido.
+    Las claves numéricas (p. ej. teléfonos ya normalizados) se usan tal cual; si alguna
+    Series trae texto, todas se pasan a texto para que '1000' y 1000 sean la misma clave
+    aunque la inferencia de tipos varíe entre archivos, y cada texto se reemplaza por un
+    código entero (pd.factorize sobre todas juntas), así no se guardan conjuntos de textos.
+    """
+    con_valor = np.concatenate([serie.notna().to_numpy() for serie in series])
+    if all(pd.api.types.is_integer_dtype(serie.dtype) for serie in series):
+        return np.concatenate([serie.to_numpy(dtype=np.int64, na_value=0) for serie in series]), con_valor
+    textos = []
+    for serie in series:
+        if pd.api.types.is_float_dtype(serie.dtype):
+            serie = serie.round().astype('Int64') # Sin el '.0' de las columnas numéricas con vacíos
+        textos.append(serie.astype(str))
+    codigos, _ = pd.factorize(pd.concat(textos, ignore_index=True))
+    return codigos.astype(np.int64, copy=False), con_valor
+
+# Política -> parámetro `keep` de pandas.Series.duplicated
+_CONSERVAR = {'conservar_primero': 'first', 'conservar_ultimo': 'last', 'rechazar': False}
+
+def marcar_duplicados(claves, politica):
+    """
+    Máscara de las posiciones a quitar según la política. `claves` (enteros) debe venir
+    en el orden de llegada de los registros (el primero es el de menor posición).
+    Usa la tabla hash de pandas sobre los enteros: una pasada, sin ordenar.
+    """
+    return pd.Series(claves, copy=False).duplicated(keep=_CONSERVAR[politica]).to_numpy()
+
+def duplicados_en_particiones(particiones, clave, politica):
+    """
+    Busca duplicados de `clave` entre varios DataFrames (por ejemplo, las particiones
+    de una campaña que vienen de distintos archivos). `particiones` es una lista de
+    (número de archivo, DataFrame) y el orden de llegada es por archivo y luego por
+    fila (índice del DataFrame). Retorna una máscara de filas a quitar por DataFrame.
+    Los registros sin valor en la clave nunca se marcan.
+    """
+    if not particiones:
+        return []
+    claves, con_valor = claves_enteras([df[clave] for _, df in particiones])
+    largos = [len(df) for _, df in particiones]
+    archivos = np.repeat(np.array([archivo for archivo, _ in particiones], dtype=np.int64), largos)
+    filas = np.concatenate([df.index.to_numpy(dtype=np.int64) for _, df in particiones])
+
+    # Orden de llegada (archivo, fila); por campaña las particiones ya vienen en ese orden
+    llegada = (archivos << 40) | filas
+    if np.all(llegada[1:] >= llegada[:-1]):
+        orden = np.flatnonzero(con_valor)
+    else:
+        orden = np.argsort(llegada, kind='stable')
+        orden = orden[con_valor[orden]] # Solo las filas con clave
+    quitar = np.zeros(len(claves), dtype=bool)
+    quitar[orden] = marcar_duplicados(claves[orden], politica)
+    return np.split(quitar, np.cumsum(largos)[:-1])
\ No newline at end of file
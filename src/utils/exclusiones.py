@@ -0,0 +1,141 @@
+# Lista de exclusión (opt-out): teléfonos que no deben recibir mensajes
+#
+# La lista se lee una sola vez y se guarda como arreglo int64 ordenado y sin
+# repetidos (.npy) en 'cache/exclusiones'; las siguientes cargas solo leen ese
+# arreglo. La pertenencia se revisa con una búsqueda binaria vectorizada.
+
+import os
+import numpy as np
+from src.utils.logger_setup import log
+from src.utils.cache_lectura import CARPETA_CACHE, huella_archivo
+from src.utils.file_handlers import inspeccionar_archivo, leer_csv, normalizar_nombre_columna, DTYPE_TEXTO
+from src.utils.telefonos import normalizar_telefonos, TELEFONO_INVALIDO
+from src.utils.compresion import ruta_fisica
+
+# Junto a la caché de lectura ('cache/exclusiones')
+CARPETA_CACHE_EXCLUSIONES = os.path.join(os.path.dirname(CARPETA_CACHE), 'exclusiones')
+
+# Columnas que se reconocen como teléfono si el archivo tiene encabezado;
+# sin encabezado se usa la primera columna
+COLUMNAS_TELEFONO = ('numtelefono', 'telefono', 'number')
+
+_archivo_exclusion = None # Ruta de la lista configurada (None = sin exclusiones)
+_listas = {} # huella del archivo -> arreglo int64 ordenado
+
+def establecer_archivo_exclusion(ruta):
+    """Configura la lista de exclusión para toda la aplicación (None o '' la desactiva)."""
+    global _archivo_exclusion
+    _archivo_exclusion = ruta or None
+    log.info(f"Lista de exclusión: {_archivo_exclusion or 'ninguna'}")
+
+def obtener_archivo_exclusion():
+    """Retorna la ruta de la lista de exclusión configurada, o None."""
+    return _archivo_exclusion
+
+def existe_lista_exclusion(ruta):
+    """Indica si el archivo de la lista existe (en archivos comprimidos, el archivo que la contiene)."""
+    return os.path.exists(ruta_fisica(ruta))
+
+def leer_numeros_exclusion(ruta):
+    """
+    Lee la lista desde el archivo (CSV o TXT, un teléfono por fila, comprimido o no)
+    y retorna los teléfonos normalizados a 10 dígitos como int64 ordenados y sin
+    repetidos. Las filas con teléfonos inválidos (p. ej. un encabezado) se descartan.
+    """
+    inspeccion = inspeccionar_archivo(ruta)
+    columnas = [normalizar_nombre_columna(c) for c in inspeccion['columnas']]
+    columna = next((columnas.index(c) for c in COLUMNAS_TELEFONO if c in columnas), None)
+    # Como texto: los prefijos con cero ('044...') no se pierden y ambos motores leen lo mismo
+    opciones = {'sep': inspeccion['separador'], 'encoding': inspeccion['encoding']}
+    if columna is None:
+        df = leer_csv(ruta, header=None, usecols=[0], dtype={0: DTYPE_TEXTO}, **opciones)
+    else:
+        nombre = inspeccion['columnas'][columna]
+        df = leer_csv(ruta, usecols=[nombre], dtype={nombre: DTYPE_TEXTO}, **opciones)
+    numeros = np.sort(normalizar_telefonos(df.iloc[:, 0]))
+    # Sin repetidos ni inválidos (ya ordenado, basta comparar con el anterior)
+    conservar = numeros != TELEFONO_INVALIDO
+    conservar[1:] &= numeros[1:] != numeros[:-1]
+    return numeros[conservar]
+
+def _ruta_cache(huella):
+    return os.path.join(CARPETA_CACHE_EXCLUSIONES, f"{huella}.npy")
+
+def _guardar_en_cache(ruta, numeros):
+    """Guarda el arreglo en disco; solo se conserva el de la lista más reciente."""
+    ruta_temporal = f"{ruta}.{os.getpid()}.tmp.npy"
+    try:
+        os.makedirs(CARPETA_CACHE_EXCLUSIONES, exist_ok=True)
+        # Escribir a un temporal y renombrar: otro proceso nunca ve un archivo a medias
+        np.save(ruta_temporal, numeros)
+        os.replace(ruta_temporal, ruta)
+    except OSError as e:
+        log.debug(f"No se pudo guardar la caché de la lista de exclusión ({e}).")
+        return
+    for nombre in os.listdir(CARPETA_CACHE_EXCLUSIONES):
+        if nombre != os.path.basename(ruta) and nombre.endswith('.npy'):
+            try:
+                os.remove(os.path.join(CARPETA_CACHE_EXCLUSIONES, nombre))
+            except OSError:
+                pass
+
+def cargar_lista_exclusion(ruta=None, huella=None):
+    """
+    Retorna el arreglo int64 ordenado de la lista de exclusión (por defecto, la
+    configurada), o None si no hay lista. Se busca en memoria, luego en la caché
+    en disco y solo si el archivo cambió se vuelve a leer.
+    `huella` es la de huella_archivo(ruta) si ya se calculó (p. ej. la del hilo
+    principal, en los procesos del pool): así el archivo no se vuelve a revisar.
+    """
+    ruta = ruta or _archivo_exclusion
+    if ruta is None:
+        return None
+    if huella is None:
+        if not existe_lista_exclusion(ruta):
+            raise FileNotFoundError(f"No se encontró la lista de exclusión: {ruta}")
+        huella = huella_archivo(ruta)
+    if huella in _listas:
+        return _listas[huella]
+    ruta_cache = _ruta_cache(huella)
+    numeros = None
+    if os.path.exists(ruta_cache):
+        try:
+            numeros = np.load(ruta_cache)
+            log.debug(f"Lista de exclusión cargada de caché: {len(numeros)} teléfonos.") # <--- LOG Caché Exclusión
+        except Exception as e:
+            log.warning(f"Caché de la lista de exclusión ilegible, se descarta ({e}).")
+    if numeros is None:
+        numeros = leer_numeros_exclusion(ruta)
+        log.info(f"Lista de exclusión leída: {len(numeros)} teléfonos ({os.path.basename(ruta)}).") # <--- LOG Lectura Exclusión
+        _guardar_en_cache(ruta_cache, numeros)
+    _listas.clear() # Solo se mantiene en memoria la lista vigente
+    _listas[huella] = numeros
+    return numeros
+
+def telefonos_excluidos(numeros, lista):
+    """
+    Máscara de los teléfonos (int64 normalizados) que están en la lista: una sola
+    búsqueda binaria vectorizada sobre el arreglo ordenado. Los teléfonos se buscan
+    ya ordenados, así las búsquedas consecutivas recorren la lista en orden (con
+    millones de teléfonos es varias veces más rápido que buscarlos al azar).
+    """
+    numeros = np.asarray(numeros, dtype=np.int64)
+    excluidos = np.zeros(len(numeros), dtype=bool)
+    if lista is None or len(lista) == 0 or len(numeros) == 0:
+        return excluidos
+    orden = np.argsort(numeros)
+    ordenados = numeros[orden]
+    posiciones = np.minimum(np.searchsorted(lista, ordenados), len(lista) - 1)
+    excluidos[orden] = lista[posiciones] == ordenados
+    return excluidos
+
+def vaciar_cache_exclusiones():
+    """Elimina la lista de exclusión en memoria y su caché en disco (se vuelve a leer al usarla)."""
+    _listas.clear()
+    if os.path.isdir(CARPETA_CACHE_EXCLUSIONES):
+        for nombre in os.listdir(CARPETA_CACHE_EXCLUSIONES):
+            try:
+                os.remove(os.path.join(CARPETA_CACHE_EXCLUSIONES, nombre))
+            except OSError:
+                pass
+    log.info("Caché de la lista de exclusión vaciada.")
\ No newline at end of file
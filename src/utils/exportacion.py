@@ -0,0 +1,267 @@
+# Exportación de devoluciones por campaña: un archivo por campaña, separado por '|'
+
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+import numpy as np
+from src.utils.logger_setup import log
+from src.utils.file_handlers import crear_nombre_archivo_seguro, preparar_dataframe_exportacion
+from src.utils.paralelo import numero_procesos
+
+SEPARADOR_EXPORTACION = '|'
+EXTENSION_TEMPORAL = '.part'
+
+# Filas que se convierten a CSV a la vez (también es cada cuánto se informa el avance y se revisa si se canceló)
+FILAS_POR_LOTE_EXPORTACION = 200_000
+
+class ExportacionCancelada(Exception):
+    """La exportación se canceló; no quedó ningún archivo escrito."""
+
+def _eliminar(ruta):
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+def publicar(pendientes):
+    """
+    Renombra cada temporal a su nombre final ([(ruta temporal, ruta final)]). Si un
+    renombrado falla, se eliminan los archivos ya publicados y los temporales que
+    faltaban y se relanza el error: no queda un conjunto a medias.
+    """
+    publicados = []
+    try:
+        for ruta_temporal, ruta in pendientes:
+            os.replace(ruta_temporal, ruta)
+            publicados.append(ruta)
+    except OSError:
+        for ruta in publicados:
+            _eliminar(ruta)
+        for ruta_temporal, _ in pendientes[len(publicados):]:
+            _eliminar(ruta_temporal)
+        log.error(f"No se pudieron publicar los archivos exportados; se eliminaron {len(pendientes)}.") # <--- LOG Error Publicación
+        raise
+
+class EscritoresCampana:
+    """
+    Un escritor abierto por archivo de campaña al que se le agregan filas conforme
+    llegan (exportar mientras se procesa), con el formato de la exportación normal:
+    columnas clienteid|numtelefono|mensaje, encabezado una sola vez y UTF-8.
+    Se escribe a '<archivo>.part' y solo al cerrar se renombra al nombre final, así
+    una corrida con error nunca deja archivos a medias.
+    """
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        self._abiertos = {} # nombre de archivo -> {'archivo', 'ruta', 'filas'}
+
+    def nombre_archivo(self, campana):
+        return crear_nombre_archivo_seguro(campana) + '.csv'
+
+    def escribir(self, campana, df):
+        """Agrega las filas del DataFrame al archivo de la campaña (lo abre la primera vez)."""
+        if len(df) == 0:
+            return
+        df_exportar = preparar_dataframe_exportacion(df)
+        nombre = self.nombre_archivo(campana)
+        abierto = self._abiertos.get(nombre)
+        if abierto is None:
+            ruta = os.path.join(self.carpeta, nombre)
+            # newline='' igual que DataFrame.to_csv con una ruta (los saltos de línea los pone pandas)
+            abierto = {'archivo': open(ruta + EXTENSION_TEMPORAL, 'w', encoding='utf-8', newline=''),
+                       'ruta': ruta, 'filas': 0}
+            self._abiertos[nombre] = abierto
+        df_exportar.to_csv(abierto['archivo'], index=False, header=abierto['filas'] == 0, sep=SEPARADOR_EXPORTACION)
+        abierto['filas'] += len(df_exportar)
+
+    def punto_control(self):
+        """Posición actual de cada archivo, para deshacer lo escrito después (ver revertir)."""
+        return {nombre: (abierto['archivo'].tell(), abierto['filas']) for nombre, abierto in self._abiertos.items()}
+
+    def revertir(self, punto):
+        """Deshace lo escrito desde el punto de control (p. ej. un archivo que se omite por error de lectura)."""
+        for nombre in list(self._abiertos):
+            abierto = self._abiertos[nombre]
+            if nombre not in punto:
+                abierto['archivo'].close()
+                os.remove(abierto['ruta'] + EXTENSION_TEMPORAL)
+                del self._abiertos[nombre]
+                continue
+            posicion, filas = punto[nombre]
+            abierto['archivo'].seek(posicion)
+            abierto['archivo'].truncate()
+            abierto['filas'] = filas
+
+    def cerrar(self):
+        """Cierra los archivos y les pone su nombre final. Retorna {nombre de archivo: filas}."""
+        for abierto in self._abiertos.values():
+            abierto['archivo'].close()
+        abiertos, self._abiertos = self._abiertos, {}
+        publicar([(abierto['ruta'] + EXTENSION_TEMPORAL, abierto['ruta']) for abierto in abiertos.values()])
+        exportados = {nombre: abierto['filas'] for nombre, abierto in abiertos.items()}
+        log.info(f"Exportados {len(exportados)} archivos en {self.carpeta}.") # <--- LOG Exportación
+        return exportados
+
+    def descartar(self):
+        """Cierra y elimina los archivos temporales sin exportar nada (corrida con error)."""
+        for abierto in self._abiertos.values():
+            abierto['archivo'].close()
+            _eliminar(abierto['ruta'] + EXTENSION_TEMPORAL)
+        if self._abiertos:
+            log.info(f"Exportación descartada: {len(self._abiertos)} archivos temporales eliminados.") # <--- LOG Exportación descartada
+        self._abiertos.clear()
+
+def _fin_de_filas(cuerpo):
+    """
+    Posición (exclusiva) del final de cada fila en el CSV ya convertido a bytes.
+    Un salto de línea dentro de un campo entre comillas no termina la fila: solo
+    cuentan los que tienen un número par de comillas antes (las comillas escapadas
+    van en pares, así que no cambian la paridad).
+    """
+    datos = np.frombuffer(cuerpo, dtype=np.uint8)
+    saltos = np.flatnonzero(datos == ord('\n'))
+    comillas = datos == ord('"')
+    if comillas.any():
+        saltos = saltos[np.cumsum(comillas)[saltos] % 2 == 0]
+    return saltos + 1
+
+def nombre_fragmento(nombre_base, numero, total):
+    """
+    Nombre del fragmento `numero` (desde 1) de `total`: '<campaña>_001.csv', '<campaña>_002.csv', ...
+    Todos los de una campaña tienen el mismo ancho, así se ordenan bien por nombre.
+    """
+    return f"{nombre_base}_{numero:0{max(3, len(str(total)))}d}.csv"
+
+def escribir_fragmentos(nombre_base, dfs, carpeta, max_filas=None, max_bytes=None, progreso=None, cancelado=None):
+    """
+    Escribe los DataFrames de una campaña (en orden) en fragmentos de a lo más
+    `max_filas` filas y `max_bytes` bytes cada uno, encabezado incluido. Una fila
+    nunca se parte; si sola supera `max_bytes`, va en su propio fragmento.
+    Los fragmentos quedan como temporales '.part'; retorna [(ruta temporal, ruta final, filas)].
+    Si la campaña cabe en un solo fragmento (siempre, sin límites) conserva el nombre
+    normal ('<campaña>.csv').
+    `progreso(filas)` se llama tras cada lote escrito; si `cancelado()` retorna True se
+    eliminan los temporales y se lanza ExportacionCancelada.
+    """
+    fragmentos = [] # [ruta temporal, filas]
+    archivo = None
+    try:
+        for df in dfs:
+            df = preparar_dataframe_exportacion(df)
+            if len(df) == 0:
+                continue
+            encabezado = df.head(0).to_csv(index=False, sep=SEPARADOR_EXPORTACION).encode('utf-8')
+            for inicio in range(0, len(df), FILAS_POR_LOTE_EXPORTACION):
+                if cancelado is not None and cancelado():
+                    raise ExportacionCancelada()
+                cuerpo = df.iloc[inicio:inicio + FILAS_POR_LOTE_EXPORTACION].to_csv(
+                    index=False, header=False, sep=SEPARADOR_EXPORTACION).encode('utf-8')
+                fines = _fin_de_filas(cuerpo)
+                fila = 0
+                while fila < len(fines):
+                    if archivo is None:
+                        ruta = os.path.join(carpeta, f"{nombre_base}_{len(fragmentos) + 1}.csv{EXTENSION_TEMPORAL}")
+                        archivo = open(ruta, 'wb')
+                        archivo.write(encabezado)
+                        fragmentos.append([ruta, 0])
+                        tamano = len(encabezado)
+                    byte_inicio = int(fines[fila - 1]) if fila else 0
+                    # Filas que caben en el fragmento actual
+                    cabe = len(fines) - fila
+                    if max_filas:
+                        cabe = min(cabe, max_filas - fragmentos[-1][1])
+                    if max_bytes:
+                        cabe = min(cabe, int(np.searchsorted(fines, byte_inicio + max_bytes - tamano, side='right')) - fila)
+                        if cabe <= 0 and fragmentos[-1][1] == 0:
+                            cabe = 1 # Fila más grande que el límite
+                    if cabe <= 0:
+                        archivo.close()
+                        archivo = None
+                        continue
+                    byte_fin = int(fines[fila + cabe - 1])
+                    archivo.write(cuerpo[byte_inicio:byte_fin])
+                    tamano += byte_fin - byte_inicio
+                    fragmentos[-1][1] += cabe
+                    fila += cabe
+                if progreso is not None:
+                    progreso(len(fines))
+    except Exception:
+        if archivo is not None:
+            archivo.close()
+            archivo = None
+        for ruta, _ in fragmentos:
+            _eliminar(ruta)
+        raise
+    finally:
+        if archivo is not None:
+            archivo.close()
+    
+    # El nombre final se decide al terminar, cuando ya se sabe cuántos fragmentos hay
+    if len(fragmentos) == 1:
+        return [(fragmentos[0][0], os.path.join(carpeta, nombre_base + '.csv'), fragmentos[0][1])]
+    return [(ruta, os.path.join(carpeta, nombre_fragmento(nombre_base, numero, len(fragmentos))), filas)
+            for numero, (ruta, filas) in enumerate(fragmentos, start=1)]
+
+def exportar_campanas(dataframes, carpeta, max_filas=None, max_bytes=None, max_hilos=None, progreso=None, cancelar=None):
+    """
+    Exporta {campaña: DataFrame} a la carpeta, un archivo por campaña. Retorna {nombre de archivo: filas}.
+    Las campañas se escriben en paralelo en un pool de hilos; con `max_filas` y/o
+    `max_bytes` cada una se divide en fragmentos de ese tamaño como máximo (ver
+    escribir_fragmentos). Los archivos solo toman su nombre final si todas las campañas
+    se escribieron bien: ante un error, si se activa el evento `cancelar`
+    (threading.Event) o si falla un renombrado al final (ver publicar) no queda
+    ninguno. `progreso(filas)` recibe las filas escritas de cada lote (se llama desde
+    los hilos del pool).
+    Los fragmentos de una misma campaña se escriben uno tras otro en su hilo: cada uno
+    empieza en la fila donde terminó el anterior, que con `max_bytes` solo se conoce
+    al escribirlo. El paralelismo es entre campañas.
+    Si dos archivos terminarían con el mismo nombre (p. ej. el fragmento 'A_001.csv'
+    de la campaña 'A' y la campaña 'A_001') se lanza ValueError sin publicar ninguno.
+    """
+    # Campañas con el mismo nombre de archivo seguro van al mismo grupo de fragmentos
+    grupos = {}
+    for campana, df in dataframes.items():
+        grupos.setdefault(crear_nombre_archivo_seguro(campana), []).append(df)
+    
+    # Al primer error se detienen las demás campañas
+    detener = threading.Event()
+    def cancelado():
+        return detener.is_set() or (cancelar is not None and cancelar.is_set())
+    
+    escritos, error = [], None
+    with ThreadPoolExecutor(max_workers=numero_procesos(len(grupos), max_hilos)) as executor:
+        futuros = [executor.submit(escribir_fragmentos, nombre_base, dfs, carpeta, max_filas, max_bytes, progreso, cancelado)
+                   for nombre_base, dfs in grupos.items()]
+        if wait(futuros, return_when=FIRST_EXCEPTION).not_done:
+            detener.set()
+        for futuro in futuros:
+            try:
+                escritos.extend(futuro.result())
+            except ExportacionCancelada as e:
+                error = error or e
+            except Exception as e:
+                # Un error real tiene prioridad sobre las cancelaciones que provocó
+                error = e if error is None or isinstance(error, ExportacionCancelada) else error
+    if error is None and cancelado():
+        error = ExportacionCancelada()
+    if error is not None:
+        for ruta_temporal, _, _ in escritos:
+            _eliminar(ruta_temporal)
+        raise error
+    
+    # Los nombres finales se conocen hasta saber cuántos fragmentos tiene cada campaña
+    # (normcase: en Windows 'a.csv' y 'A.csv' son el mismo archivo)
+    conteo_nombres = Counter(os.path.normcase(ruta) for _, ruta, _ in escritos)
+    repetidos = sorted({os.path.basename(ruta) for _, ruta, _ in escritos if conteo_nombres[os.path.normcase(ruta)] > 1})
+    if repetidos:
+        for ruta_temporal, _, _ in escritos:
+            _eliminar(ruta_temporal)
+        log.error(f"Exportación cancelada: nombres de archivo repetidos {repetidos}.") # <--- LOG Nombres repetidos
+        raise ValueError(f"Varias campañas generarían el mismo archivo: {', '.join(repetidos)}. "
+                         "Cambie el nombre de la campaña o el tamaño de los fragmentos.")
+    
+    publicar([(ruta_temporal, ruta) for ruta_temporal, ruta, _ in escritos])
+    exportados = {os.path.basename(ruta): filas for _, ruta, filas in escritos}
+    log.info(f"Exportados {len(exportados)} archivos ({len(grupos)} campañas) en {carpeta}.") # <--- LOG Exportación fragmentada
+    return exportados
\ No newline at end of file
@@ -1,27 +1,310 @@
 import pandas as pd
+import numpy as np
 import os
 import re
+import csv
+import codecs
+from src.utils.logger_setup import log
+from src.utils.cache_lectura import clave_cache, leer_de_cache, guardar_en_cache
+from src.utils.compresion import abrir_binario, abrir_origen
+from pandas._libs.parsers import STR_NA_VALUES # Valores que el parser C lee como vacíos
 
-def detectar_separador_archivo(file_path):
-    """Detecta el separador del archivo (coma o pipe)"""
+# Columnas (en minúsculas) que se escriben en los archivos de devoluciones exportados
+COLUMNAS_EXPORTACION = ['clienteid', 'numtelefono', 'mensaje']
+
+# Texto respaldado por Arrow si pyarrow está instalado (más compacto que objetos de Python)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_DISPONIBLE = True
+    DTYPE_TEXTO = 'string[pyarrow]'
+except ImportError:
+    PYARROW_DISPONIBLE = False
+    DTYPE_TEXTO = 'string'
+
+# Inspección de archivos: bytes leídos del inicio y líneas usadas para detectar el separador
+BYTES_INSPECCION = 64 * 1024
+LINEAS_INSPECCION = 5
+
+# Motor de lectura CSV usado por todos los hilos de procesamiento:
+# 'pyarrow' (multihilo) o 'c' (parser por defecto de pandas)
+MOTORES_CSV = ('pyarrow', 'c')
+_motor_csv = 'pyarrow' if PYARROW_DISPONIBLE else 'c'
+
+def establecer_motor_csv(motor):
+    """Selecciona el motor de lectura CSV para toda la aplicación."""
+    global _motor_csv
+    if motor not in MOTORES_CSV:
+        raise ValueError(f"Motor CSV no soportado: {motor}")
+    if motor == 'pyarrow' and not PYARROW_DISPONIBLE:
+        log.warning("pyarrow no está instalado; se usará el parser C de pandas.")
+        motor = 'c'
+    _motor_csv = motor
+    log.info(f"Motor de lectura CSV: {_motor_csv}")
+
+def obtener_motor_csv():
+    """Retorna el motor de lectura CSV activo."""
+    return _motor_csv
+
+def leer_csv(file_path, **kwargs):
+    """
+    Lee un CSV con el motor configurado. Si el motor pyarrow no soporta la entrada
+    o las opciones (p. ej. separadores de varios caracteres, lectura por bloques),
+    se usa el parser C de pandas.
+    Las columnas cuyo texto importa (identificadores, teléfonos, horas) deben pedirse
+    con un tipo de texto en `dtype`: los dos motores infieren distinto el tipo de las
+    demás columnas.
+    Los archivos comprimidos se descomprimen al vuelo; para leer por bloques un
+    miembro de un zip se debe usar abrir_origen directamente.
+    """
+    if _motor_csv == 'pyarrow' and 'chunksize' not in kwargs and 'nrows' not in kwargs:
+        # low_memory solo aplica al parser C
+        opciones = {clave: valor for clave, valor in kwargs.items() if clave != 'low_memory'}
+        try:
+            with abrir_origen(file_path) as origen:
+                return _leer_csv_pyarrow(origen, **opciones)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            log.warning(f"El motor pyarrow no pudo leer {os.path.basename(str(file_path))} ({e}). Se usa el parser C.")
+    with abrir_origen(file_path) as origen:
+        return pd.read_csv(origen, **kwargs)
+
+def _se_lee_como_texto(tipo):
+    """Tipos que se leen como texto (los categóricos también: sus categorías son el texto del archivo)."""
+    tipo = pd.api.types.pandas_dtype(tipo)
+    return isinstance(tipo, (pd.StringDtype, pd.CategoricalDtype)) or tipo == object
+
+def _leer_csv_pyarrow(origen, sep=',', encoding='utf-8', usecols=None, dtype=None, header='infer', **kwargs):
+    """
+    Lectura con pyarrow.csv con las mismas reglas que el parser C. A diferencia de
+    pd.read_csv(engine='pyarrow'), que deja a pyarrow inferir el tipo de todas las
+    columnas y solo después aplica `dtype` (para entonces '007' ya es 7.0, '10:00'
+    es una hora '10:00:00' y un id de 23 dígitos perdió precisión), las columnas con
+    tipo de texto o categórico se leen como texto desde el inicio.
+    Las opciones no soportadas lanzan ValueError (leer_csv usa entonces el parser C).
+    """
+    if kwargs:
+        raise ValueError(f"opciones no soportadas: {', '.join(sorted(kwargs))}")
+    if header not in ('infer', 0, None):
+        raise ValueError(f"encabezado no soportado: {header}")
+    sin_encabezado = header is None
+    dtype = dtype or {}
+    if not isinstance(dtype, dict) or (usecols is not None and
+                                       any(isinstance(c, int) != sin_encabezado for c in usecols)):
+        raise ValueError("tipos o columnas no soportados")
+    
+    nombre_arrow = (lambda c: f"f{c}") if sin_encabezado else (lambda c: c) # pyarrow nombra f0, f1... sin encabezado
+    opciones_conversion = pa_csv.ConvertOptions(
+        include_columns=[nombre_arrow(c) for c in usecols] if usecols is not None else None,
+        column_types={nombre_arrow(c): pa.string() for c, tipo in dtype.items() if _se_lee_como_texto(tipo)},
+        # Los mismos valores vacíos que el parser C ('', 'NA', 'NULL', 'nan'...)
+        null_values=sorted(STR_NA_VALUES), strings_can_be_null=True)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            primeras_lineas = [f.readline() for _ in range(5)]
-        
+        tabla = pa_csv.read_csv(origen, read_options=pa_csv.ReadOptions(encoding=encoding,
+                                                                        autogenerate_column_names=sin_encabezado),
+                                parse_options=pa_csv.ParseOptions(delimiter=sep),
+                                convert_options=opciones_conversion)
+    except pa.ArrowInvalid as e:
+        raise pd.errors.ParserError(e) from e
+    # Columnas sin ningún valor: float64, como en el parser C
+    tabla = tabla.cast(pa.schema([campo.with_type(pa.float64()) if pa.types.is_null(campo.type) else campo
+                                  for campo in tabla.schema]))
+    df = tabla.to_pandas()
+    if sin_encabezado:
+        df.columns = usecols if usecols is not None else range(df.shape[1])
+    tipos = {c: tipo for c, tipo in dtype.items() if c in df.columns}
+    return df.astype(tipos) if tipos else df
+
+def detectar_codificacion(muestra):
+    """Detecta la codificación a partir de los primeros bytes (UTF-8, UTF-8 con BOM o cp1252)"""
+    if muestra.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        muestra.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Un carácter multibyte cortado al final de la muestra no indica otra codificación
+        if e.start < len(muestra) - 3:
+            return 'cp1252'
+    return 'utf-8'
+
+def inspeccionar_archivo(file_path, separador=None):
+    """
+    Abre el archivo una sola vez y lee solo su inicio para detectar la codificación,
+    el separador (coma o pipe, salvo que se indique uno fijo) y el encabezado.
+    Retorna un dict {'separador', 'encoding', 'columnas'}; las columnas se devuelven
+    tal como vienen en el archivo. Los archivos comprimidos se inspeccionan sin
+    descomprimirlos completos.
+    """
+    with abrir_binario(file_path) as f:
+        muestra = f.read(BYTES_INSPECCION)
+    
+    encoding = detectar_codificacion(muestra)
+    primeras_lineas = muestra.decode(encoding, errors='ignore').splitlines()[:LINEAS_INSPECCION]
+    
+    if separador is None:
         conteo_pipes = sum(line.count('|') for line in primeras_lineas)
         conteo_comas = sum(line.count(',') for line in primeras_lineas)
-        
-        return '|' if conteo_pipes > conteo_comas else ','
+        separador = '|' if conteo_pipes > conteo_comas else ','
+    
+    columnas = next(csv.reader(primeras_lineas[:1], delimiter=separador), [])
+    return {'separador': separador, 'encoding': encoding, 'columnas': columnas}
+
+def detectar_separador_archivo(file_path):
+    """Detecta el separador del archivo (coma o pipe)"""
+    try:
+        return inspeccionar_archivo(file_path)['separador']
     except Exception as e:
         raise Exception(f"Error al detectar separador: {str(e)}")
 
 def leer_archivo_csv(file_path):
-    """Lee un archivo CSV detectando automáticamente el separador"""
-    separador = detectar_separador_archivo(file_path)
-    df = pd.read_csv(file_path, sep=separador, encoding='utf-8')
+    """Lee un archivo CSV detectando automáticamente el separador y la codificación"""
+    inspeccion = inspeccionar_archivo(file_path)
+    df = leer_csv(file_path, sep=inspeccion['separador'], encoding=inspeccion['encoding'])
     df.columns = df.columns.str.strip()
     return df
 
+def normalizar_nombre_columna(nombre):
+    """Normaliza un encabezado: sin espacios alrededor y en minúsculas"""
+    return str(nombre).strip().lower()
+
+def construir_plan_lectura(columnas_archivo, columnas_requeridas, dtypes=None, alias=None):
+    """
+    Arma el plan de lectura de un reporte a partir de su encabezado original.
+    Retorna un dict con:
+      - 'usecols': columnas originales a leer (solo las requeridas)
+      - 'dtype': tipos por columna original (según `dtypes`, en nombres normalizados)
+      - 'renombrar': columna original -> nombre normalizado (con alias aplicados)
+    Un alias (p. ej. 'clientid' -> 'clienteid') solo se aplica si el nombre
+    canónico no viene ya en el archivo.
+    """
+    dtypes = dtypes or {}
+    alias = alias or {}
+    requeridas = set(columnas_requeridas)
+    normalizadas = set(normalizar_nombre_columna(col) for col in columnas_archivo)
+    
+    plan = {'usecols': [], 'dtype': {}, 'renombrar': {}}
+    for original in columnas_archivo:
+        nombre = normalizar_nombre_columna(original)
+        if nombre in alias and alias[nombre] not in normalizadas:
+            nombre = alias[nombre]
+        # Columnas no requeridas o repetidas no se leen
+        if nombre not in requeridas or nombre in plan['renombrar'].values():
+            continue
+        plan['usecols'].append(original)
+        plan['renombrar'][original] = nombre
+        if nombre in dtypes:
+            plan['dtype'][original] = dtypes[nombre]
+    return plan
+
+def verificar_encabezados(file_paths, columnas_requeridas, alias=None, separador=None):
+    """
+    Preflight: inspecciona solo el encabezado de cada archivo y lo compara contra
+    las columnas requeridas antes de cualquier lectura completa.
+    Retorna (inspecciones, faltantes):
+      - inspecciones: {ruta: inspección} de los archivos inspeccionados
+      - faltantes: [(nombre_archivo, [columnas faltantes])] en el orden de file_paths
+    Los archivos que no se pueden abrir o están vacíos se omiten aquí; su error se
+    reporta al leerlos, como hasta ahora.
+    """
+    inspecciones = {}
+    faltantes = []
+    for file_path in file_paths:
+        file_name = os.path.basename(file_path)
+        try:
+            inspeccion = inspeccionar_archivo(file_path, separador)
+        except Exception as e:
+            log.warning(f"Preflight: no se pudo inspeccionar {file_name} ({e}).")
+            continue
+        if not inspeccion['columnas']:
+            continue
+        
+        inspecciones[file_path] = inspeccion
+        plan = construir_plan_lectura(inspeccion['columnas'], columnas_requeridas, alias=alias)
+        columnas_faltantes = set(columnas_requeridas) - set(plan['renombrar'].values())
+        if columnas_faltantes:
+            faltantes.append((file_name, sorted(columnas_faltantes)))
+    return inspecciones, faltantes
+
+def mensaje_columnas_faltantes(faltantes):
+    """Mensaje para la UI con los archivos rechazados por el preflight"""
+    return "\n".join(
+        f"El archivo {file_name} no tiene la estructura requerida (faltan: {', '.join(columnas)})"
+        for file_name, columnas in faltantes
+    )
+
+def leer_csv_con_plan(file_path, columnas_requeridas, dtypes=None, alias=None, inspeccion=None, separador=None, **kwargs):
+    """
+    Lee solo las columnas requeridas de un CSV con tipos explícitos y devuelve
+    el DataFrame con los encabezados ya normalizados y los alias aplicados.
+    `inspeccion` es el resultado de inspeccionar_archivo (p. ej. del preflight);
+    si no se indica, el archivo se inspecciona aquí.
+    Si el mismo archivo ya se leyó con el mismo plan, se toma de la caché de lectura.
+    """
+    file_name = os.path.basename(file_path)
+    if inspeccion is None:
+        inspeccion = inspeccionar_archivo(file_path, separador)
+    encabezado = inspeccion['columnas']
+    plan = construir_plan_lectura(encabezado, columnas_requeridas, dtypes, alias)
+    
+    opciones = {'dtype': plan['dtype'], 'low_memory': False}
+    opciones.update(kwargs)
+    
+    # La firma incluye todo lo que cambia el DataFrame resultante
+    firma = (inspeccion['separador'], inspeccion['encoding'], sorted(plan['renombrar'].items()),
+             sorted((col, str(tipo)) for col, tipo in plan['dtype'].items()),
+             sorted((clave, repr(valor)) for clave, valor in kwargs.items()), _motor_csv)
+    clave = clave_cache(file_path, firma)
+    df = leer_de_cache(clave)
+    if df is not None:
+        log.debug(f"Lectura de {file_name} tomada de la caché.")
+        return df
+    
+    df = leer_csv(file_path, sep=inspeccion['separador'], encoding=inspeccion['encoding'],
+                  usecols=plan['usecols'], **opciones)
+    
+    df.rename(columns=plan['renombrar'], inplace=True)
+    renombradas = {orig: nuevo for orig, nuevo in plan['renombrar'].items() if orig != nuevo}
+    if renombradas:
+        log.debug(f"Columnas normalizadas en {file_name}: {renombradas}")
+    log.debug(f"Plan de lectura para {file_name}: {len(plan['usecols'])} de {len(encabezado)} columnas leídas.")
+    guardar_en_cache(clave, df)
+    return df
+
+def convertir_entero_compacto(serie, valor_invalido=0):
+    """
+    Convierte una columna a entero usando el tipo entero más pequeño posible.
+    Los valores no numéricos o vacíos se reemplazan por `valor_invalido`.
+    Si la columna es categórica, la conversión se hace sobre sus categorías
+    (pocas) y no sobre cada fila.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        valores = pd.to_numeric(pd.Series(serie.cat.categories), errors='coerce').to_numpy(dtype=float)
+        codigos = serie.cat.codes.to_numpy()
+        numeros = np.full(len(codigos), np.nan)
+        validos = codigos >= 0
+        numeros[validos] = valores[codigos[validos]]
+        serie = pd.Series(numeros, index=serie.index, name=serie.name)
+    else:
+        serie = pd.to_numeric(serie, errors='coerce')
+    return pd.to_numeric(serie.fillna(valor_invalido).astype('int64'), downcast='integer')
+
+def normalizar_texto_categoria(serie):
+    """
+    Pasa una columna a minúsculas y sin espacios alrededor. Si es categórica,
+    la normalización se aplica a las categorías y el resultado sigue siendo categórico.
+    """
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.astype(str).str.lower().str.strip()
+    categorias = serie.cat.categories.astype(str).str.lower().str.strip()
+    if len(categorias) == 0:
+        return serie
+    # Categorías que quedan iguales tras normalizar ('SMS' y 'sms ') se fusionan
+    codigos_nuevos, unicas = pd.factorize(categorias)
+    codigos = serie.cat.codes.to_numpy()
+    mapeados = np.where(codigos >= 0, codigos_nuevos[np.maximum(codigos, 0)], -1)
+    return pd.Series(pd.Categorical.from_codes(mapeados, categories=unicas), index=serie.index, name=serie.name)
+
 def crear_nombre_archivo_seguro(nombre):
     """Crea un nombre de archivo seguro eliminando caracteres problemáticos"""
     nombre_seguro = re.sub(r'[<>:"/\\|?*]', '_', str(nombre))
@@ -29,12 +312,13 @@ def crear_nombre_archivo_seguro(nombre):
 
 def preparar_dataframe_exportacion(df):
     """Prepara el DataFrame con solo las columnas requeridas para exportación"""
-    columnas_requeridas = ['clienteid', 'numtelefono', 'mensaje']
     columnas_disponibles = {col.lower(): col for col in df.columns}
     columnas_exportar = []
     
-    for col in columnas_requeridas:
+    for col in COLUMNAS_EXPORTACION:
         if col in columnas_disponibles:
             columnas_exportar.append(columnas_disponibles[col])
     
+    if columnas_exportar and list(df.columns) == columnas_exportar:
+        return df # Ya tiene solo las columnas de exportación (p. ej. bloques del modo streaming)
     return df[columnas_exportar] if columnas_exportar else pd.DataFrame()
\ No newline at end of file
@@ -0,0 +1,128 @@
+# Índice compacto de errores de validación (validación completa)
+
+import numpy as np
+import pandas as pd
+from src.utils.logger_setup import log
+from src.utils.file_handlers import PYARROW_DISPONIBLE
+
+if PYARROW_DISPONIBLE:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+class IndiceErrores:
+    """
+    Guarda cada carácter no permitido como una entrada en arreglos numpy paralelos
+    (fila, posición, código Unicode, archivo y columna como códigos), sin crear un
+    objeto ni un texto por error. Los archivos y columnas se guardan una sola vez
+    en listas de nombres.
+    """
+
+    def __init__(self):
+        self.archivos = [] # código -> nombre de archivo
+        self.columnas = [] # código -> nombre de columna
+        self._bloques = [] # (filas, posiciones, codigos, archivo, columna) por agregar
+        self._arreglos = None # Arreglos consolidados (se recalculan al agregar)
+
+    def __len__(self):
+        return sum(len(bloque[0]) for bloque in self._bloques)
+
+    def _codigo(self, nombres, nombre):
+        if nombre not in nombres:
+            nombres.append(nombre)
+        return nombres.index(nombre)
+
+    def agregar(self, archivo, columna, filas, posiciones, codigos):
+        """Agrega los errores de una columna de un archivo (arreglos de igual largo)"""
+        if len(filas) == 0:
+            return
+        self._bloques.append((np.asarray(filas, dtype=np.int64), np.asarray(posiciones, dtype=np.int32),
+                              np.asarray(codigos, dtype=np.uint32),
+                              self._codigo(self.archivos, archivo), self._codigo(self.columnas, columna)))
+        self._arreglos = None
+
+    def unir(self, otro):
+        """Agrega los errores de otro índice (p. ej. el de otro archivo o proceso)"""
+        if otro is None:
+            return
+        for filas, posiciones, codigos, archivo, columna in otro._bloques:
+            self.agregar(otro.archivos[archivo], otro.columnas[columna], filas, posiciones, codigos)
+
+    def arreglos(self):
+        """Retorna {'fila', 'posicion', 'codigo', 'archivo', 'columna'} con todos los errores"""
+        if self._arreglos is None:
+            if self._bloques:
+                filas, posiciones, codigos, archivos, columnas = zip(*self._bloques)
+                largos = [len(f) for f in filas]
+                self._arreglos = {
+                    'fila': np.concatenate(filas),
+                    'posicion': np.concatenate(posiciones),
+                    'codigo': np.concatenate(codigos),
+                    'archivo': np.repeat(np.array(archivos, dtype=np.int32), largos),
+                    'columna': np.repeat(np.array(columnas, dtype=np.int16), largos),
+                }
+            else:
+                self._arreglos = {
+                    'fila': np.empty(0, dtype=np.int64), 'posicion': np.empty(0, dtype=np.int32),
+                    'codigo': np.empty(0, dtype=np.uint32), 'archivo': np.empty(0, dtype=np.int32),
+                    'columna': np.empty(0, dtype=np.int16),
+                }
+        return self._arreglos
+
+    def conteo_por_archivo(self):
+        """DataFrame con errores y filas con error por archivo"""
+        datos = self.arreglos()
+        errores = np.bincount(datos['archivo'], minlength=len(self.archivos))
+        # Filas distintas por archivo: pares (archivo, fila) únicos en una sola clave int64
+        pares = np.unique((datos['archivo'].astype(np.int64) << 40) | datos['fila'])
+        filas = np.bincount(pares >> 40, minlength=len(self.archivos))
+        return pd.DataFrame({'Archivo': self.archivos, 'Errores': errores, 'Filas con error': filas})
+
+    def conteo_por_caracter(self):
+        """DataFrame con errores por carácter no permitido, del más frecuente al menos"""
+        conteos = np.bincount(self.arreglos()['codigo'])
+        codigos = np.flatnonzero(conteos)
+        conteos = conteos[codigos]
+        orden = np.argsort(-conteos, kind='stable')
+        codigos, conteos = codigos[orden], conteos[orden]
+        return pd.DataFrame({
+            'Carácter': [chr(c) for c in codigos.tolist()],
+            'Código': [f"U+{c:04X}" for c in codigos.tolist()],
+            'Errores': conteos,
+        })
+
+    def a_dataframe(self):
+        """
+        Lista completa de errores. Archivo y columna son categóricas (no se repite
+        el texto por error); la fila es la del archivo contando el encabezado.
+        """
+        datos = self.arreglos()
+        codigos_unicos, inversos = np.unique(datos['codigo'], return_inverse=True)
+        return pd.DataFrame({
+            'Archivo': pd.Categorical.from_codes(datos['archivo'], categories=self.archivos),
+            'Fila': datos['fila'] + 2, # +1 por el encabezado, +1 porque la numeración empieza en 1
+            'Columna': pd.Categorical.from_codes(datos['columna'], categories=self.columnas),
+            'Posición': datos['posicion'], # Igual que en el detalle de errores (desde 0)
+            'Carácter': pd.Categorical.from_codes(inversos.reshape(-1), categories=[chr(c) for c in codigos_unicos.tolist()]),
+            'Código': pd.Categorical.from_codes(inversos.reshape(-1), categories=[f"U+{c:04X}" for c in codigos_unicos.tolist()]),
+        })
+
+    def exportar_csv(self, ruta):
+        """
+        Exporta la lista completa de errores a CSV (UTF-8 con BOM para Excel).
+        Con pyarrow se escribe con su escritor multihilo, mucho más rápido que
+        DataFrame.to_csv con millones de errores (los textos quedan entre comillas).
+        """
+        df = self.a_dataframe()
+        if PYARROW_DISPONIBLE:
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            # Las categóricas se escriben como texto
+            tabla = tabla.cast(pa.schema([
+                pa.field(campo.name, campo.type.value_type if pa.types.is_dictionary(campo.type) else campo.type)
+                for campo in tabla.schema
+            ]))
+            with open(ruta, 'wb') as archivo:
+                archivo.write('\ufeff'.encode('utf-8'))
+                pa_csv.write_csv(tabla, archivo, pa_csv.WriteOptions(quoting_style='needed'))
+        else:
+            df.to_csv(ruta, index=False, encoding='utf-8-sig')
+        log.info(f"Lista de errores de validación exportada ({len(df)} errores): {ruta}") # <--- LOG Exportar Errores
\ No newline at end of file
@@ -0,0 +1,33 @@
+# Utilidades para procesar archivos en un pool de procesos
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from src.utils.file_handlers import establecer_motor_csv, obtener_motor_csv
+from src.utils.cache_lectura import establecer_cache_habilitada, cache_habilitada
+
+def numero_procesos(total_tareas, max_procesos=None):
+    """Cantidad de procesos a usar: no más que tareas ni que el límite (por defecto, los núcleos)"""
+    limite = max_procesos or os.cpu_count() or 1
+    return max(1, min(total_tareas, limite))
+
+def _inicializar_proceso(motor_csv, usar_cache):
+    """Aplica en el proceso nuevo la configuración de lectura de la aplicación"""
+    establecer_motor_csv(motor_csv)
+    establecer_cache_habilitada(usar_cache)
+
+def procesar_en_paralelo(funcion, elementos, argumento, max_procesos=None):
+    """
+    Ejecuta funcion(elemento, argumento) para cada elemento en un pool de procesos
+    acotado y genera (índice, resultado) en el orden original de `elementos`.
+    `funcion` debe ser una función de módulo (se envía a otro proceso).
+    Si se deja de iterar (p. ej. ante un error fatal), las tareas pendientes se cancelan.
+    """
+    # Los procesos nuevos usan el mismo motor de lectura CSV y la misma caché que la aplicación
+    executor = ProcessPoolExecutor(max_workers=numero_procesos(len(elementos), max_procesos),
+                                   initializer=_inicializar_proceso, initargs=(obtener_motor_csv(), cache_habilitada()))
+    try:
+        futuros = [executor.submit(funcion, elemento, argumento) for elemento in elementos]
+        for indice, futuro in enumerate(futuros):
+            yield indice, futuro.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
\ No newline at end of file
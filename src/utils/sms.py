@@ -0,0 +1,100 @@
+# Codificación y segmentos SMS (GSM-7 / UCS-2) por mensaje
+
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from src.utils.validators import lotes_codigos_unicode
+
+# Alfabeto GSM 03.38: caracteres básicos (1 septeto) y de la tabla de extensión (2 septetos)
+GSM7_BASICO = ('@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !"#¤%&\'()*+,-./0123456789:;<=>?'
+               '¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà')
+GSM7_EXTENSION = '^{}\\[~]|€\f'
+
+# Capacidad de un SMS: mensaje simple y cada parte de un mensaje multiparte (por la cabecera UDH)
+LIMITE_GSM7_SIMPLE, LIMITE_GSM7_PARTE = 160, 153
+LIMITE_UCS2_SIMPLE, LIMITE_UCS2_PARTE = 70, 67
+
+@lru_cache(maxsize=None)
+def tabla_gsm7():
+    """Tabla indexada por código Unicode: septetos del carácter en GSM-7 (0 = no existe en GSM-7)"""
+    tabla = np.zeros(0x110000, dtype=np.uint8)
+    tabla[[ord(c) for c in GSM7_BASICO]] = 1
+    tabla[[ord(c) for c in GSM7_EXTENSION]] = 2
+    return tabla
+
+def _segmentos(anchos, simple, parte):
+    """
+    Segmentos por fila a partir de la matriz de unidades de cada carácter (0 en el relleno).
+    Un carácter de dos unidades (extensión GSM-7 o par sustituto UTF-16) no se parte entre
+    dos segmentos: si no cabe completo en uno, pasa al siguiente.
+    """
+    unidades = anchos.sum(axis=1, dtype=np.int64)
+    segmentos = np.where(unidades <= simple, 1, -(-unidades // parte))
+    # Solo los multiparte con caracteres de dos unidades pueden necesitar un segmento más
+    revisar = np.flatnonzero((unidades > simple) & (anchos == 2).any(axis=1))
+    if len(revisar) == 0:
+        return segmentos
+    acumulado = np.cumsum(anchos[revisar], axis=1, dtype=np.int64)
+    total = unidades[revisar]
+    filas = np.arange(len(revisar))
+    inicio = np.zeros(len(revisar), dtype=np.int64)
+    cuenta = np.zeros(len(revisar), dtype=np.int64)
+    pendientes = inicio < total
+    while pendientes.any():
+        # Fin del segmento: último carácter que cabe completo a partir de `inicio`
+        caben = (acumulado <= (inicio + parte)[:, None]).sum(axis=1)
+        inicio = np.where(pendientes, acumulado[filas, caben - 1], inicio)
+        cuenta += pendientes
+        pendientes = inicio < total
+    segmentos[revisar] = cuenta
+    return segmentos
+
+def calcular_segmentos(serie):
+    """
+    Codificación y segmentos de cada mensaje. Retorna arreglos numpy por fila:
+    (segmentos, es_ucs2). Un mensaje va en GSM-7 si todos sus caracteres existen en
+    ese alfabeto y, si no, en UCS-2 (unidades UTF-16). Los mensajes vacíos cuentan
+    como un segmento y los nulos como cero.
+    Cada mensaje distinto se calcula una sola vez, con matrices de códigos Unicode.
+    """
+    if not pd.api.types.is_string_dtype(serie.dtype):
+        serie = serie.map(str, na_action='ignore')
+    codigos, unicos = pd.factorize(serie) # Nulos -> código -1
+    textos = [str(t) for t in np.asarray(unicos, dtype=object).tolist()]
+
+    segmentos_unicos = np.zeros(len(textos), dtype=np.int32)
+    ucs2_unicos = np.zeros(len(textos), dtype=bool)
+    tabla = tabla_gsm7()
+    for lote, matriz, largos in lotes_codigos_unicode(textos):
+        dentro = np.arange(matriz.shape[1]) < largos[:, None] # Celdas de texto (sin el relleno)
+        septetos_caracter = tabla[matriz] # El relleno (código 0) no existe en GSM-7: 0 septetos
+        es_ucs2 = ((septetos_caracter == 0) & dentro).any(axis=1)
+        # Caracteres fuera del plano básico ocupan dos unidades UTF-16
+        unidades_ucs2 = dentro.astype(np.uint8) + (matriz > 0xFFFF)
+        segmentos_unicos[lote] = np.where(es_ucs2,
+                                          _segmentos(unidades_ucs2, LIMITE_UCS2_SIMPLE, LIMITE_UCS2_PARTE),
+                                          _segmentos(septetos_caracter, LIMITE_GSM7_SIMPLE, LIMITE_GSM7_PARTE))
+        ucs2_unicos[lote] = es_ucs2
+
+    con_valor = codigos >= 0
+    segmentos = np.zeros(len(codigos), dtype=np.int32)
+    es_ucs2 = np.zeros(len(codigos), dtype=bool)
+    segmentos[con_valor] = segmentos_unicos[codigos[con_valor]]
+    es_ucs2[con_valor] = ucs2_unicos[codigos[con_valor]]
+    return segmentos, es_ucs2
+
+def resumen_segmentos(campanas, segmentos, es_ucs2, limite_segmentos):
+    """
+    Totales por campaña: {campaña: {'Segmentos', 'Multiparte', 'UCS-2', 'Sobre límite'}}.
+    'Sobre límite' cuenta los mensajes con más segmentos que `limite_segmentos`.
+    """
+    metricas = pd.DataFrame({
+        'campana': np.asarray(campanas),
+        'Segmentos': segmentos.astype(np.int64),
+        'Multiparte': segmentos > 1,
+        'UCS-2': es_ucs2,
+        'Sobre límite': segmentos > limite_segmentos,
+    })
+    totales = metricas.groupby('campana', sort=False, observed=True).sum()
+    return {campana: {columna: int(valor) for columna, valor in fila.items()}
+            for campana, fila in totales.iterrows()}
\ No newline at end of file
@@ -0,0 +1,99 @@
+# Normalización de números telefónicos de México a 10 dígitos (int64)
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# Valor de un teléfono inválido en el arreglo normalizado
+TELEFONO_INVALIDO = -1
+
+# Prefijos que se quitan según el largo total en dígitos:
+# lada internacional (+52 y el antiguo 521 de celulares), 044/045 (celular local
+# y de larga distancia) y 01 (larga distancia nacional)
+PREFIJOS_TELEFONO = (('521', 13), ('52', 12), ('044', 13), ('045', 13), ('01', 12))
+
+# Texto que se escribe igual que su número (solo dígitos, sin cero a la izquierda, cabe en int64)
+PATRON_ENTERO_CANONICO = r'[1-9][0-9]{0,17}'
+
+def normalizar_telefonos(serie):
+    """
+    Convierte cada teléfono a su número nacional de 10 dígitos como int64
+    (p. ej. '+52 55 1234 5678', '044 55 1234 5678' y 5512345678 -> 5512345678).
+    Los inválidos (vacíos, largo incorrecto o que empiezan con 0 o 1) quedan en
+    TELEFONO_INVALIDO. Cada valor distinto se normaliza una sola vez con operaciones
+    de texto vectorizadas y el resultado se lleva a sus filas.
+    En columnas de texto, los valores que ya son solo dígitos (la gran mayoría) se
+    convierten a entero y se normalizan con aritmética; solo los demás pasan por texto.
+    """
+    if pd.api.types.is_float_dtype(serie.dtype):
+        # Columnas numéricas con vacíos: evitar el '.0' al pasarlas a texto
+        serie = serie.round().astype('Int64')
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        return _normalizar_enteros(serie)
+    canonicos, valores = _enteros_canonicos(serie)
+    if canonicos.all():
+        return _normalizar_enteros(pd.Series(valores, copy=False))
+    numeros = np.full(len(serie), TELEFONO_INVALIDO, dtype=np.int64)
+    numeros[canonicos] = _normalizar_enteros(pd.Series(valores, copy=False))
+    numeros[~canonicos] = _normalizar_textos(serie[~canonicos])
+    return numeros
+
+def _enteros_canonicos(serie):
+    """
+    Máscara de los textos que se escriben igual que su número (PATRON_ENTERO_CANONICO)
+    y sus valores como int64. Con pyarrow la revisión y la conversión se hacen sobre el
+    arreglo de Arrow, sin crear objetos de Python por fila.
+    """
+    if pa is not None:
+        try:
+            arreglo = pa.array(serie, from_pandas=True, type=pa.string())
+        except (pa.ArrowException, TypeError):
+            arreglo = None # Valores que no son texto (p. ej. columna de objetos mixta)
+        if arreglo is not None:
+            canonicos = pc.fill_null(pc.match_substring_regex(arreglo, f'^{PATRON_ENTERO_CANONICO}$'), False)
+            valores = pc.cast(pc.filter(arreglo, canonicos), pa.int64())
+            return canonicos.to_numpy(zero_copy_only=False), valores.to_numpy(zero_copy_only=False)
+    canonicos = serie.str.fullmatch(PATRON_ENTERO_CANONICO).to_numpy(dtype=bool, na_value=False)
+    return canonicos, serie[canonicos].astype('int64').to_numpy()
+
+def _normalizar_textos(serie):
+    """Normalización por texto de normalizar_telefonos (prefijos con cero, '+52', espacios, vacíos)."""
+    codigos, unicos = pd.factorize(serie) # Vacíos -> código -1
+    digitos = pd.Series(np.asarray(unicos, dtype=object), dtype=object).astype(str).str.replace(r'\D+', '', regex=True)
+    largos = digitos.str.len().to_numpy()
+
+    nacional = digitos.copy()
+    for prefijo, largo in PREFIJOS_TELEFONO:
+        con_prefijo = (largos == largo) & digitos.str.startswith(prefijo).to_numpy(dtype=bool)
+        nacional[con_prefijo] = digitos[con_prefijo].str.slice(len(prefijo))
+    validos = ((nacional.str.len() == 10) & nacional.str.match(r'[2-9]')).to_numpy(dtype=bool)
+
+    numeros_unicos = np.full(len(unicos), TELEFONO_INVALIDO, dtype=np.int64)
+    numeros_unicos[validos] = nacional[validos].astype(np.int64).to_numpy()
+    numeros = np.full(len(codigos), TELEFONO_INVALIDO, dtype=np.int64)
+    con_valor = codigos >= 0
+    numeros[con_valor] = numeros_unicos[codigos[con_valor]]
+    return numeros
+
+def _normalizar_enteros(serie):
+    """
+    Igual que normalizar_telefonos para columnas enteras, con aritmética en lugar de
+    texto: los dígitos de un entero son los de su valor absoluto y los prefijos que
+    empiezan con 0 no pueden aparecer (el cero a la izquierda ya se perdió al leer).
+    """
+    con_valor = serie.notna().to_numpy()
+    valores = np.abs(serie.to_numpy(dtype=np.int64, na_value=0))
+    nacional = valores.copy()
+    for prefijo, largo in PREFIJOS_TELEFONO:
+        if prefijo.startswith('0'):
+            continue
+        base = 10 ** (largo - len(prefijo))
+        con_prefijo = (valores >= int(prefijo) * base) & (valores < (int(prefijo) + 1) * base)
+        nacional[con_prefijo] = valores[con_prefijo] - int(prefijo) * base
+    validos = con_valor & (nacional >= 2 * 10 ** 9) & (nacional < 10 ** 10)
+    return np.where(validos, nacional, TELEFONO_INVALIDO)
\ No newline at end of file
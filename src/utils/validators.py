@@ -1,4 +1,14 @@
+import re
+import numpy as np
 import pandas as pd
+from functools import lru_cache
+from src.utils.cache_validacion import mensajes_validos_conocidos, registrar_mensajes_validos, MAX_MENSAJES_CACHE
+
+# Máximo de errores de caracteres que se detallan por archivo
+LIMITE_ERRORES_MENSAJES = 10
+
+# Celdas (mensajes x caracteres) por lote al pasar mensajes a matrices de códigos Unicode
+CELDAS_LOTE_LOCALIZACION = 8_000_000
 
 def validar_estructura_archivo(df, columnas_requeridas):
     """Valida que el archivo tenga las columnas requeridas"""
@@ -6,18 +16,194 @@ def validar_estructura_archivo(df, columnas_requeridas):
     columnas_requeridas = set(col.lower() for col in columnas_requeridas)
     return columnas_requeridas.issubset(columnas_archivo)
 
+@lru_cache(maxsize=None)
+def patron_caracteres_no_permitidos(caracteres_permitidos):
+    """Regex precompilada (clase negada) que encuentra cualquier carácter fuera de los permitidos"""
+    # Solo se escapan los caracteres especiales dentro de una clase; así el patrón
+    # también es válido para el motor de regex de pyarrow
+    escapados = ''.join('\\' + c if c in '\\[]^-' else c for c in sorted(set(caracteres_permitidos)))
+    return re.compile(f'[^{escapados}]')
+
+@lru_cache(maxsize=None)
+def tabla_caracteres_permitidos(caracteres_permitidos):
+    """Tabla booleana indexada por código Unicode: True si el carácter está permitido"""
+    tabla = np.zeros(0x110000, dtype=bool)
+    tabla[[ord(c) for c in set(caracteres_permitidos)]] = True
+    return tabla
+
+def clasificar_mensajes(serie, caracteres_permitidos):
+    """
+    Valida cada mensaje distinto una sola vez. Retorna (codigos, unicos, invalidos):
+    el código de mensaje distinto por fila (-1 = vacío), los mensajes distintos y
+    la máscara de los distintos que tienen algún carácter no permitido.
+    Los mensajes suelen ser unas pocas plantillas repetidas, así que la regex se aplica
+    solo a los distintos; los válidos se recuerdan entre ejecuciones (caché de
+    validación) y no se vuelven a revisar.
+    """
+    patron = patron_caracteres_no_permitidos(caracteres_permitidos)
+    if not pd.api.types.is_string_dtype(serie.dtype):
+        serie = serie.map(str, na_action='ignore')
+    codigos, unicos = pd.factorize(serie) # Vacíos -> código -1
+    
+    if len(unicos) > MAX_MENSAJES_CACHE:
+        # Mensajes mayormente distintos: no caben en la caché y el hash costaría más que validarlos
+        invalidos = pd.Series(unicos).str.contains(patron.pattern, regex=True, na=False).to_numpy(dtype=bool)
+    else:
+        # Hash estable de 64 bits por mensaje distinto
+        hashes = pd.util.hash_array(np.asarray(unicos, dtype=object))
+        invalidos = np.zeros(len(unicos), dtype=bool)
+        pendientes = ~mensajes_validos_conocidos(hashes, caracteres_permitidos)
+        if pendientes.any():
+            revisados = pd.Series(unicos[pendientes]).str.contains(patron.pattern, regex=True, na=False)
+            invalidos[pendientes] = revisados.to_numpy(dtype=bool)
+            registrar_mensajes_validos(hashes[pendientes & ~invalidos], caracteres_permitidos)
+    return codigos, unicos, invalidos
+
+def _mascara_filas(codigos, invalidos):
+    mascara = np.zeros(len(codigos), dtype=bool)
+    con_valor = codigos >= 0
+    mascara[con_valor] = invalidos[codigos[con_valor]]
+    return mascara
+
+def filas_con_caracteres_no_permitidos(serie, caracteres_permitidos):
+    """
+    Máscara booleana (numpy) de las filas cuyo mensaje tiene algún carácter no permitido
+    (ver clasificar_mensajes). Los vacíos no se marcan.
+    """
+    codigos, _, invalidos = clasificar_mensajes(serie, caracteres_permitidos)
+    return _mascara_filas(codigos, invalidos)
+
+@lru_cache(maxsize=None)
+def tabla_transliteracion(caracteres_permitidos, transliteracion):
+    """
+    Tabla precompilada para str.translate. `transliteracion` es una tupla de pares
+    (carácter, reemplazo) para que la tabla se pueda cachear; los caracteres que ya
+    están permitidos no se reemplazan.
+    """
+    permitidos = set(caracteres_permitidos)
+    return str.maketrans({origen: destino for origen, destino in transliteracion if origen not in permitidos})
+
+def sanitizar_mensajes(serie, caracteres_permitidos, transliteracion):
+    """
+    Modo sanitizar: translitera los caracteres no permitidos según `transliteracion`
+    ({carácter: reemplazo}, p. ej. á -> a) y elimina los que queden fuera de la lista.
+    Solo se corrigen los mensajes distintos que tienen errores (ver clasificar_mensajes),
+    con operaciones de texto sobre la columna completa, y se llevan a sus filas.
+    Retorna (serie corregida, número de filas modificadas).
+    """
+    codigos, unicos, invalidos = clasificar_mensajes(serie, caracteres_permitidos)
+    mascara = _mascara_filas(codigos, invalidos)
+    if not mascara.any():
+        return serie, 0
+    
+    tabla = tabla_transliteracion(caracteres_permitidos, tuple(sorted(transliteracion.items())))
+    patron = patron_caracteres_no_permitidos(caracteres_permitidos)
+    corregidos = (pd.Series(np.asarray(unicos[invalidos], dtype=object), dtype=object)
+                  .str.translate(tabla)
+                  .str.replace(patron, '', regex=True))
+    
+    # Mensaje distinto -> posición de su versión corregida
+    posicion_corregido = np.full(len(unicos), -1, dtype=np.int64)
+    posicion_corregido[invalidos] = np.arange(int(invalidos.sum()))
+    serie = serie.copy()
+    serie.iloc[np.flatnonzero(mascara)] = corregidos.to_numpy()[posicion_corregido[codigos[mascara]]]
+    return serie, int(mascara.sum())
+
+def lotes_codigos_unicode(textos):
+    """
+    Pasa una lista de textos a matrices de códigos Unicode (UCS-4) para procesarlos
+    con numpy sin recorrerlos en Python. Genera (lote, matriz, largos): las posiciones
+    de los textos del lote, la matriz (textos x largo máximo, rellena con 0) y el largo
+    de cada texto. Los textos se agrupan por largo parecido para no desperdiciar
+    memoria, y cada matriz tiene a lo más CELDAS_LOTE_LOCALIZACION celdas.
+    """
+    largos = np.fromiter((len(t) for t in textos), dtype=np.int64, count=len(textos))
+    orden = np.argsort(largos, kind='stable')
+    largos_ordenados = largos[orden]
+    inicio = 0
+    while inicio < len(orden):
+        # Mensajes en el lote según el largo máximo que podría alcanzar (el arreglo está ordenado)
+        tentativo = CELDAS_LOTE_LOCALIZACION // max(1, largos_ordenados[inicio])
+        largo_maximo = largos_ordenados[min(len(orden), inicio + max(1, tentativo)) - 1]
+        fin = min(len(orden), inicio + max(1, CELDAS_LOTE_LOCALIZACION // max(1, largo_maximo)))
+        lote = orden[inicio:fin]
+        matriz_texto = np.array([textos[i] for i in lote], dtype=str)
+        ancho = matriz_texto.dtype.itemsize // 4
+        yield lote, matriz_texto.view(np.uint32).reshape(len(lote), ancho), largos[lote]
+        inicio = fin
+
+def _errores_por_mensaje(textos, caracteres_permitidos):
+    """
+    Ubica los caracteres no permitidos de una lista de mensajes sin recorrerlos en Python:
+    la matriz de códigos de cada lote se compara contra la tabla de permitidos.
+    Retorna (mensaje, posición, código) ordenados por mensaje y posición.
+    La posición es el índice del carácter, como en str.
+    """
+    tabla = tabla_caracteres_permitidos(caracteres_permitidos)
+    partes = []
+    for lote, matriz, largos in lotes_codigos_unicode(textos):
+        malos = ~tabla[matriz] & (np.arange(matriz.shape[1]) < largos[:, None])
+        filas_lote, posiciones = np.nonzero(malos)
+        partes.append((lote[filas_lote], posiciones, matriz[filas_lote, posiciones]))
+    if not partes:
+        vacio = np.empty(0, dtype=np.int64)
+        return vacio, vacio, np.empty(0, dtype=np.uint32)
+    mensajes, posiciones, puntos = (np.concatenate(p) for p in zip(*partes))
+    orden_errores = np.lexsort((posiciones, mensajes))
+    return mensajes[orden_errores], posiciones[orden_errores], puntos[orden_errores]
+
+def localizar_caracteres_no_permitidos(serie, caracteres_permitidos):
+    """
+    Validación completa: ubica todos los caracteres no permitidos de la columna.
+    Retorna arreglos numpy (filas, posiciones, codigos) con el índice de la fila,
+    la posición del carácter en el mensaje y su código Unicode, en orden de fila y
+    posición. Los errores se calculan una vez por mensaje distinto y se repiten en
+    sus filas con operaciones vectorizadas (sin formatear cada error).
+    """
+    codigos, unicos, invalidos = clasificar_mensajes(serie, caracteres_permitidos)
+    ids_invalidos = np.flatnonzero(invalidos)
+    textos = [str(t) for t in unicos[ids_invalidos].tolist()]
+    mensajes, posiciones_msg, puntos_msg = _errores_por_mensaje(textos, caracteres_permitidos)
+    
+    # Errores por mensaje distinto y dónde empiezan en los arreglos ordenados
+    errores_por_unico = np.zeros(len(unicos), dtype=np.int64)
+    errores_por_unico[ids_invalidos] = np.bincount(mensajes, minlength=len(ids_invalidos))
+    inicio_por_unico = np.zeros(len(unicos), dtype=np.int64)
+    inicio_por_unico[ids_invalidos] = np.cumsum(errores_por_unico[ids_invalidos]) - errores_por_unico[ids_invalidos]
+    
+    # Repetir los errores de cada mensaje distinto en cada fila donde aparece
+    filas_malas = np.flatnonzero(_mascara_filas(codigos, invalidos))
+    codigo_fila = codigos[filas_malas]
+    repeticiones = errores_por_unico[codigo_fila]
+    total = int(repeticiones.sum())
+    desplazamiento = np.arange(total) - np.repeat(np.cumsum(repeticiones) - repeticiones, repeticiones)
+    indice_error = np.repeat(inicio_por_unico[codigo_fila], repeticiones) + desplazamiento
+    
+    filas = serie.index.to_numpy()[np.repeat(filas_malas, repeticiones)].astype(np.int64)
+    return filas, posiciones_msg[indice_error].astype(np.int32), puntos_msg[indice_error].astype(np.uint32)
+
+def detallar_caracteres_no_permitidos(serie, mascara, caracteres_permitidos, limite=LIMITE_ERRORES_MENSAJES):
+    """
+    Genera (índice, posición, carácter, mensaje) por cada carácter no permitido, en
+    orden de fila y de posición. Solo se recorren las primeras `limite` filas marcadas
+    (cada una aporta al menos un error).
+    """
+    patron = patron_caracteres_no_permitidos(caracteres_permitidos)
+    for posicion_fila in np.flatnonzero(mascara)[:limite]:
+        mensaje_str = str(serie.iat[posicion_fila])
+        idx = serie.index[posicion_fila]
+        for coincidencia in patron.finditer(mensaje_str):
+            yield idx, coincidencia.start(), coincidencia.group(), mensaje_str
+
 def validar_mensajes(df, caracteres_permitidos):
     """Valida que los mensajes solo contengan caracteres permitidos"""
     mensajes_invalidos = []
     
-    for idx, mensaje in df['mensaje'].items():
-        if pd.notna(mensaje):
-            mensaje_str = str(mensaje)
-            for char in mensaje_str:
-                if char not in caracteres_permitidos:
-                    mensajes_invalidos.append(f"Fila {idx+2}: '{mensaje_str}' - Carácter no permitido: '{char}'")
-                    if len(mensajes_invalidos) >= 10:
-                        mensajes_invalidos.append("... (más errores encontrados)")
-                        return "\n".join(mensajes_invalidos)
+    mascara = filas_con_caracteres_no_permitidos(df['mensaje'], caracteres_permitidos)
+    for idx, _, char, mensaje_str in detallar_caracteres_no_permitidos(df['mensaje'], mascara, caracteres_permitidos):
+        mensajes_invalidos.append(f"Fila {idx+2}: '{mensaje_str}' - Carácter no permitido: '{char}'")
+        if len(mensajes_invalidos) >= LIMITE_ERRORES_MENSAJES:
+            mensajes_invalidos.append("... (más errores encontrados)")
+            return "\n".join(mensajes_invalidos)
     
     return "\n".join(mensajes_invalidos) if mensajes_invalidos else ""
\ No newline at end of file
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config.validacion import CARACTERES_PERMITIDOS
+from src.utils import cache_lectura, cache_validacion
+from src.utils.cache_validacion import mensajes_validos_conocidos, registrar_mensajes_validos
+from src.utils.validators import filas_con_caracteres_no_permitidos
+
+def hashes(*valores):
+    return np.array(valores, dtype=np.uint64)
+
+@pytest.fixture(autouse=True)
+def cache_en_carpeta_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_lectura, '_cache_habilitada', True)
+    monkeypatch.setattr(cache_validacion, 'CARPETA_CACHE_VALIDACION', str(tmp_path / 'validacion'))
+    monkeypatch.setattr(cache_validacion, '_caches', {})
+
+def nuevo_proceso(monkeypatch):
+    """Simula otro proceso: caché en memoria vacía, la misma carpeta en disco."""
+    monkeypatch.setattr(cache_validacion, '_caches', {})
+
+def test_limite_lru_descarta_los_usados_hace_mas_tiempo(monkeypatch):
+    monkeypatch.setattr(cache_validacion, 'MAX_MENSAJES_CACHE', 3)
+    registrar_mensajes_validos(hashes(10, 20, 30), CARACTERES_PERMITIDOS)
+    # Usar el 10: el 20 queda como el usado hace más tiempo
+    assert mensajes_validos_conocidos(hashes(10), CARACTERES_PERMITIDOS).tolist() == [True]
+    registrar_mensajes_validos(hashes(40), CARACTERES_PERMITIDOS)
+    assert mensajes_validos_conocidos(hashes(10, 20, 30, 40), CARACTERES_PERMITIDOS).tolist() == [True, False, True, True]
+
+    registrar_mensajes_validos(hashes(50, 60), CARACTERES_PERMITIDOS)
+    conocidos = mensajes_validos_conocidos(hashes(10, 30, 40, 50, 60), CARACTERES_PERMITIDOS)
+    assert conocidos.tolist() == [False, False, True, True, True]
+    assert len(cache_validacion._caches[cache_validacion.firma_caracteres(CARACTERES_PERMITIDOS)]['hashes']) == 3
+
+    # El orden de uso también se respeta al cargar la caché del disco
+    nuevo_proceso(monkeypatch)
+    assert mensajes_validos_conocidos(hashes(40), CARACTERES_PERMITIDOS).tolist() == [True]
+    registrar_mensajes_validos(hashes(70), CARACTERES_PERMITIDOS)
+    assert mensajes_validos_conocidos(hashes(40, 50, 60, 70), CARACTERES_PERMITIDOS).sum() == 3
+    assert mensajes_validos_conocidos(hashes(40, 70), CARACTERES_PERMITIDOS).all()
+
+def test_cambiar_caracteres_permitidos_invalida_la_cache(monkeypatch):
+    serie = pd.Series(['Hola', 'Pago hoy'])
+    assert not filas_con_caracteres_no_permitidos(serie, CARACTERES_PERMITIDOS).any()
+    nuevo_proceso(monkeypatch)
+    assert not filas_con_caracteres_no_permitidos(serie, CARACTERES_PERMITIDOS).any()
+
+    # Sin la 'y', 'Pago hoy' deja de ser válido aunque estaba en la caché
+    sin_y = CARACTERES_PERMITIDOS.replace('y', '')
+    assert cache_validacion.firma_caracteres(sin_y) != cache_validacion.firma_caracteres(CARACTERES_PERMITIDOS)
+    assert filas_con_caracteres_no_permitidos(serie, sin_y).tolist() == [False, True]
+    # El orden de la lista no cambia la firma
+    assert cache_validacion.firma_caracteres(CARACTERES_PERMITIDOS[::-1]) == cache_validacion.firma_caracteres(CARACTERES_PERMITIDOS)
+
+def test_procesos_en_paralelo_no_pierden_mensajes_del_otro(monkeypatch):
+    # Dos procesos cargan la caché vacía y guardan por turnos: el segundo combina con el disco
+    proceso_1, proceso_2 = {}, {}
+    monkeypatch.setattr(cache_validacion, '_caches', proceso_1)
+    mensajes_validos_conocidos(hashes(1), CARACTERES_PERMITIDOS)
+    monkeypatch.setattr(cache_validacion, '_caches', proceso_2)
+    mensajes_validos_conocidos(hashes(1), CARACTERES_PERMITIDOS)
+
+    monkeypatch.setattr(cache_validacion, '_caches', proceso_1)
+    registrar_mensajes_validos(hashes(1, 2), CARACTERES_PERMITIDOS)
+    monkeypatch.setattr(cache_validacion, '_caches', proceso_2)
+    registrar_mensajes_validos(hashes(3), CARACTERES_PERMITIDOS)
+
+    nuevo_proceso(monkeypatch)
+    assert mensajes_validos_conocidos(hashes(1, 2, 3, 4), CARACTERES_PERMITIDOS).tolist() == [True, True, True, False]
\ No newline at end of file
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.processing import ProcessingThread, RESUMEN_VACIO
+from src.utils.duplicados import claves_enteras, duplicados_en_particiones, marcar_duplicados
+
+@pytest.mark.parametrize('politica, esperado', [
+    ('conservar_primero', [False, False, True, False, True, True]),
+    ('conservar_ultimo', [True, True, True, False, False, False]),
+    ('rechazar', [True, True, True, False, True, True]),
+])
+def test_marcar_duplicados_segun_politica(politica, esperado):
+    claves = np.array([7, 3, 7, 9, 3, 7], dtype=np.int64)
+    assert marcar_duplicados(claves, politica).tolist() == esperado
+
+def test_claves_de_texto_y_numericas_son_la_misma_clave():
+    claves, con_valor = claves_enteras([pd.Series(['1000', None, '0012']),
+                                        pd.Series([1000, 12], dtype='int64'),
+                                        pd.Series([1000.0, np.nan])])
+    assert con_valor.tolist() == [True, False, True, True, True, True, False]
+    assert claves[0] == claves[3] == claves[5] and claves[2] != claves[4]
+
+def test_particiones_en_orden_de_archivo_y_fila():
+    # Las particiones llegan desordenadas: el primero es el del archivo 0 aunque venga después
+    particiones = [(1, pd.DataFrame({'clave': ['a', 'b']}, index=[0, 1])),
+                   (0, pd.DataFrame({'clave': ['b', None, 'a', None]}, index=[5, 6, 7, 8]))]
+    mascaras = duplicados_en_particiones(particiones, 'clave', 'conservar_primero')
+    assert [m.tolist() for m in mascaras] == [[True, True], [False, False, False, False]]
+    mascaras = duplicados_en_particiones(particiones, 'clave', 'conservar_ultimo')
+    assert [m.tolist() for m in mascaras] == [[False, False], [True, False, True, False]]
+    # Los registros sin clave nunca se marcan
+    mascaras = duplicados_en_particiones(particiones, 'clave', 'rechazar')
+    assert [m.tolist() for m in mascaras] == [[True, True], [True, False, True, False]]
+    assert duplicados_en_particiones([], 'clave', 'rechazar') == []
+
+MENSAJE_LARGO = 'a' * 161 # Dos segmentos
+
+def particion(telefonos, indice):
+    return pd.DataFrame({'numtelefono': np.array(telefonos, dtype=np.int64),
+                         'mensaje': [MENSAJE_LARGO if t == 5510000002 else 'Hola' for t in telefonos]},
+                        index=indice)
+
+def particiones_de_prueba():
+    # {campaña: [particiones]} y el archivo de cada partición
+    all_dataframes = {'A': [particion([5510000001, 5510000002, 5510000003], [0, 1, 2]),
+                            particion([5510000002, 5510000004], [0, 1])],
+                      'B': [particion([5510000001, 5510000005], [3, 4]),
+                            particion([5510000004], [2])]}
+    return all_dataframes, {'A': [0, 1], 'B': [0, 1]}
+
+# (por campaña, política) -> {campaña: [(partición, índice) quitados]}
+QUITADOS = {
+    (True, 'conservar_primero'): {'A': [(1, 0)]},
+    (True, 'conservar_ultimo'): {'A': [(0, 1)]},
+    (True, 'rechazar'): {'A': [(0, 1), (1, 0)]},
+    (False, 'conservar_primero'): {'A': [(1, 0)], 'B': [(0, 3), (1, 2)]},
+    (False, 'conservar_ultimo'): {'A': [(0, 0), (0, 1), (1, 1)]},
+    (False, 'rechazar'): {'A': [(0, 0), (0, 1), (1, 0), (1, 1)], 'B': [(0, 3), (1, 2)]},
+}
+
+@pytest.mark.parametrize('por_campana', [True, False])
+@pytest.mark.parametrize('politica', ['conservar_primero', 'conservar_ultimo', 'rechazar'])
+def test_quitar_duplicados(por_campana, politica):
+    hilo = ProcessingThread([], None, clave_duplicados='numtelefono', politica_duplicados=politica,
+                            duplicados_por_campana=por_campana, limite_segmentos=1)
+    all_dataframes, origen_particiones = particiones_de_prueba()
+    originales, _ = particiones_de_prueba()
+    filas_resumen = hilo.quitar_duplicados(all_dataframes, origen_particiones)
+
+    esperado = QUITADOS[(por_campana, politica)]
+    for campana, dfs in all_dataframes.items():
+        quitados = esperado.get(campana, [])
+        for k, df in enumerate(dfs):
+            original = originales[campana][k]
+            pd.testing.assert_frame_equal(df, original.drop(index=[i for p, i in quitados if p == k]))
+
+    # Filas de resumen negativas: descuentan registros y segmentos, y los reportan en 'Duplicados'
+    resumen = {fila['Campaña']: fila for fila in filas_resumen}
+    assert sorted(resumen) == sorted(esperado)
+    for campana, quitados in esperado.items():
+        largos = sum(originales[campana][p].loc[i, 'mensaje'] == MENSAJE_LARGO for p, i in quitados)
+        assert resumen[campana] == {'Campaña': campana, **RESUMEN_VACIO,
+                                    'Registros': -len(quitados), 'Segmentos': -(len(quitados) + largos),
+                                    'Multiparte': -largos, 'Sobre límite': -largos, 'Duplicados': len(quitados)}
\ No newline at end of file
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.esquemas import (ESQUEMAS, aplicar_conversiones, calcular_kpis, columnas_kpis,
+                                 contar_combinaciones, kpis_desde_conteos, sumar_conteos)
+
+# Valores tal como vienen en los reportes: mayúsculas, espacios, vacíos y no numéricos
+VALORES = {
+    'estatus': ['1', '0', '2', 'x', None],
+    'leido': ['1', '0', None, 'no'],
+    'clic': ['SI', 'si ', 'No', None],
+    'modalidad': ['Simple', 'SMS', ' basic', 'sms ', None],
+    'status': ['1', '0', '-5', '200', 'x', None],
+}
+
+def kpis_con_mascaras(df, esquema):
+    """Cálculo de referencia: una máscara por KPI sobre todas las filas."""
+    kpis = {}
+    for nombre, condiciones in esquema['kpis']:
+        if isinstance(condiciones, int):
+            kpis[nombre] = condiciones
+            continue
+        mascara = pd.Series(True, index=df.index)
+        for columna, valor in condiciones.items():
+            if isinstance(valor, tuple):
+                mascara &= (df[columna] != valor[1]).fillna(True)
+            else:
+                mascara &= (df[columna] == valor).fillna(False)
+        kpis[nombre] = int(mascara.sum())
+    return kpis
+
+def reporte(tipo, filas, semilla):
+    rng = np.random.default_rng(semilla)
+    esquema = ESQUEMAS[tipo]
+    columnas = list(dict.fromkeys(columnas_kpis(esquema) + list(esquema['enteros']) + esquema['textos']))
+    df = pd.DataFrame({columna: pd.Series(rng.choice(np.array(VALORES[columna], dtype=object), filas),
+                                          dtype=esquema['dtypes'].get(columna)) for columna in columnas})
+    return aplicar_conversiones(df, esquema), esquema
+
+@pytest.mark.parametrize('tipo', ['simples', 'basic', 'directo'])
+@pytest.mark.parametrize('filas', [0, 1, 7, 5000])
+def test_kpis_de_una_pasada_igual_a_mascaras(tipo, filas):
+    df, esquema = reporte(tipo, filas, semilla=filas)
+    assert calcular_kpis(df, esquema) == kpis_con_mascaras(df, esquema)
+
+@pytest.mark.parametrize('tipo', ['simples', 'basic', 'directo'])
+def test_kpis_sumando_bloques_igual_a_todo_el_archivo(tipo):
+    df, esquema = reporte(tipo, 3001, semilla=3)
+    columnas = columnas_kpis(esquema)
+    tabla = sumar_conteos([contar_combinaciones(df.iloc[i:i + 400], columnas) for i in range(0, len(df), 400)])
+    assert kpis_desde_conteos(tabla, esquema) == kpis_con_mascaras(df, esquema)
+
+def test_conteo_con_enteros_de_rango_grande():
+    # Valores que no se codifican restando el mínimo (pasan por pd.factorize)
+    esquema = ESQUEMAS['directo']
+    df = pd.DataFrame({'status': np.array([1, 10**12, -10**12, 1, 0, 10**12], dtype=np.int64)})
+    tabla = contar_combinaciones(df, ['status'])
+    assert dict(zip(tabla['status'], tabla['conteo'])) == {1: 2, 10**12: 2, -10**12: 1, 0: 1}
+    assert calcular_kpis(df, esquema) == kpis_con_mascaras(df, esquema)
\ No newline at end of file
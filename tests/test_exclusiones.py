@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models import base_processing
+from src.models.processing import ProcessingThread
+from src.models.processing_reportes import ReportesProcessingThread
+from src.utils import exclusiones
+from src.utils.exclusiones import cargar_lista_exclusion, telefonos_excluidos
+from tests.test_processing import REGISTROS, escribir_devoluciones, procesar, sin_cache_lectura  # noqa: F401
+
+@pytest.fixture(autouse=True)
+def cache_exclusiones_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(exclusiones, 'CARPETA_CACHE_EXCLUSIONES', str(tmp_path / 'exclusiones'))
+    monkeypatch.setattr(exclusiones, '_listas', {})
+
+@pytest.fixture
+def lista(tmp_path):
+    # Con encabezado, prefijos, un repetido y una fila inválida
+    ruta = tmp_path / 'lista.csv'
+    ruta.write_text("telefono\n+52 55 1234 5603\n0445512345600\n5512345600\nno es numero\n", encoding='utf-8')
+    return str(ruta)
+
+def test_lista_se_normaliza_y_se_guarda_en_cache(lista, monkeypatch):
+    numeros = cargar_lista_exclusion(lista)
+    assert numeros.dtype == np.int64 and numeros.tolist() == [5512345600, 5512345603]
+    assert telefonos_excluidos([5512345603, 5512345601, 5512345600, 5512345603], numeros).tolist() == \
+        [True, False, True, True]
+    guardados = os.listdir(exclusiones.CARPETA_CACHE_EXCLUSIONES)
+    assert len(guardados) == 1 and guardados[0].endswith('.npy')
+
+    # Siguiente ejecución (memoria vacía): se carga el .npy sin leer el archivo
+    monkeypatch.setattr(exclusiones, '_listas', {})
+    def sin_lectura(ruta):
+        raise AssertionError(f"se volvió a leer {ruta}")
+    monkeypatch.setattr(exclusiones, 'leer_numeros_exclusion', sin_lectura)
+    assert cargar_lista_exclusion(lista).tolist() == [5512345600, 5512345603]
+
+def test_lista_modificada_se_vuelve_a_leer(lista):
+    cargar_lista_exclusion(lista)
+    anterior = os.listdir(exclusiones.CARPETA_CACHE_EXCLUSIONES)
+    with open(lista, 'a', encoding='utf-8') as f:
+        f.write("5512345605\n")
+    assert cargar_lista_exclusion(lista).tolist() == [5512345600, 5512345603, 5512345605]
+    # Solo se conserva la caché de la lista vigente
+    actual = os.listdir(exclusiones.CARPETA_CACHE_EXCLUSIONES)
+    assert len(actual) == 1 and actual != anterior
+
+def test_lista_inexistente(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        cargar_lista_exclusion(str(tmp_path / 'no_existe.csv'))
+    assert cargar_lista_exclusion(None) is None
+
+@pytest.fixture
+def contar_huellas(monkeypatch):
+    """Cuenta cuántas veces se calcula la huella de la lista de exclusión."""
+    llamadas = []
+    for modulo in (exclusiones, base_processing):
+        huella_archivo = modulo.huella_archivo
+        def registrar(ruta, huella_archivo=huella_archivo):
+            if os.path.basename(ruta) == 'lista.csv':
+                llamadas.append(ruta)
+            return huella_archivo(ruta)
+        monkeypatch.setattr(modulo, 'huella_archivo', registrar)
+    return llamadas
+
+@pytest.mark.parametrize('opciones', [{}, {'modo_streaming': True, 'tamano_bloque': 2}, {'modo_paralelo': True}],
+                         ids=['completo', 'por_bloques', 'paralelo'])
+def test_devoluciones_quitan_y_cuentan_excluidos(tmp_path, lista, contar_huellas, opciones):
+    archivos = [str(escribir_devoluciones(tmp_path / 'f0.csv', REGISTROS)),
+                str(escribir_devoluciones(tmp_path / 'f1.csv', REGISTROS[:6]))]
+    resultado = procesar(archivos, archivo_exclusion=lista, **opciones)
+    # La lista se resuelve una sola vez por corrida, no por archivo ni por bloque
+    assert len(contar_huellas) == 1
+
+    exportados = pd.concat(resultado['dataframes'].values())
+    assert not exportados['numtelefono'].isin([5512345600, 5512345603]).any()
+    sin_lista = pd.concat(procesar(archivos, **opciones)['dataframes'].values())
+    assert len(sin_lista) - len(exportados) == 6 # 5512345600 x2 y 5512345603 x1 en cada archivo
+    resumen = resultado['resumen'].set_index('Campaña')
+    assert resumen['Excluidos'].to_dict() == {'A': 4, 'B': 2, 'C': 0}
+
+def test_lista_que_ya_no_existe_no_detiene_el_procesamiento(tmp_path, lista):
+    archivos = [str(escribir_devoluciones(tmp_path / 'f0.csv', REGISTROS))]
+    os.remove(lista)
+    hilo = ProcessingThread(archivos, None, archivo_exclusion=lista)
+    avisos, resultados, errores = [], [], []
+    hilo.update_status.connect(avisos.append)
+    hilo.finished_processing.connect(resultados.append)
+    hilo.error_occurred.connect(errores.append)
+    hilo.run()
+    assert not errores and resultados[0]['resumen']['Excluidos'].sum() == 0
+    assert any('no se encontró la lista de exclusión' in aviso for aviso in avisos)
+
+def test_procesos_del_pool_usan_la_lista_del_hilo_principal(tmp_path, lista, contar_huellas):
+    archivo = str(escribir_devoluciones(tmp_path / 'f0.csv', REGISTROS))
+    hilo = ProcessingThread([archivo], None, archivo_exclusion=lista)
+    hilo.preparar_lista_exclusion()
+    argumento = (ProcessingThread, hilo.opciones_procesamiento(), hilo.huella_exclusion)
+    listas_hilo_principal = dict(exclusiones._listas)
+    exclusiones._listas.clear() # Como un proceso nuevo: solo el .npy guardado en disco
+    resultado = base_processing.procesar_archivo_en_proceso((archivo, None), argumento)
+    assert len(contar_huellas) == 1 # Solo la del hilo principal
+    assert sum(fila['Excluidos'] for fila in resultado['resumen']) == 3
+    assert list(exclusiones._listas) == list(listas_hilo_principal)
+
+def escribir_reporte_simples(ruta, telefonos):
+    filas = ['clienteid,numtelefono,identificador,estatus,clic,rcs_entregable,articulo_clic,campaña,modalidad,leido']
+    filas += [f'{i},{telefono},x{i},1,NO,1,,A,SMS,0' for i, telefono in enumerate(telefonos)]
+    ruta.write_text('\n'.join(filas) + '\n', encoding='utf-8')
+    return str(ruta)
+
+@pytest.mark.parametrize('modo_streaming', [False, True])
+def test_reportes_cuentan_excluidos(tmp_path, lista, contar_huellas, modo_streaming):
+    telefonos = ['5512345600', '+52 55 1234 5603', '5512345601', '0445512345600', '']
+    ruta = escribir_reporte_simples(tmp_path / 'reporte.csv', telefonos)
+    hilo = ReportesProcessingThread([ruta], None, archivo_exclusion=lista, modo_streaming=modo_streaming, tamano_bloque=2)
+    for _ in range(2):
+        stats = hilo.procesar_archivo(ruta)['stats']
+        assert (stats['Excluidos'], stats['Total Generada']) == (3, 2)
+    assert len(contar_huellas) == 1
\ No newline at end of file
@@ -0,0 +1,98 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.utils import exportacion
+from src.utils.exportacion import exportar_campanas, EscritoresCampana
+
+def campana(n):
+    return pd.DataFrame({'clienteid': range(n), 'numtelefono': 5512345600 + pd.RangeIndex(n), 'mensaje': 'Hola'})
+
+@pytest.fixture
+def falla_segundo_renombrado(monkeypatch):
+    reemplazar = os.replace
+    llamadas = []
+    def reemplazar_con_falla(origen, destino):
+        llamadas.append(destino)
+        if len(llamadas) == 2:
+            raise PermissionError(f"archivo en uso: {destino}")
+        reemplazar(origen, destino)
+    monkeypatch.setattr(exportacion.os, 'replace', reemplazar_con_falla)
+    return llamadas
+
+def test_exportar_campanas_no_deja_archivos_si_falla_un_renombrado(tmp_path, falla_segundo_renombrado):
+    with pytest.raises(PermissionError):
+        exportar_campanas({'A': campana(5), 'B': campana(3), 'C': campana(4)}, tmp_path, max_filas=2)
+    assert len(falla_segundo_renombrado) == 2
+    assert os.listdir(tmp_path) == []
+
+def test_escritores_no_dejan_archivos_si_falla_un_renombrado(tmp_path, falla_segundo_renombrado):
+    escritores = EscritoresCampana(tmp_path)
+    for nombre in ('A', 'B', 'C'):
+        escritores.escribir(nombre, campana(3))
+    with pytest.raises(PermissionError):
+        escritores.cerrar()
+    assert os.listdir(tmp_path) == []
+
+def test_exportar_campanas_publica_todos_los_fragmentos(tmp_path):
+    exportados = exportar_campanas({'A': campana(5), 'B': campana(3)}, tmp_path, max_filas=2)
+    assert exportados == {'A_001.csv': 2, 'A_002.csv': 2, 'A_003.csv': 1, 'B_001.csv': 2, 'B_002.csv': 1}
+    assert sorted(os.listdir(tmp_path)) == sorted(exportados)
+def leer_fragmentos(carpeta, nombres):
+    """Filas de datos de los archivos en orden (sin encabezado) y el encabezado de cada uno."""
+    filas, encabezados = [], []
+    for nombre in nombres:
+        lineas = open(os.path.join(carpeta, nombre), 'rb').read().splitlines(keepends=True)
+        encabezados.append(lineas[0])
+        filas.extend(lineas[1:])
+    return filas, encabezados
+
+def test_fragmentos_por_filas_y_por_bytes(tmp_path):
+    df = campana(1000)
+    df['mensaje'] = ['Hola' * (i % 7) for i in range(1000)]
+    assert exportar_campanas({'A': df}, tmp_path) == {'A.csv': 1000}
+    completo, (encabezado,) = leer_fragmentos(tmp_path, ['A.csv'])
+    for limites in ({'max_filas': 64}, {'max_bytes': 2000}, {'max_filas': 30, 'max_bytes': 2000}):
+        carpeta = tmp_path / '_'.join(map(str, limites.values()))
+        os.makedirs(carpeta)
+        exportados = exportar_campanas({'A': df}, carpeta, **limites)
+        nombres = sorted(exportados)
+        filas, encabezados = leer_fragmentos(carpeta, nombres)
+        # Mismas filas en el mismo orden, con el encabezado en cada fragmento
+        assert filas == completo and set(encabezados) == {encabezado}
+        assert sum(exportados.values()) == 1000
+        for nombre in nombres:
+            assert exportados[nombre] <= limites.get('max_filas', 1000)
+            assert os.path.getsize(carpeta / nombre) <= limites.get('max_bytes', float('inf'))
+        # Los fragmentos se llenan: solo el último queda por debajo del límite de filas
+        if 'max_bytes' not in limites:
+            assert [exportados[n] for n in nombres[:-1]] == [64] * (len(nombres) - 1)
+
+def test_fila_mas_grande_que_el_limite_va_sola(tmp_path):
+    df = campana(3)
+    df['mensaje'] = ['Hola', 'x' * 500, 'Adios']
+    exportados = exportar_campanas({'A': df}, tmp_path, max_bytes=100)
+    assert exportados == {'A_001.csv': 1, 'A_002.csv': 1, 'A_003.csv': 1}
+
+@pytest.mark.parametrize('filas, max_filas, nombres', [
+    (12, 1, ['A_001.csv', 'A_012.csv']),
+    (1000, 1, ['A_0001.csv', 'A_1000.csv']),
+    (1001, 1, ['A_0001.csv', 'A_1001.csv']),
+])
+def test_ancho_del_numero_de_fragmento(tmp_path, filas, max_filas, nombres):
+    exportados = sorted(exportar_campanas({'A': campana(filas)}, tmp_path, max_filas=max_filas))
+    assert [exportados[0], exportados[-1]] == nombres
+    assert len({len(nombre) for nombre in exportados}) == 1
+
+@pytest.mark.parametrize('limites', [{}, {'max_filas': 5}, {'max_bytes': 10**6}])
+def test_campana_en_un_solo_fragmento_conserva_su_nombre(tmp_path, limites):
+    assert exportar_campanas({'A': campana(5), 'B': campana(2)}, tmp_path, **limites) == {'A.csv': 5, 'B.csv': 2}
+
+def test_nombres_repetidos_entre_campanas(tmp_path):
+    # Los fragmentos de 'A' se llamarían igual que la campaña 'A_001'
+    with pytest.raises(ValueError, match='A_001.csv'):
+        exportar_campanas({'A': campana(5), 'A_001': campana(2)}, tmp_path, max_filas=3)
+    assert os.listdir(tmp_path) == []
+    # Sin fragmentar no hay conflicto
+    assert exportar_campanas({'A': campana(5), 'A_001': campana(2)}, tmp_path) == {'A.csv': 5, 'A_001.csv': 2}
\ No newline at end of file
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from src.models.esquemas import obtener_esquema
+from src.utils import cache_lectura, file_handlers
+from src.utils.file_handlers import leer_csv, leer_csv_con_plan, PYARROW_DISPONIBLE
+
+pytestmark = pytest.mark.skipif(not PYARROW_DISPONIBLE, reason="requiere pyarrow")
+
+# Valores que la inferencia de tipos cambia: ceros a la izquierda, un id que no cabe en
+# int64, teléfonos con prefijo o con formato, una hora y vacíos
+CSV_REPORTE = (
+    "clienteid,numtelefono,horaaenviar,estatus,total\n"
+    "12345678901234567890123,5512345678,10:00,1,3\n"
+    "0012,0445512345678,10:30,0,4\n"
+    "007,+52 55 1234 5678,,1,\n"
+    ",NA,23:59,x,5\n"
+)
+
+@pytest.fixture(autouse=True)
+def sin_cache_lectura(monkeypatch):
+    monkeypatch.setattr(cache_lectura, '_cache_habilitada', False)
+
+def leer_con_motor(monkeypatch, motor, *args, **kwargs):
+    monkeypatch.setattr(file_handlers, '_motor_csv', motor)
+    return leer_csv(*args, **kwargs)
+
+def test_motores_leen_igual_las_columnas_de_texto(tmp_path, monkeypatch):
+    ruta = tmp_path / 'reporte.csv'
+    ruta.write_text(CSV_REPORTE, encoding='utf-8')
+    tipos = {'clienteid': file_handlers.DTYPE_TEXTO, 'numtelefono': file_handlers.DTYPE_TEXTO,
+             'horaaenviar': file_handlers.DTYPE_TEXTO, 'estatus': 'category'}
+    df_c = leer_con_motor(monkeypatch, 'c', ruta, dtype=tipos, low_memory=False)
+    df_pyarrow = leer_con_motor(monkeypatch, 'pyarrow', ruta, dtype=tipos, low_memory=False)
+    pd.testing.assert_frame_equal(df_pyarrow, df_c)
+    assert df_c['clienteid'].tolist()[:3] == ['12345678901234567890123', '0012', '007']
+    assert df_c['horaaenviar'].tolist()[0] == '10:00'
+    assert df_c['estatus'].cat.categories.tolist() == ['0', '1', 'x']
+
+def test_motores_leen_igual_sin_encabezado(tmp_path, monkeypatch):
+    ruta = tmp_path / 'lista.txt'
+    ruta.write_text("0445512345678\n5512345679\n\n", encoding='utf-8')
+    opciones = {'header': None, 'usecols': [0], 'dtype': {0: file_handlers.DTYPE_TEXTO}}
+    pd.testing.assert_frame_equal(leer_con_motor(monkeypatch, 'pyarrow', ruta, **opciones),
+                                  leer_con_motor(monkeypatch, 'c', ruta, **opciones))
+
+@pytest.mark.parametrize('tipo_reporte, columnas', [
+    ('devoluciones', ['clienteid', 'numtelefono', 'horaaenviar']),
+    ('simples', ['clienteid', 'numtelefono']),
+    ('directo', ['clienteid', 'number']),
+])
+def test_esquemas_leen_ids_y_telefonos_igual_con_ambos_motores(tmp_path, monkeypatch, tipo_reporte, columnas):
+    esquema = obtener_esquema(tipo_reporte)
+    valores = {'clienteid': ['12345678901234567890123', '0012', '007'],
+               'numtelefono': ['5512345678', '0445512345678', '+52 55 1234 5678'],
+               'horaaenviar': ['10:00', '10:30', '']}
+    valores['number'] = valores['numtelefono']
+    separador = esquema['separador'] or ','
+    filas = [separador.join(esquema['columnas_requeridas'])]
+    for i in range(3):
+        filas.append(separador.join(valores[c][i] if c in valores else str(i) for c in esquema['columnas_requeridas']))
+    ruta = tmp_path / f'{tipo_reporte}.csv'
+    ruta.write_text('\n'.join(filas) + '\n', encoding='utf-8')
+
+    leidos = {}
+    for motor in file_handlers.MOTORES_CSV:
+        monkeypatch.setattr(file_handlers, '_motor_csv', motor)
+        leidos[motor] = leer_csv_con_plan(str(ruta), esquema['columnas_requeridas'], esquema['dtypes'],
+                                          esquema['alias'], separador=esquema['separador'])
+    pd.testing.assert_frame_equal(leidos['pyarrow'], leidos['c'])
+    for columna in columnas:
+        assert leidos['c'][columna].tolist() == [v or pd.NA for v in valores[columna]]
\ No newline at end of file
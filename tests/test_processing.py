@@ -0,0 +1,138 @@
+import csv
+import os
+
+import pandas as pd
+import pytest
+
+from src.models.processing import ProcessingThread
+from src.utils import cache_lectura, file_handlers
+from src.utils.exportacion import exportar_campanas
+
+ENCABEZADO = ['clienteid', 'nombre', 'apellidopaterno', 'apellidomaterno', 'numtelefono', 'mensaje',
+              'variable1', 'variable2', 'variable3', 'variable4', 'variable5',
+              'fechainsercion', 'fechaaenviar', 'horaaenviar', 'campana']
+
+# (clienteid, numtelefono, mensaje, campana): ceros a la izquierda, un id de 23 dígitos,
+# teléfonos con prefijos y espacios, uno inválido y mensajes con comillas y separadores
+REGISTROS = [
+    ('000', '5512345600', 'Hola', 'A'),
+    ('007', '+52 55 1234 5601', 'Pago "hoy", ya', 'B'),
+    ('12345678901234567890123', '0445512345602', 'Aviso: uno, dos', 'A'),
+    ('42', '', 'Sin telefono', 'A'),
+    ('0012', '5512345600', 'Repetido', 'A'),
+    ('7', '5512345603', 'Hola', 'B'),
+    ('', '5512345604', 'Sin cliente', 'C'),
+    ('99', '5512345605', 'Otra linea', 'A'),
+    ('55', '5512345699', 'Cruce', 'A'), # Mismo cliente y teléfono en dos campañas
+    ('55', '5512345699', 'Cruce', 'B'),
+]
+
+def escribir_devoluciones(ruta, registros, separador=','):
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f, delimiter=separador)
+        escritor.writerow(ENCABEZADO)
+        for clienteid, telefono, mensaje, campana in registros:
+            escritor.writerow([clienteid, 'Ana', 'Perez', 'Lopez', telefono, mensaje,
+                               '001', '', '3.50', 'x', '', '2024-01-02', '2024-01-03', '10:00', campana])
+    return ruta
+
+def procesar(file_paths, **opciones):
+    """Ejecuta el hilo de devoluciones en este mismo hilo y retorna su resultado."""
+    hilo = ProcessingThread(list(file_paths), None, **opciones)
+    resultados, errores = [], []
+    hilo.finished_processing.connect(resultados.append)
+    hilo.error_occurred.connect(errores.append)
+    hilo.run()
+    assert not errores
+    return resultados[0]
+
+def contenido_carpeta(carpeta):
+    return {nombre: open(os.path.join(carpeta, nombre), 'rb').read() for nombre in sorted(os.listdir(carpeta))}
+
+def exportar(dataframes, carpeta):
+    os.makedirs(carpeta)
+    exportar_campanas(dataframes, carpeta)
+    return contenido_carpeta(carpeta)
+
+@pytest.fixture(autouse=True)
+def sin_cache_lectura(monkeypatch):
+    monkeypatch.setattr(cache_lectura, '_cache_habilitada', False)
+
+@pytest.fixture
+def archivos(tmp_path):
+    return [str(escribir_devoluciones(tmp_path / 'f0.csv', REGISTROS * 3)),
+            str(escribir_devoluciones(tmp_path / 'f1.csv', REGISTROS[::-1], separador='|'))]
+
+@pytest.mark.parametrize('motor', file_handlers.MOTORES_CSV)
+def test_streaming_exporta_lo_mismo_que_la_lectura_completa(tmp_path, archivos, monkeypatch, motor):
+    monkeypatch.setattr(file_handlers, '_motor_csv', motor)
+    completo = procesar(archivos)
+    por_bloques = procesar(archivos, modo_streaming=True, tamano_bloque=4)
+
+    esperado = exportar(completo['dataframes'], tmp_path / 'completo')
+    assert esperado == exportar(por_bloques['dataframes'], tmp_path / 'por_bloques')
+    pd.testing.assert_frame_equal(completo['resumen'], por_bloques['resumen'])
+    # Los valores se exportan tal como vienen en el archivo
+    assert b'\n000|5512345600|Hola' in esperado['A.csv']
+    assert b'12345678901234567890123|5512345602|' in esperado['A.csv']
+
+    # Exportar mientras se procesa escribe los mismos bytes en los dos modos
+    for nombre, opciones in (('al_vuelo', {}), ('al_vuelo_bloques', {'modo_streaming': True, 'tamano_bloque': 4})):
+        carpeta = tmp_path / nombre
+        os.makedirs(carpeta)
+        procesar(archivos, carpeta_exportacion=str(carpeta), **opciones)
+        assert contenido_carpeta(carpeta) == esperado
+
+def exportacion_y_resumen(resultado, carpeta):
+    return exportar(resultado['dataframes'], carpeta), resultado['resumen']
+
+def comparar_con_corrida_completa(tmp_path, incremental, completa):
+    exportado, resumen = exportacion_y_resumen(incremental, tmp_path / 'incremental')
+    esperado, resumen_esperado = exportacion_y_resumen(completa, tmp_path / 'completa')
+    assert exportado == esperado
+    pd.testing.assert_frame_equal(resumen, resumen_esperado)
+
+@pytest.mark.parametrize('clave', ['numtelefono', 'clienteid'])
+@pytest.mark.parametrize('politica', ['conservar_primero', 'conservar_ultimo', 'rechazar'])
+@pytest.mark.parametrize('por_campana', [True, False])
+def test_reproceso_incremental_con_duplicados_igual_a_corrida_completa(tmp_path, archivos, clave, politica, por_campana):
+    # Primera corrida sin duplicados (las particiones guardadas se vuelven vistas del consolidado)
+    previo = procesar(archivos[:1])
+    opciones = {'clave_duplicados': clave, 'politica_duplicados': politica, 'duplicados_por_campana': por_campana}
+    incremental = procesar(archivos, resultados_previos=previo['por_archivo'], **opciones)
+    comparar_con_corrida_completa(tmp_path, incremental, procesar(archivos, **opciones))
+    assert incremental['resumen']['Duplicados'].sum() > 0
+
+def test_reproceso_incremental_reutiliza_archivos_sin_cambios(tmp_path, archivos, monkeypatch):
+    previo = procesar(archivos)
+    leidos = []
+    procesar_archivo = ProcessingThread.procesar_archivo
+    def registrar(hilo, file_path):
+        leidos.append(file_path)
+        return procesar_archivo(hilo, file_path)
+    monkeypatch.setattr(ProcessingThread, 'procesar_archivo', registrar)
+
+    nuevo = str(escribir_devoluciones(tmp_path / 'f2.csv', REGISTROS[2:6]))
+    incremental = procesar(archivos + [nuevo], resultados_previos=previo['por_archivo'])
+    assert leidos == [nuevo]
+    comparar_con_corrida_completa(tmp_path, incremental, procesar(archivos + [nuevo]))
+
+    # Quitar un archivo: su resultado se retira sin volver a leer los demás
+    leidos.clear()
+    sin_f0 = procesar(archivos[1:], resultados_previos=incremental['por_archivo'])
+    assert leidos == []
+    comparar_con_corrida_completa(tmp_path / 'sin_f0', sin_f0, procesar(archivos[1:]))
+
+def test_reproceso_no_mezcla_modos_de_lectura(tmp_path, archivos):
+    # Las particiones del modo streaming solo tienen las columnas de exportación:
+    # una corrida normal no las reutiliza
+    previo = procesar(archivos[:1], modo_streaming=True, tamano_bloque=4)
+    opciones = {'clave_duplicados': 'clienteid'}
+    normal = procesar(archivos, resultados_previos=previo['por_archivo'], **opciones)
+    completa = procesar(archivos, **opciones)
+    comparar_con_corrida_completa(tmp_path, normal, completa)
+    assert list(normal['dataframes']['A'].columns) == list(completa['dataframes']['A'].columns)
+
+    # Entre corridas del mismo modo sí se reutilizan, con el mismo resultado
+    streaming = procesar(archivos, resultados_previos=previo['por_archivo'], modo_streaming=True, **opciones)
+    comparar_con_corrida_completa(tmp_path / 'streaming', streaming, completa)
\ No newline at end of file
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import sms
+from src.utils.sms import GSM7_BASICO, GSM7_EXTENSION, calcular_segmentos, resumen_segmentos
+
+def segmentos_por_caracter(mensaje):
+    """Cálculo de referencia: llena cada segmento carácter por carácter, sin partir ninguno."""
+    if all(c in GSM7_BASICO or c in GSM7_EXTENSION for c in mensaje):
+        anchos = [2 if c in GSM7_EXTENSION else 1 for c in mensaje]
+        simple, parte, es_ucs2 = sms.LIMITE_GSM7_SIMPLE, sms.LIMITE_GSM7_PARTE, False
+    else:
+        anchos = [len(c.encode('utf-16-le')) // 2 for c in mensaje]
+        simple, parte, es_ucs2 = sms.LIMITE_UCS2_SIMPLE, sms.LIMITE_UCS2_PARTE, True
+    if sum(anchos) <= simple:
+        return 1, es_ucs2
+    segmentos, ocupado = 1, 0
+    for ancho in anchos:
+        if ocupado + ancho > parte:
+            segmentos, ocupado = segmentos + 1, 0
+        ocupado += ancho
+    return segmentos, es_ucs2
+
+def segmentos(*mensajes):
+    return calcular_segmentos(pd.Series(mensajes, dtype=object))[0].tolist()
+
+def test_limites_gsm7():
+    assert segmentos('a' * 160, 'a' * 161, 'a' * 306, 'a' * 307) == [1, 2, 2, 3]
+    # Los caracteres de la tabla de extensión ocupan dos septetos
+    assert segmentos('€' * 80, '€' * 80 + 'a', 'a' * 159 + '{') == [1, 2, 2]
+
+def test_limites_ucs2():
+    assert segmentos('á' * 70, 'á' * 71, 'á' * 134, 'á' * 135) == [1, 2, 2, 3]
+    assert calcular_segmentos(pd.Series(['á' * 70, 'a' * 70]))[1].tolist() == [True, False]
+    # Fuera del plano básico: dos unidades UTF-16 (par sustituto)
+    assert segmentos('😀' * 35, '😀' * 35 + 'a', 'a' * 69 + '😀') == [1, 2, 2]
+
+def test_caracter_de_dos_unidades_en_el_corte_pasa_al_siguiente_segmento():
+    # 306 septetos caben en dos partes de 153, pero el '€' no se puede partir en la posición 152
+    assert segmentos('a' * 152 + '€' + 'a' * 152, 'a' * 153 + '€' + 'a' * 151) == [3, 2]
+    # Igual con un par sustituto en el corte de una parte UCS-2 de 67 unidades
+    assert segmentos('á' * 66 + '😀' + 'á' * 66, 'á' * 67 + '😀' + 'á' * 65) == [3, 2]
+
+def test_vacios_y_nulos():
+    segmentos_filas, es_ucs2 = calcular_segmentos(pd.Series(['', None, np.nan, 'Hola']))
+    assert segmentos_filas.tolist() == [1, 0, 0, 1]
+    assert es_ucs2.tolist() == [False, False, False, False]
+
+@pytest.mark.parametrize('celdas_lote', [10**6, 500], ids=['un_lote', 'varios_lotes'])
+def test_segmentos_igual_a_calculo_por_caracter(celdas_lote, monkeypatch):
+    monkeypatch.setattr('src.utils.validators.CELDAS_LOTE_LOCALIZACION', celdas_lote)
+    rng = np.random.default_rng(7)
+    alfabeto = np.array(list('aZ 0.,€{|~á😀𝄞ñ'), dtype=object)
+    pesos = np.array([30, 10, 10, 5, 3, 3, 4, 2, 2, 2, 2, 1, 1, 2], dtype=float)
+    mensajes = [''.join(rng.choice(alfabeto, rng.integers(0, 420), p=pesos / pesos.sum())) for _ in range(400)]
+    mensajes += ['', 'a' * 152 + '€', 'á' * 66 + '😀']
+    segmentos_filas, es_ucs2 = calcular_segmentos(pd.Series(mensajes))
+    assert list(zip(segmentos_filas.tolist(), es_ucs2.tolist())) == [segmentos_por_caracter(m) for m in mensajes]
+
+def test_resumen_por_campana():
+    mensajes = pd.Series(['Hola', 'a' * 161, 'á', 'a' * 500, None])
+    segmentos_filas, es_ucs2 = calcular_segmentos(mensajes)
+    resumen = resumen_segmentos(['A', 'A', 'B', 'B', 'B'], segmentos_filas, es_ucs2, 3)
+    assert resumen == {'A': {'Segmentos': 3, 'Multiparte': 1, 'UCS-2': 0, 'Sobre límite': 0},
+                       'B': {'Segmentos': 5, 'Multiparte': 1, 'UCS-2': 1, 'Sobre límite': 1}}
\ No newline at end of file
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import telefonos
+from src.utils.telefonos import TELEFONO_INVALIDO, normalizar_telefonos
+from tests.test_processing import escribir_devoluciones, procesar, sin_cache_lectura  # noqa: F401
+
+# Texto de entrada -> número nacional (None = inválido)
+CASOS = {
+    '5512345678': 5512345678,
+    '+52 55 1234 5678': 5512345678,
+    '525512345678': 5512345678,
+    '5215512345678': 5512345678,
+    '+521 (55) 1234-5678': 5512345678,
+    '0445512345678': 5512345678,
+    '045 33 1234 5678': 3312345678,
+    '013312345678': 3312345678,
+    '8112345678': 8112345678,
+    # Largo incorrecto para el prefijo, número que empieza con 0 o 1, vacíos y texto
+    '52551234567': None,
+    '04455123456789': None,
+    '015512345678901': None,
+    '0551234567': None,
+    '1512345678': None,
+    '5212345678': 5212345678, # 10 dígitos: no se quita el 52
+    '': None,
+    'sin numero': None,
+    None: None,
+}
+
+def esperado(valores):
+    return np.array([TELEFONO_INVALIDO if CASOS[v] is None else CASOS[v] for v in valores], dtype=np.int64)
+
+@pytest.mark.parametrize('con_pyarrow', [True, False])
+@pytest.mark.parametrize('dtype', [object, 'string'])
+def test_prefijos_y_formatos(dtype, con_pyarrow, monkeypatch):
+    if not con_pyarrow:
+        monkeypatch.setattr(telefonos, 'pa', None)
+    valores = list(CASOS)
+    numeros = normalizar_telefonos(pd.Series(valores, dtype=dtype))
+    assert numeros.dtype == np.int64
+    np.testing.assert_array_equal(numeros, esperado(valores))
+
+def test_solo_digitos_usa_la_ruta_entera(monkeypatch):
+    # Todos los valores son enteros escritos sin formato: no pasan por la normalización de texto
+    def sin_textos(serie):
+        raise AssertionError(f"normalización por texto de {serie.tolist()}")
+    monkeypatch.setattr(telefonos, '_normalizar_textos', sin_textos)
+    valores = ['5512345678', '525512345678', '5215512345678', '8112345678', '1512345678', '52551234567']
+    np.testing.assert_array_equal(normalizar_telefonos(pd.Series(valores)), esperado(valores))
+
+@pytest.mark.parametrize('dtype', ['int64', 'Int64', 'float64'])
+def test_columnas_numericas_igual_que_texto(dtype):
+    valores = ['5512345678', '525512345678', '5215512345678', '8112345678', '1512345678', '52551234567', '5212345678']
+    serie = pd.Series([int(v) for v in valores], dtype=dtype)
+    np.testing.assert_array_equal(normalizar_telefonos(serie), esperado(valores))
+
+def test_enteros_con_vacios():
+    serie = pd.Series([5512345678.0, np.nan, 525512345678.0], dtype='float64')
+    assert normalizar_telefonos(serie).tolist() == [5512345678, TELEFONO_INVALIDO, 5512345678]
+    serie = pd.Series([5512345678, None, 4412345678], dtype='Int64')
+    assert normalizar_telefonos(serie).tolist() == [5512345678, TELEFONO_INVALIDO, 4412345678]
+
+@pytest.mark.parametrize('opciones', [{}, {'modo_streaming': True, 'tamano_bloque': 2}], ids=['completo', 'por_bloques'])
+def test_filas_invalidas_van_al_reporte_de_rechazados(tmp_path, opciones):
+    registros = [('1', '5512345600', 'Hola', 'A'),
+                 ('2', '', 'Vacio', 'A'),
+                 ('3', '+52 55 1234 5601', 'Hola', 'B'),
+                 ('4', '1512345678', 'Empieza con 1', 'B'),
+                 ('5', '52551234567', 'Corto', 'A')]
+    ruta = str(escribir_devoluciones(tmp_path / 'f0.csv', registros))
+    resultado = procesar([ruta], **opciones)
+
+    rechazados = resultado['telefonos_invalidos']
+    assert rechazados.columns.tolist() == ['Archivo', 'Fila', 'clienteid', 'numtelefono', 'campana']
+    assert rechazados['Fila'].tolist() == [3, 5, 6]
+    assert rechazados['clienteid'].tolist() == ['2', '4', '5']
+    assert rechazados['campana'].tolist() == ['A', 'B', 'A']
+    assert set(rechazados['Archivo']) == {'f0.csv'}
+
+    resumen = resultado['resumen'].set_index('Campaña')
+    assert resumen.loc['A', 'Teléfonos inválidos'] == 2 and resumen.loc['B', 'Teléfonos inválidos'] == 1
+    exportados = pd.concat(resultado['dataframes'].values())
+    assert sorted(exportados['numtelefono'].tolist()) == [5512345600, 5512345601]
\ No newline at end of file
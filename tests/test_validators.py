@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config.validacion import CARACTERES_PERMITIDOS, TRANSLITERACION
+from src.utils import cache_lectura, cache_validacion, validators
+from src.utils.validators import (clasificar_mensajes, detallar_caracteres_no_permitidos,
+                                  filas_con_caracteres_no_permitidos, localizar_caracteres_no_permitidos,
+                                  sanitizar_mensajes, validar_mensajes)
+
+# Vacíos, un número, acentos, un emoji (fuera del plano básico) y mensajes repetidos
+MENSAJES = ['Hola', None, '', 'Pago hoy', 'Canción', np.nan, 'Hola', 'Oferta 😀 ya', 'Ñandú ñ', 12345,
+            'Pago hoy', 'Tab\taquí', '😀', 'Canción']
+
+def validar_mensajes_por_fila(df, caracteres_permitidos):
+    """Validación original: recorre cada mensaje y cada carácter en Python."""
+    mensajes_invalidos = []
+    for idx, mensaje in df['mensaje'].items():
+        if pd.isna(mensaje):
+            continue
+        mensaje_str = str(mensaje)
+        for char in mensaje_str:
+            if char not in caracteres_permitidos:
+                mensajes_invalidos.append(f"Fila {idx+2}: '{mensaje_str}' - Carácter no permitido: '{char}'")
+                if len(mensajes_invalidos) >= 10:
+                    mensajes_invalidos.append("... (más errores encontrados)")
+                    return "\n".join(mensajes_invalidos)
+    return "\n".join(mensajes_invalidos) if mensajes_invalidos else ""
+
+def filas_invalidas_por_fila(serie, caracteres_permitidos):
+    return np.array([not pd.isna(m) and any(c not in caracteres_permitidos for c in str(m)) for m in serie])
+
+@pytest.fixture(autouse=True)
+def cache_validacion_aislada(monkeypatch):
+    # Caché de validación solo en memoria y vacía en cada prueba
+    monkeypatch.setattr(cache_lectura, '_cache_habilitada', False)
+    monkeypatch.setattr(cache_validacion, '_caches', {})
+
+def mensajes(valores, dtype):
+    serie = pd.Series(valores, dtype=object)
+    return serie if dtype is None else serie.astype(dtype)
+
+@pytest.mark.parametrize('dtype', [None, 'string'])
+@pytest.mark.parametrize('valores', [MENSAJES, MENSAJES[:6], [None, '', 'Hola'], []], ids=['todos', 'pocos', 'validos', 'vacio'])
+def test_validar_mensajes_igual_a_recorrido_por_fila(valores, dtype):
+    if dtype == 'string':
+        valores = [v if v is None or isinstance(v, str) or pd.isna(v) else str(v) for v in valores]
+    df = pd.DataFrame({'mensaje': mensajes(valores, dtype)})
+    esperado = validar_mensajes_por_fila(df, CARACTERES_PERMITIDOS)
+    assert validar_mensajes(df, CARACTERES_PERMITIDOS) == esperado
+    # La segunda vez los mensajes válidos salen de la caché con el mismo resultado
+    assert validar_mensajes(df, CARACTERES_PERMITIDOS) == esperado
+
+def test_validar_mensajes_detalla_solo_los_primeros_diez_errores():
+    # Índice no consecutivo: las filas del reporte salen del índice, no de la posición
+    df = pd.DataFrame({'mensaje': ['Bien', 'ñañá', 'Ok', '😀😀😀', 'áéíóú', 'Otro ñ']}, index=[3, 0, 8, 5, 1, 9])
+    resultado = validar_mensajes(df, CARACTERES_PERMITIDOS)
+    assert resultado == validar_mensajes_por_fila(df, CARACTERES_PERMITIDOS)
+    lineas = resultado.split('\n')
+    assert len(lineas) == 11 and lineas[-1] == "... (más errores encontrados)"
+    assert lineas[0] == "Fila 2: 'ñañá' - Carácter no permitido: 'ñ'"
+    assert lineas[3] == "Fila 7: '😀😀😀' - Carácter no permitido: '😀'"
+
+    # Exactamente diez errores también agrega el aviso, como la validación original
+    df = pd.DataFrame({'mensaje': ['ññññññññññ']})
+    assert validar_mensajes(df, CARACTERES_PERMITIDOS).endswith("... (más errores encontrados)")
+    assert validar_mensajes(df, CARACTERES_PERMITIDOS) == validar_mensajes_por_fila(df, CARACTERES_PERMITIDOS)
+
+@pytest.mark.parametrize('dtype', [None, 'string'])
+@pytest.mark.parametrize('max_mensajes_cache', [cache_validacion.MAX_MENSAJES_CACHE, 2], ids=['con_cache', 'sin_cache'])
+def test_filas_marcadas_igual_a_recorrido_por_fila(dtype, max_mensajes_cache, monkeypatch):
+    # Con más mensajes distintos que el límite de la caché se valida con la regex directamente
+    monkeypatch.setattr(validators, 'MAX_MENSAJES_CACHE', max_mensajes_cache)
+    rng = np.random.default_rng(0)
+    valores = [v if isinstance(v, str) else None for v in MENSAJES]
+    serie = mensajes(rng.choice(np.array(valores, dtype=object), 2000), dtype)
+    esperado = filas_invalidas_por_fila(serie, CARACTERES_PERMITIDOS)
+    np.testing.assert_array_equal(filas_con_caracteres_no_permitidos(serie, CARACTERES_PERMITIDOS), esperado)
+    np.testing.assert_array_equal(filas_con_caracteres_no_permitidos(serie, CARACTERES_PERMITIDOS), esperado)
+
+def test_clasificar_mensajes_valida_cada_mensaje_distinto_una_vez():
+    serie = pd.Series(['Hola', None, 'Canción', 'Hola', '', 'Canción'])
+    codigos, unicos, invalidos = clasificar_mensajes(serie, CARACTERES_PERMITIDOS)
+    assert codigos.tolist() == [0, -1, 1, 0, 2, 1]
+    assert list(unicos) == ['Hola', 'Canción', '']
+    assert invalidos.tolist() == [False, True, False]
+def errores_por_fila(serie, caracteres_permitidos):
+    """(índice, posición, carácter) de cada carácter no permitido, recorriendo los mensajes en Python."""
+    return [(idx, posicion, char) for idx, mensaje in serie.items() if not pd.isna(mensaje)
+            for posicion, char in enumerate(str(mensaje)) if char not in caracteres_permitidos]
+
+# Largos muy distintos (caen en lotes distintos), pares sustitutos y el error al final del mensaje
+MENSAJES_LOCALIZACION = ['Hola', '😀 al inicio', 'al final 😀', 'mixto ñ😀á 𝄞 fin', 'ñ', None, '',
+                         'largo ' * 200 + 'ñ', 'Hola', '𝄞𝄞', 'mixto ñ😀á 𝄞 fin', 'x' * 3000 + '😀']
+
+@pytest.mark.parametrize('celdas_lote', [validators.CELDAS_LOTE_LOCALIZACION, 50], ids=['un_lote', 'varios_lotes'])
+def test_localizar_igual_a_recorrido_en_python(celdas_lote, monkeypatch):
+    monkeypatch.setattr(validators, 'CELDAS_LOTE_LOCALIZACION', celdas_lote)
+    serie = pd.Series(MENSAJES_LOCALIZACION, index=np.arange(len(MENSAJES_LOCALIZACION)) * 3 + 1)
+    filas, posiciones, codigos = localizar_caracteres_no_permitidos(serie, CARACTERES_PERMITIDOS)
+    assert filas.dtype == np.int64 and posiciones.dtype == np.int32 and codigos.dtype == np.uint32
+    assert list(zip(filas.tolist(), posiciones.tolist(), map(chr, codigos.tolist()))) == \
+        errores_por_fila(serie, CARACTERES_PERMITIDOS)
+
+def test_localizar_sin_errores():
+    filas, posiciones, codigos = localizar_caracteres_no_permitidos(pd.Series(['Hola', None, '']), CARACTERES_PERMITIDOS)
+    assert len(filas) == len(posiciones) == len(codigos) == 0
+
+def test_detallar_igual_a_recorrido_en_python():
+    serie = pd.Series(MENSAJES_LOCALIZACION, index=np.arange(len(MENSAJES_LOCALIZACION))[::-1])
+    mascara = filas_con_caracteres_no_permitidos(serie, CARACTERES_PERMITIDOS)
+    detalle = list(detallar_caracteres_no_permitidos(serie, mascara, CARACTERES_PERMITIDOS, limite=len(serie)))
+    assert [(idx, posicion, char) for idx, posicion, char, _ in detalle] == errores_por_fila(serie, CARACTERES_PERMITIDOS)
+    assert all(mensaje == serie[idx] for idx, _, _, mensaje in detalle)
+
+    # El límite cuenta filas marcadas, no errores
+    detalle = list(detallar_caracteres_no_permitidos(serie, mascara, CARACTERES_PERMITIDOS, limite=2))
+    assert sorted({idx for idx, _, _, _ in detalle}) == sorted(serie.index[mascara][:2])
+@pytest.mark.parametrize('dtype', [None, 'string'])
+def test_sanitizar_translitera_y_elimina_los_demas(dtype):
+    serie = mensajes(['Canción “ya”', None, 'Hola', 'Ñandú\tñ', '😀 Oferta…', '', 'Canción “ya”', '¿Qué?'], dtype)
+    serie.index = [10, 11, 12, 13, 14, 15, 16, 17]
+    sanitizada, modificadas = sanitizar_mensajes(serie, CARACTERES_PERMITIDOS, TRANSLITERACION)
+    assert modificadas == 5
+    assert sanitizada.tolist()[:1] + sanitizada.tolist()[2:] == \
+        ['Cancion "ya"', 'Hola', 'Nandu n', ' Oferta...', '', 'Cancion "ya"', 'Que?']
+    assert pd.isna(sanitizada[11])
+    assert sanitizada.index.equals(serie.index) and sanitizada.dtype == serie.dtype
+    # La serie original no se modifica
+    assert serie[10] == 'Canción “ya”'
+
+    # Lo sanitizado pasa la validación
+    assert not filas_con_caracteres_no_permitidos(sanitizada, CARACTERES_PERMITIDOS).any()
+    assert validar_mensajes(pd.DataFrame({'mensaje': sanitizada}), CARACTERES_PERMITIDOS) == ""
+    assert sanitizar_mensajes(sanitizada, CARACTERES_PERMITIDOS, TRANSLITERACION)[1] == 0
+
+def test_sanitizar_no_translitera_caracteres_permitidos():
+    # Un reemplazo configurado para un carácter permitido no se aplica
+    serie = pd.Series(['É ñ'])
+    sanitizada, modificadas = sanitizar_mensajes(serie, CARACTERES_PERMITIDOS, {'É': 'E', 'ñ': 'n'})
+    assert (sanitizada.tolist(), modificadas) == (['É n'], 1)
\ No newline at end of file